@@ -6,6 +6,9 @@ from modules.horarios.views import view_horarios
 from modules.cursos.views import view_cursos
 from utils.ui import aplicar_tema_personalizado
 from utils.helpers import LOGO
+from config.db import modo_solo_lectura
+from utils.memo import alcance_de_ejecucion
+from config.metrics import medir_interaccion
 
 def main():
     st.set_page_config(
@@ -13,19 +16,26 @@ def main():
         page_icon=LOGO,
         layout="wide"
     )
-    aplicar_tema_personalizado()
-    usuario = renderizar_login()
+    # Cuenta las sentencias de cada rerun completo
+    with medir_interaccion("app"):
+        aplicar_tema_personalizado()
+        usuario = renderizar_login()
     
-    st.title("Scheduleee For Dummies")
-    st.write("Bienvenido al sistema de gestión de salones y espacios.")
+        st.title("Scheduleee For Dummies")
+        st.write("Bienvenido al sistema de gestión de salones y espacios.")
     
-    if usuario:
-        renderizar_sidebar(usuario)
-        st.divider()
-        view_salones()
-        view_cursos()
-        view_horarios()
-        view_reservaciones()
+        if usuario:
+            renderizar_sidebar(usuario)
+            if modo_solo_lectura():
+                st.warning("⚠️ Sin conexión con la base de datos. Se muestran los últimos catálogos disponibles en modo solo lectura.")
+            st.divider()
+            # Una misma consulta se ejecuta una sola vez por rerun
+            with alcance_de_ejecucion():
+                view_salones()
+                view_cursos()
+                view_horarios()
+                view_reservaciones()
+
 
 if __name__ == "__main__":
     main()
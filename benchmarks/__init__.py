@@ -0,0 +1,9 @@
+"""
+Datos sintéticos y benchmarks de consultas.
+
+    python -m benchmarks.generator --escala 10
+    python -m benchmarks.runner --escalas 1 5 10
+
+Todas las filas generadas llevan el prefijo SYN para poder borrarlas sin
+tocar los datos reales.
+"""
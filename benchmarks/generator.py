@@ -0,0 +1,202 @@
+"""
+Generador determinista de un campus grande.
+
+Con la misma escala y semilla produce siempre las mismas filas. Los horarios
+no se traslapan entre sí y las reservaciones no chocan con horarios ni con
+otras reservaciones, igual que si se hubieran creado desde la aplicación.
+"""
+import argparse
+import random
+from datetime import time
+
+from config.db import get_connection
+from config.cache import invalidar
+from utils.period_helpers import fechas_del_dia_semana
+
+PREFIJO = "SYN"
+
+# Filas por unidad de escala. Con escala 10: ~6,000 secciones por periodo
+# y ~250,000 reservaciones en total.
+POR_ESCALA = {
+    "salones": 100,
+    "materias": 300,
+    "secciones_por_materia": 2,
+    "usuarios": 2000,
+    # Secciones con horario por periodo (el resto de los cursos queda sin salón asignado)
+    "secciones_con_horario": 600,
+    "reservaciones": 25000,
+}
+
+# Entidades con factor propio; las que no se dan usan la escala general
+ENTIDADES = ["salones", "cursos", "horarios", "reservaciones"]
+
+TAMANO_LOTE = 1000
+
+DIAS = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado']
+# Pares de días que comparte una sección (ej. Lunes y Miércoles)
+PARES_DIAS = [(0, 2), (1, 3), (2, 4), (0, 4), (5, 5)]
+# Bloques de 90 min de 07:00 a 20:30; las 21:00 quedan libres para los benchmarks de escritura
+BLOQUES = [time(7 + (90 * k) // 60, (90 * k) % 60) for k in range(9)]
+
+TIPOS_SALON = [("Aula", 20, 60), ("Laboratorio", 15, 35), ("Auditorio", 80, 200)]
+NOMBRES = ["Ana", "Luis", "María", "Jorge", "Sofía", "Carlos", "Lucía", "Miguel", "Elena", "Pablo"]
+APELLIDOS = ["García", "Hernández", "López", "Martínez", "Pérez", "Sánchez", "Ramírez", "Torres", "Flores", "Rivera"]
+MOTIVOS = ["Asesoría", "Examen extraordinario", "Reunión de academia", "Taller", "Club estudiantil"]
+
+
+def _insertar(cursor, sql: str, filas: list[tuple]):
+    for i in range(0, len(filas), TAMANO_LOTE):
+        cursor.executemany(sql, filas[i:i + TAMANO_LOTE])
+
+
+def _nombre(rng: random.Random) -> str:
+    return f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+
+
+def limpiar():
+    """Borra todas las filas sintéticas (prefijo SYN) en orden de dependencias."""
+    with get_connection() as conn, conn.cursor() as cursor:
+        conn.autocommit = False
+        patron = f"{PREFIJO}%"
+        cursor.execute("DELETE FROM reservacion WHERE id_salon LIKE %s OR id_usuario LIKE %s", (patron, patron))
+        cursor.execute("DELETE FROM reservacion_periodica WHERE id_salon LIKE %s OR id_usuario LIKE %s", (patron, patron))
+        cursor.execute("DELETE FROM horario WHERE clave_materia LIKE %s OR id_salon LIKE %s", (patron, patron))
+        cursor.execute("DELETE FROM curso WHERE clave_materia LIKE %s", (patron,))
+        cursor.execute("DELETE FROM materia WHERE clave LIKE %s", (patron,))
+        cursor.execute("DELETE FROM salon WHERE id_salon LIKE %s", (patron,))
+        cursor.execute("DELETE FROM usuario WHERE id_usuario LIKE %s", (patron,))
+        conn.commit()
+    invalidar("salones", "materias", "cursos", "horarios", "reservaciones")
+
+
+def generar(escala: float, semilla: int = 2025, factores: dict[str, float] | None = None) -> dict:
+    """
+    Inserta un campus sintético de tamaño `escala` sobre los periodos existentes.
+    factores da una escala propia a salones, cursos (materias × secciones),
+    horarios (secciones con horario por periodo, hasta el número de cursos) o
+    reservaciones, ej. {"salones": 1, "reservaciones": 20} para muchas
+    reservaciones en pocos salones.
+    Regresa cuántas filas se insertaron por tabla.
+    """
+    factores = {e: (factores or {}).get(e) or escala for e in ENTIDADES}
+    rng = random.Random(semilla)
+
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT id_periodo, fecha_inicio, fecha_fin FROM periodo ORDER BY id_periodo")
+        periodos = cursor.fetchall()
+    if not periodos:
+        raise RuntimeError("No hay periodos; carga primero config/init.sql.")
+
+    salones = []
+    for i in range(max(1, round(POR_ESCALA["salones"] * factores["salones"]))):
+        tipo, cap_min, cap_max = rng.choice(TIPOS_SALON)
+        salones.append((f"{PREFIJO}{i:05d}", rng.randint(cap_min, cap_max), tipo))
+
+    materias = [
+        (f"{PREFIJO}-{i:05d}", f"Materia sintética {i}")
+        for i in range(round(POR_ESCALA["materias"] * factores["cursos"]))
+    ]
+
+    usuarios = [
+        (f"{PREFIJO}{i:06d}", _nombre(rng), rng.choices(["Estudiante", "Profesor"], weights=[9, 1])[0])
+        for i in range(max(1, round(POR_ESCALA["usuarios"] * escala)))
+    ]
+
+    # Cursos y horarios: cada sección con horario toma un par de días en el mismo bloque y salón
+    cursos, horarios = [], []
+    ocupado_horario = set()  # (id_salon, id_periodo, dia, bloque)
+    con_horario = round(POR_ESCALA["secciones_con_horario"] * factores["horarios"])
+    for id_periodo, _, _ in periodos:
+        secciones = [
+            (clave, seccion)
+            for clave, _ in materias
+            for seccion in range(1, POR_ESCALA["secciones_por_materia"] + 1)
+        ]
+        for k, (clave, seccion) in enumerate(secciones):
+            cursos.append((clave, seccion, id_periodo, f"Prof. {_nombre(rng)}"))
+            if k >= con_horario:
+                continue
+            for _ in range(20):
+                id_salon = rng.choice(salones)[0]
+                dias = {DIAS[d] for d in rng.choice(PARES_DIAS)}
+                bloque = rng.randrange(len(BLOQUES))
+                if all((id_salon, id_periodo, d, bloque) not in ocupado_horario for d in dias):
+                    break
+            else:
+                continue  # Campus lleno para esta sección; queda sin horario
+            duracion = rng.choice([60, 90])
+            for dia in sorted(dias):
+                ocupado_horario.add((id_salon, id_periodo, dia, bloque))
+                horarios.append((clave, seccion, id_periodo, id_salon, dia, BLOQUES[bloque], duracion))
+
+    # Reservaciones repartidas en los días hábiles de todos los periodos
+    fechas_por_periodo = [
+        (id_periodo, [f for d in range(6) for f in fechas_del_dia_semana(inicio, fin, d)])
+        for id_periodo, inicio, fin in periodos
+    ]
+    reservaciones = []
+    ocupado_reservacion = set()  # (id_salon, fecha, bloque)
+    objetivo = round(POR_ESCALA["reservaciones"] * factores["reservaciones"])
+    intentos = 0
+    while len(reservaciones) < objetivo and intentos < objetivo * 5:
+        intentos += 1
+        id_periodo, fechas = rng.choice(fechas_por_periodo)
+        fecha = rng.choice(fechas)
+        id_salon = rng.choice(salones)[0]
+        bloque = rng.randrange(len(BLOQUES))
+        dia = DIAS[fecha.weekday()]
+        if (id_salon, id_periodo, dia, bloque) in ocupado_horario or (id_salon, fecha, bloque) in ocupado_reservacion:
+            continue
+        ocupado_reservacion.add((id_salon, fecha, bloque))
+        reservaciones.append((
+            rng.choice(usuarios)[0], id_salon, id_periodo, fecha,
+            BLOQUES[bloque], rng.choice([60, 90]), rng.choice(MOTIVOS),
+        ))
+
+    with get_connection() as conn, conn.cursor() as cursor:
+        conn.autocommit = False
+        _insertar(cursor, "INSERT INTO salon (id_salon, capacidad, tipo) VALUES (%s, %s, %s)", salones)
+        _insertar(cursor, "INSERT INTO materia (clave, titulo) VALUES (%s, %s)", materias)
+        _insertar(cursor, "INSERT INTO usuario (id_usuario, nombre, rol) VALUES (%s, %s, %s)", usuarios)
+        _insertar(cursor, "INSERT INTO curso (clave_materia, seccion, id_periodo, profesor) VALUES (%s, %s, %s, %s)", cursos)
+        _insertar(cursor, """
+            INSERT INTO horario (clave_materia, seccion_curso, id_periodo, id_salon, dia_semana, hora_inicio, duracion_minutos)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, horarios)
+        _insertar(cursor, """
+            INSERT INTO reservacion (id_usuario, id_salon, id_periodo, fecha, hora_inicio, duracion_minutos, motivo)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, reservaciones)
+        conn.commit()
+    invalidar("salones", "materias", "cursos", "horarios", "reservaciones")
+
+    return {
+        "salones": len(salones),
+        "materias": len(materias),
+        "usuarios": len(usuarios),
+        "cursos": len(cursos),
+        "horarios": len(horarios),
+        "reservaciones": len(reservaciones),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un campus sintético en la BD configurada en .env")
+    parser.add_argument("--escala", type=float, default=1, help="Multiplicador de filas (1 = ~100 salones, 25,000 reservaciones)")
+    for entidad in ENTIDADES:
+        parser.add_argument(f"--{entidad}", type=float, help=f"Escala propia de {entidad} (por omisión, --escala)")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--solo-limpiar", action="store_true", help="Borra los datos sintéticos y no genera nuevos")
+    args = parser.parse_args()
+
+    limpiar()
+    if args.solo_limpiar:
+        print("Datos sintéticos eliminados.")
+        return
+    conteos = generar(args.escala, args.semilla, {e: getattr(args, e) for e in ENTIDADES})
+    for tabla, n in conteos.items():
+        print(f"{tabla:>14}: {n:,}")
+
+
+if __name__ == "__main__":
+    main()
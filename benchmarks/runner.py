@@ -0,0 +1,375 @@
+"""
+Mide las funciones de queries.py y transactions.py sobre el campus sintético.
+
+Para cada escala: borra los datos sintéticos, genera los nuevos, ejecuta cada
+caso `--repeticiones` veces y escribe un JSON con la misma forma en todas
+las escalas, para poder comparar corridas entre sí.
+
+    python -m benchmarks.runner --escalas 1 5 10 --salida benchmarks/resultados
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime, timedelta, time as dt_time
+
+from config.cache import cache, invalidar
+from config.db import get_connection
+from config.metrics import sentencias_del_hilo
+from modules.cursos.queries import obtener_cursos_existentes, obtener_catalogos_para_curso
+from modules.cursos.transactions import crear_nuevo_curso
+from modules.horarios.queries import (
+    obtener_horario_completo,
+    obtener_horario_completo_pagina,
+    obtener_resumen_horarios,
+    filtrar_horario,
+    filtrar_horario_pagina,
+)
+from modules.horarios.transactions import crear_horario, crear_horarios_curso, actualizar_horario, eliminar_horarios
+from modules.reservaciones.conflict_engine import motor_conflictos
+from modules.reservaciones.recommender import recomendar_salones
+from modules.reservaciones.queries import (
+    obtener_disponibilidad_salones,
+    obtener_disponibilidad_salones_lote,
+    obtener_mis_reservaciones,
+    obtener_mis_reservaciones_pagina,
+    obtener_mis_reservaciones_periodicas,
+    obtener_ocupacion_salon,
+    obtener_salones_libres_patron,
+    obtener_periodos as obtener_periodos_reservacion,
+)
+from modules.reservaciones.transactions import (
+    crear_reservacion,
+    crear_reservacion_periodica,
+    cancelar_reservacion,
+    cancelar_reservaciones_por_intervalo,
+    cancelar_reservacion_periodica,
+    cancelar_fecha_periodica,
+)
+from modules.salones.analytics import obtener_cubo_ocupacion
+from modules.salones.queries import (
+    obtener_catalogo_salones,
+    obtener_salones_avanzado,
+    obtener_periodos as obtener_periodos_salon,
+    obtener_top_salones_ocupados,
+    obtener_ocupacion_por_dia,
+)
+from modules.salones.transactions import crear_salon, borrar_salones
+
+from . import generator
+
+# Usuario dueño de las reservaciones que crean los casos de escritura
+USUARIO_BENCH = f"{generator.PREFIJO}BENCH"
+# Fuera de los bloques del generador, así las escrituras nunca chocan
+HORA_ESCRITURA = dt_time(21, 0)
+# Filas que crean/borran los casos de escritura por lotes
+LOTE_ESCRITURA = 20
+# Salones y sección que crean los casos de escritura (prefijo SYN: limpiar() los borra)
+SALON_BENCH = f"{generator.PREFIJO}BENCH"
+SECCION_BENCH = 99
+
+
+def _parametros() -> dict:
+    """Elige periodo, fecha, salón y usuario con datos sintéticos para los casos."""
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT id_periodo, COUNT(*) AS n
+            FROM horario
+            WHERE clave_materia LIKE %s
+            GROUP BY id_periodo
+            ORDER BY n DESC, id_periodo
+            LIMIT 1
+        """, (f"{generator.PREFIJO}%",))
+        id_periodo = cursor.fetchone()[0]
+
+        cursor.execute("SELECT fecha_inicio, fecha_fin FROM periodo WHERE id_periodo = %s", (id_periodo,))
+        fecha_inicio, fecha_fin = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT id_usuario, COUNT(*) AS n
+            FROM reservacion
+            WHERE id_usuario LIKE %s
+            GROUP BY id_usuario
+            ORDER BY n DESC, id_usuario
+            LIMIT 1
+        """, (f"{generator.PREFIJO}%",))
+        id_usuario = cursor.fetchone()[0]
+
+        cursor.execute("""
+            SELECT clave_materia, seccion
+            FROM curso
+            WHERE clave_materia LIKE %s AND id_periodo = %s
+            ORDER BY clave_materia, seccion
+            LIMIT 1
+        """, (f"{generator.PREFIJO}%", id_periodo))
+        clave_materia, seccion = cursor.fetchone()
+
+        cursor.execute(
+            "SELECT id_salon FROM salon WHERE id_salon LIKE %s ORDER BY id_salon LIMIT %s",
+            (f"{generator.PREFIJO}0%", LOTE_ESCRITURA),
+        )
+        salones = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(
+            "INSERT IGNORE INTO usuario (id_usuario, nombre, rol) VALUES (%s, 'Benchmark', 'Administrador')",
+            (USUARIO_BENCH,),
+        )
+        conn.commit()
+
+    # Primer martes del periodo a media mañana: hay clases y reservaciones
+    fecha = fecha_inicio
+    while fecha.weekday() != 1:
+        fecha += timedelta(days=1)
+
+    return {
+        "id_periodo": id_periodo,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "fecha": fecha,
+        "id_salon": f"{generator.PREFIJO}00000",
+        "id_usuario": id_usuario,
+        "clave_materia": clave_materia,
+        "seccion": seccion,
+        "salones": salones,
+    }
+
+
+def _ejecutar(sql: str, params=(), *etiquetas: str) -> list:
+    """SQL de preparación fuera de la medición; regresa las filas si las hay."""
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        filas = cursor.fetchall() if cursor.with_rows else []
+        conn.commit()
+    if etiquetas:
+        invalidar(*etiquetas)
+    return filas
+
+
+def _casos(p: dict) -> list[tuple]:
+    """
+    (nombre, función a medir, preparación sin medir).
+    La preparación vacía cachés o deshace la escritura de la repetición anterior.
+    """
+    def en_frio():
+        cache.limpiar()
+
+    def deshacer_escrituras():
+        cancelar_reservaciones_por_intervalo(USUARIO_BENCH, p["fecha_inicio"], p["fecha_fin"])
+        cache.limpiar()
+
+    def motor_en_frio():
+        motor_conflictos.marcar_desactualizado()
+
+    # Ids que crea la preparación y consume el caso medido
+    estado = {}
+
+    def borrar_horarios_bench():
+        _ejecutar(
+            "DELETE FROM horario WHERE clave_materia = %s AND seccion_curso = %s AND id_periodo = %s AND hora_inicio = %s",
+            (p["clave_materia"], p["seccion"], p["id_periodo"], HORA_ESCRITURA), "horarios",
+        )
+
+    def preparar_horarios():
+        """Un horario de la sección a las HORA_ESCRITURA del lunes en cada salón del lote."""
+        borrar_horarios_bench()
+        for id_salon in p["salones"]:
+            crear_horario(id_salon, HORA_ESCRITURA, 60, ["Lunes"], p["clave_materia"], p["seccion"], p["id_periodo"])
+        estado["horarios"] = [row[0] for row in _ejecutar(
+            "SELECT id_horario FROM horario WHERE clave_materia = %s AND seccion_curso = %s AND id_periodo = %s AND hora_inicio = %s",
+            (p["clave_materia"], p["seccion"], p["id_periodo"], HORA_ESCRITURA),
+        )]
+        cache.limpiar()
+
+    def preparar_reservaciones():
+        """Una reservación del usuario de benchmark por salón del lote, en la misma fecha."""
+        deshacer_escrituras()
+        for id_salon in p["salones"]:
+            crear_reservacion(USUARIO_BENCH, id_salon, p["fecha"], HORA_ESCRITURA, 60, p["id_periodo"], "Benchmark")
+        estado["reservaciones"] = [row[0] for row in _ejecutar(
+            "SELECT id_reservacion FROM reservacion WHERE id_usuario = %s", (USUARIO_BENCH,)
+        )]
+        cache.limpiar()
+
+    def preparar_periodica():
+        deshacer_escrituras()
+        crear_reservacion_periodica(USUARIO_BENCH, p["id_salon"], "Martes", HORA_ESCRITURA, 60, p["id_periodo"], "Benchmark")
+        estado["regla"] = _ejecutar(
+            "SELECT MAX(id_regla) FROM reservacion_periodica WHERE id_usuario = %s", (USUARIO_BENCH,)
+        )[0][0]
+        cache.limpiar()
+
+    def borrar_salones_bench():
+        ids = [f"{SALON_BENCH}{i:02d}" for i in range(LOTE_ESCRITURA)]
+        _ejecutar("DELETE FROM reservacion WHERE id_salon LIKE %s", (f"{SALON_BENCH}%",))
+        _ejecutar("DELETE FROM salon WHERE id_salon LIKE %s", (f"{SALON_BENCH}%",), "salones", "reservaciones")
+        return ids
+
+    def preparar_salones():
+        """Salones nuevos con una reservación cada uno, para borrarlos en lote."""
+        ids = borrar_salones_bench()
+        for id_salon in ids:
+            crear_salon(id_salon, 30, "Aula")
+            crear_reservacion(USUARIO_BENCH, id_salon, p["fecha"], HORA_ESCRITURA, 60, p["id_periodo"], "Benchmark")
+        estado["salones"] = ids
+        cache.limpiar()
+
+    def borrar_curso_bench():
+        _ejecutar(
+            "DELETE FROM curso WHERE clave_materia = %s AND seccion = %s AND id_periodo = %s",
+            (p["clave_materia"], SECCION_BENCH, p["id_periodo"]), "cursos",
+        )
+        cache.limpiar()
+
+    return [
+        ("obtener_catalogo_salones", obtener_catalogo_salones, en_frio),
+        ("obtener_catalogo_salones (caché)", obtener_catalogo_salones, None),
+        ("obtener_salones_avanzado", lambda: obtener_salones_avanzado(30, "Aula"), en_frio),
+        ("salones.obtener_periodos", obtener_periodos_salon, en_frio),
+        ("obtener_ocupacion_por_dia", lambda: obtener_ocupacion_por_dia(p["id_periodo"], p["id_salon"]), en_frio),
+        ("obtener_cursos_existentes", obtener_cursos_existentes, en_frio),
+        ("obtener_catalogos_para_curso", obtener_catalogos_para_curso, en_frio),
+        ("obtener_resumen_horarios", obtener_resumen_horarios, en_frio),
+        ("filtrar_horario_pagina", lambda: filtrar_horario_pagina(id_periodo=p["id_periodo"], dia_semana="Martes"), en_frio),
+        ("reservaciones.obtener_periodos", obtener_periodos_reservacion, en_frio),
+        ("obtener_mis_reservaciones_periodicas", lambda: obtener_mis_reservaciones_periodicas(p["id_usuario"]), en_frio),
+        ("obtener_horario_completo", obtener_horario_completo, en_frio),
+        ("obtener_horario_completo_pagina", obtener_horario_completo_pagina, en_frio),
+        ("filtrar_horario", lambda: filtrar_horario(id_periodo=p["id_periodo"], dia_semana="Martes"), en_frio),
+        ("filtrar_horario (profesor)", lambda: filtrar_horario(profesor="Prof. Ana"), en_frio),
+        ("obtener_top_salones_ocupados", lambda: obtener_top_salones_ocupados(p["id_periodo"]), en_frio),
+        ("obtener_cubo_ocupacion", lambda: obtener_cubo_ocupacion(p["id_periodo"]), en_frio),
+        ("obtener_disponibilidad_salones", lambda: obtener_disponibilidad_salones(p["fecha"], dt_time(10, 0), 90), en_frio),
+        ("obtener_disponibilidad_salones_lote (día)", lambda: obtener_disponibilidad_salones_lote([
+            (p["fecha"], dt_time(7 + m // 60, m % 60), 60) for m in range(0, 14 * 60 + 1, 30)
+        ]), en_frio),
+        ("obtener_salones_libres_patron", lambda: obtener_salones_libres_patron(
+            p["id_periodo"], "Martes", dt_time(10, 0), 90, max_conflictos=2
+        ), None),
+        ("obtener_ocupacion_salon (semana)", lambda: obtener_ocupacion_salon(p["id_salon"], p["fecha"]), en_frio),
+        ("obtener_ocupacion_salon (caché)", lambda: obtener_ocupacion_salon(p["id_salon"], p["fecha"]), None),
+        ("obtener_mis_reservaciones", lambda: obtener_mis_reservaciones(p["id_usuario"]), en_frio),
+        ("obtener_mis_reservaciones_pagina", lambda: obtener_mis_reservaciones_pagina(p["id_usuario"]), en_frio),
+        ("motor_conflictos.recargar", lambda: motor_conflictos.salones_libres(p["fecha"], dt_time(10, 0), 90), motor_en_frio),
+        ("motor_conflictos.salones_libres", lambda: motor_conflictos.salones_libres(p["fecha"], dt_time(10, 0), 90), None),
+        ("recomendar_salones", lambda: recomendar_salones(p["fecha"], dt_time(10, 0), 90, 30), None),
+        ("crear_reservacion", lambda: crear_reservacion(
+            USUARIO_BENCH, p["id_salon"], p["fecha"], HORA_ESCRITURA, 60, p["id_periodo"], "Benchmark"
+        ), deshacer_escrituras),
+        ("crear_reservacion_periodica", lambda: crear_reservacion_periodica(
+            USUARIO_BENCH, p["id_salon"], "Martes", HORA_ESCRITURA, 60, p["id_periodo"], "Benchmark"
+        ), deshacer_escrituras),
+        ("cancelar_reservacion", lambda: cancelar_reservacion(estado["reservaciones"][0]), preparar_reservaciones),
+        ("cancelar_reservaciones_por_intervalo", lambda: cancelar_reservaciones_por_intervalo(
+            USUARIO_BENCH, p["fecha_inicio"], p["fecha_fin"]
+        ), preparar_reservaciones),
+        ("cancelar_fecha_periodica", lambda: cancelar_fecha_periodica(estado["regla"], p["fecha"]), preparar_periodica),
+        ("cancelar_reservacion_periodica", lambda: cancelar_reservacion_periodica(estado["regla"]), preparar_periodica),
+        ("crear_horario", lambda: crear_horario(
+            p["id_salon"], HORA_ESCRITURA, 60, ["Lunes", "Miercoles"], p["clave_materia"], p["seccion"], p["id_periodo"]
+        ), borrar_horarios_bench),
+        ("crear_horarios_curso (lote)", lambda: crear_horarios_curso(
+            p["clave_materia"], p["seccion"], p["id_periodo"],
+            [(id_salon, HORA_ESCRITURA, 60, ["Lunes", "Miercoles"]) for id_salon in p["salones"]],
+        ), borrar_horarios_bench),
+        ("actualizar_horario", lambda: actualizar_horario(
+            estado["horarios"][0], p["salones"][0], HORA_ESCRITURA, 60, "Viernes"
+        ), preparar_horarios),
+        ("eliminar_horarios (lote)", lambda: eliminar_horarios(estado["horarios"]), preparar_horarios),
+        ("crear_salon", lambda: crear_salon(f"{SALON_BENCH}00", 30, "Aula"), borrar_salones_bench),
+        ("borrar_salones (lote)", lambda: borrar_salones(estado["salones"]), preparar_salones),
+        ("crear_nuevo_curso", lambda: crear_nuevo_curso(
+            p["clave_materia"], SECCION_BENCH, p["id_periodo"], "Prof. Benchmark"
+        ), borrar_curso_bench),
+    ]
+
+
+def _medir(funcion, preparar, repeticiones: int) -> dict:
+    tiempos, sentencias = [], []
+    # Una corrida previa sin medir para calentar conexiones y el buffer pool
+    if preparar:
+        preparar()
+    funcion()
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        previas = sentencias_del_hilo()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        sentencias.append(sentencias_del_hilo() - previas)
+
+    tiempos.sort()
+    return {
+        "repeticiones": repeticiones,
+        "min_ms": round(tiempos[0], 3),
+        "p50_ms": round(statistics.median(tiempos), 3),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(0.95 * len(tiempos)))], 3),
+        "max_ms": round(tiempos[-1], 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "sentencias": max(sentencias),
+    }
+
+
+def correr_escala(escala: float, semilla: int, repeticiones: int, factores: dict | None = None) -> dict:
+    generator.limpiar()
+    inicio = time.perf_counter()
+    conteos = generator.generar(escala, semilla, factores)
+    segundos_generacion = time.perf_counter() - inicio
+
+    p = _parametros()
+    resultados = []
+    for nombre, funcion, preparar in _casos(p):
+        print(f"  {nombre} ...", flush=True)
+        resultados.append({"caso": nombre, **_medir(funcion, preparar, repeticiones)})
+    cancelar_reservaciones_por_intervalo(USUARIO_BENCH, p["fecha_inicio"], p["fecha_fin"])
+
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT VERSION()")
+        version_bd = cursor.fetchone()[0]
+
+    return {
+        "escala": escala,
+        "factores": factores or {},
+        "semilla": semilla,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "servidor_bd": version_bd,
+        },
+        "filas": conteos,
+        "segundos_generacion": round(segundos_generacion, 1),
+        "parametros": {k: str(v) for k, v in p.items()},
+        "casos": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de consultas sobre el campus sintético")
+    parser.add_argument("--escalas", type=float, nargs="+", default=[1])
+    for entidad in generator.ENTIDADES:
+        parser.add_argument(f"--{entidad}", type=float, help=f"Escala fija de {entidad} en todas las corridas")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", default=os.path.join("benchmarks", "resultados"))
+    parser.add_argument("--conservar", action="store_true", help="No borrar los datos sintéticos al terminar")
+    args = parser.parse_args()
+
+    os.makedirs(args.salida, exist_ok=True)
+    for escala in args.escalas:
+        print(f"Escala {escala}")
+        factores = {e: getattr(args, e) for e in generator.ENTIDADES if getattr(args, e) is not None}
+        reporte = correr_escala(escala, args.semilla, args.repeticiones, factores)
+        ruta = os.path.join(args.salida, f"escala-{escala:g}.json")
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"  -> {ruta}")
+
+    if not args.conservar:
+        generator.limpiar()
+
+
+if __name__ == "__main__":
+    main()
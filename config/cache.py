@@ -0,0 +1,144 @@
+import copy
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from config.db import errores_del_hilo
+
+CACHE_TTL = float(os.getenv("DB_CACHE_TTL", 600))
+CACHE_MAX_ENTRIES = int(os.getenv("DB_CACHE_MAX_ENTRIES", 256))
+
+
+def copiar_resultado(valor):
+    """Copia defensiva: las vistas agregan columnas a los DataFrames que reciben."""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, tuple):
+        return tuple(copiar_resultado(v) for v in valor)
+    if isinstance(valor, (list, dict)):
+        return copy.deepcopy(valor)
+    return valor
+
+
+class CacheConsultas:
+    """
+    Caché LRU en memoria con expiración por TTL.
+
+    Cada entrada lleva etiquetas ("salones", "periodos", ...). Las funciones de
+    transactions.py invalidan por etiqueta después de hacer commit, así que solo
+    se descartan las entradas que la escritura pudo haber cambiado.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # clave -> (valor, expira_en, etiquetas)
+        self._entradas: OrderedDict = OrderedDict()
+        self._por_etiqueta: dict[str, set] = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        """Retorna (True, valor) si la entrada existe y no ha expirado."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return False, None
+            valor, expira_en, _ = entrada
+            if time.monotonic() >= expira_en:
+                self._quitar(clave)
+                self.fallos += 1
+                return False, None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return True, valor
+
+    def guardar(self, clave, valor, etiquetas: tuple, ttl: float):
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (valor, time.monotonic() + ttl, etiquetas)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            # Desalojar las menos usadas recientemente
+            while len(self._entradas) > self.max_entries:
+                self._quitar(next(iter(self._entradas)))
+
+    def invalidar(self, *etiquetas: str) -> int:
+        with self._lock:
+            claves = set()
+            for etiqueta in etiquetas:
+                claves |= self._por_etiqueta.get(etiqueta, set())
+            for clave in claves:
+                self._quitar(clave)
+            return len(claves)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._por_etiqueta.clear()
+
+    def _quitar(self, clave):
+        _, _, etiquetas = self._entradas.pop(clave)
+        for etiqueta in etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+
+cache = CacheConsultas(CACHE_MAX_ENTRIES, CACHE_TTL)
+
+# Funciones a avisar en cada invalidación (ej. memoización por ejecución)
+_oyentes: list = []
+
+
+def al_invalidar(callback):
+    """Registra callback(etiquetas) para que se llame en cada invalidar()."""
+    _oyentes.append(callback)
+    return callback
+
+
+def cacheado(*etiquetas, ttl: float | None = None):
+    """
+    Cachea el resultado de una consulta de lectura.
+
+    Las etiquetas pueden ser textos fijos o funciones que reciben los mismos
+    argumentos que la consulta, para invalidar con más precisión
+    (ej. lambda id_salon, *_: f"salon:{id_salon}").
+    Los resultados de una consulta que tuvo error de BD no se guardan.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            clave = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            encontrado, valor = cache.obtener(clave)
+            if encontrado:
+                return copiar_resultado(valor)
+
+            errores_previos = errores_del_hilo()
+            valor = func(*args, **kwargs)
+            if errores_del_hilo() == errores_previos:
+                etiquetas_entrada = tuple(
+                    e(*args, **kwargs) if callable(e) else e for e in etiquetas
+                )
+                cache.guardar(clave, copiar_resultado(valor), etiquetas_entrada, CACHE_TTL if ttl is None else ttl)
+            return valor
+
+        return wrapper
+    return decorador
+
+
+def invalidar(*etiquetas: str) -> int:
+    """Descarta las entradas con cualquiera de las etiquetas. Llamar después del commit."""
+    descartadas = cache.invalidar(*etiquetas)
+    for callback in _oyentes:
+        callback(etiquetas)
+    return descartadas
@@ -1,6 +1,14 @@
+import copy
+import functools
 import mysql.connector
+import mysql.connector.errors
+from mysql.connector import errorcode
 import os
+import threading
+import time
 import streamlit as st
+from contextlib import contextmanager
+from config.metrics import ConexionInstrumentada
 
 try:
     from dotenv import load_dotenv
@@ -8,13 +16,213 @@ try:
 except ImportError:
     pass
 
-# El decorador hace la magia del Singleton por ti
+
+class CircuitoAbiertoError(mysql.connector.errors.PoolError):
+    """La base de datos está marcada como caída; se falla rápido sin intentar conectar."""
+
+
+# Errores de "no se pudo conectar" o "se perdió la conexión"; los demás
+# (sintaxis, llaves, bloqueos) no dicen nada de si la BD está caída
+_ERRORES_CONEXION = {
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.CR_CONN_HOST_ERROR,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+}
+
+
+def es_conexion_perdida(error: BaseException) -> bool:
+    return (
+        isinstance(error, (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError))
+        and error.errno in _ERRORES_CONEXION
+    )
+
+
+class CircuitBreaker:
+    """
+    Corta el acceso a la BD después de `threshold` fallos de conexión seguidos.
+
+    Mientras está abierto, get_connection() falla de inmediato en lugar de
+    esperar el timeout de conexión en cada consulta. Al vencer la espera pasa
+    a medio abierto: deja pasar un solo intento y los demás siguen fallando
+    rápido hasta que ese intento llame a record_success (se cierra) o
+    record_failure (se vuelve a abrir con la espera duplicada, hasta
+    `max_backoff` segundos).
+    """
+
+    def __init__(self, threshold: int, backoff: float, max_backoff: float):
+        self.threshold = threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._probing or time.monotonic() < self._open_until
+
+    def check(self):
+        if self._failures < self.threshold:
+            return
+        with self._lock:
+            restante = self._open_until - time.monotonic()
+            if restante > 0:
+                raise CircuitoAbiertoError(
+                    f"Base de datos no disponible; se reintentará en {restante:.0f} s."
+                )
+            if self._failures < self.threshold:
+                return
+            if self._probing:
+                raise CircuitoAbiertoError("Base de datos no disponible; verificando la conexión.")
+            # Medio abierto: este hilo es el único intento
+            self._probing = True
+
+    def record_failure(self):
+        with self._lock:
+            self._probing = False
+            self._failures += 1
+            if self._failures >= self.threshold:
+                # Backoff exponencial: 1x, 2x, 4x... a partir del umbral
+                exponente = self._failures - self.threshold
+                espera = min(self.backoff * (2 ** exponente), self.max_backoff)
+                self._open_until = time.monotonic() + espera
+
+    def record_success(self):
+        if self._failures or self._probing:
+            with self._lock:
+                self._failures = 0
+                self._open_until = 0.0
+                self._probing = False
+
+    def release_probe(self):
+        """El intento terminó sin saber si la BD responde (ej. pool agotado): otro puede intentar."""
+        if self._probing:
+            with self._lock:
+                self._probing = False
+
+
+class ConnectionPool:
+    """
+    Pool acotado y thread-safe de conexiones a MariaDB.
+
+    Cada sesión de Streamlit corre en su propio hilo, así que cada consulta
+    toma prestada una conexión exclusiva y la devuelve al terminar. Así las
+    consultas de distintos usuarios corren en paralelo y los resultados
+    pendientes de una sesión no se mezclan con los de otra.
+    """
+
+    def __init__(self, size: int, timeout: float, recycle: float, ping_after: float,
+                 breaker: CircuitBreaker, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.breaker = breaker
+        self._connect_args = connect_args
+        # Pila LIFO de (conexión, momento en que se devolvió)
+        self._idle: list[tuple[object, float]] = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+    def _connect(self):
+        return mysql.connector.connect(**self._connect_args)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """
+        Presta una conexión. Espera hasta `timeout` segundos si el pool está
+        lleno y lanza PoolError si no se libera ninguna a tiempo.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn, returned_at = self._idle.pop()
+                    idle_for = time.monotonic() - returned_at
+                    # Reciclar conexiones que estuvieron demasiado tiempo sin uso
+                    if idle_for > self.recycle:
+                        self._created -= 1
+                        self._discard(conn)
+                        continue
+                    # Solo hacemos ping si la conexión estuvo inactiva un buen rato;
+                    # las conexiones usadas hace poco se dan por vivas.
+                    if idle_for > self.ping_after and not conn.is_connected():
+                        self._created -= 1
+                        self._discard(conn)
+                        continue
+                    return conn
+
+                if self._created < self.size:
+                    self._created += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise mysql.connector.errors.PoolError(
+                        f"No hay conexiones disponibles (pool de {self.size} agotado)."
+                    )
+                self._cond.wait(remaining)
+
+        # Conectar fuera del lock para no bloquear a los demás hilos
+        try:
+            conn = self._connect()
+        except Exception:
+            self.breaker.record_failure()
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        self.breaker.record_success()
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        """
+        Devuelve la conexión al pool. Si quedó una transacción abierta se
+        revierte para que el siguiente usuario reciba una conexión limpia.
+        """
+        if not broken:
+            try:
+                if conn.unread_result:
+                    conn.consume_results()
+                if conn.in_transaction:
+                    conn.rollback()
+            except mysql.connector.Error:
+                broken = True
+
+        with self._cond:
+            if broken:
+                self._created -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+
+# El decorador comparte UN solo pool entre todas las sesiones
 @st.cache_resource
-def _get_connection_object():
+def _get_pool() -> ConnectionPool:
     """
-    Crea la conexión UNA sola vez y la mantiene en caché de RAM.
+    Crea el pool UNA sola vez. Las conexiones se abren bajo demanda.
     """
-    return mysql.connector.connect(
+    breaker = CircuitBreaker(
+        threshold=int(os.getenv("DB_BREAKER_THRESHOLD", 3)),
+        backoff=float(os.getenv("DB_BREAKER_BACKOFF", 1)),
+        max_backoff=float(os.getenv("DB_BREAKER_MAX_BACKOFF", 60)),
+    )
+    return ConnectionPool(
+        size=int(os.getenv("DB_POOL_SIZE", 5)),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        recycle=float(os.getenv("DB_POOL_RECYCLE", 300)),
+        ping_after=float(os.getenv("DB_POOL_PING_AFTER", 30)),
+        breaker=breaker,
         host=os.getenv("DB_HOST", "localhost"),
         user=os.getenv("DB_USER", "root"),
         password=os.getenv("DB_PASS", ""),
@@ -22,17 +230,100 @@ def _get_connection_object():
         port=int(os.getenv("DB_PORT", 3306))
     )
 
+
+@contextmanager
 def get_connection():
     """
-    Recupera la conexión activa. Si se cayó, intenta reconectar.
+    Presta una conexión del pool durante el bloque `with` y la devuelve al salir.
+    Si el bloque lanza una excepción, la transacción abierta se revierte.
+    Los cursores de la conexión prestada registran métricas de cada sentencia.
+
+        with get_connection() as conn, conn.cursor() as cursor:
+            ...
     """
+    pool = _get_pool()
     try:
-        conn = _get_connection_object()
-        # Verificar si sigue viva (ping)
-        if not conn.is_connected():
-            st.cache_resource.clear() # Borramos caché
-            conn = _get_connection_object() # Reconectamos
-        return conn
+        pool.breaker.check()
+        conn = pool.acquire()
+    except CircuitoAbiertoError:
+        _registrar_error_del_hilo()
+        raise
     except mysql.connector.Error as e:
+        # Si no se llegó a conectar (pool agotado) el intento no cuenta
+        pool.breaker.release_probe()
+        _registrar_error_del_hilo()
         st.error(f"Error de conexión: {e}")
-        return None
\ No newline at end of file
+        raise
+
+    broken = False
+    try:
+        yield ConexionInstrumentada(conn)
+    except BaseException as e:
+        if isinstance(e, mysql.connector.Error):
+            _registrar_error_del_hilo()
+        if es_conexion_perdida(e):
+            # Conexión perdida: se descarta y cuenta como fallo para el breaker
+            broken = True
+            pool.breaker.record_failure()
+        else:
+            # La BD respondió (el error es de la sentencia o de quien llama)
+            pool.breaker.record_success()
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                broken = True
+        raise
+    else:
+        pool.breaker.record_success()
+    finally:
+        pool.release(conn, broken=broken)
+
+
+def modo_solo_lectura() -> bool:
+    """True mientras el circuit breaker esté abierto (BD marcada como caída)."""
+    return _get_pool().breaker.is_open
+
+
+# --- Respaldo de catálogos en modo solo lectura ---
+
+# Cuenta los errores de BD de cada hilo (sesión) para saber si una consulta falló,
+# ya que las funciones de queries.py atrapan el error y regresan un DataFrame vacío.
+_estado_hilo = threading.local()
+
+_respaldos: dict = {}
+_respaldos_lock = threading.Lock()
+
+
+def _registrar_error_del_hilo():
+    _estado_hilo.errores = getattr(_estado_hilo, "errores", 0) + 1
+
+
+def errores_del_hilo() -> int:
+    """Errores de BD acumulados en el hilo actual; sirve para saber si una llamada falló."""
+    return getattr(_estado_hilo, "errores", 0)
+
+
+def respaldo_solo_lectura(func):
+    """
+    Guarda el último resultado correcto de una consulta de catálogo y lo
+    sirve (en copia) cuando la BD no responde o el circuit breaker está abierto.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        clave = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        errores_previos = errores_del_hilo()
+
+        resultado = func(*args, **kwargs)
+
+        if errores_del_hilo() == errores_previos:
+            with _respaldos_lock:
+                _respaldos[clave] = copy.deepcopy(resultado)
+            return resultado
+
+        with _respaldos_lock:
+            respaldo = _respaldos.get(clave)
+        if respaldo is None:
+            return resultado
+        return copy.deepcopy(respaldo)
+
+    return wrapper
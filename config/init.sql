@@ -37,8 +37,12 @@ CREATE TABLE curso (
     seccion INT,
     id_periodo VARCHAR(20),
     profesor VARCHAR(100), -- Name of the assigned professor
+    -- Name without title, lowercased, for indexed prefix search (see utils/text_helpers.py)
+    profesor_normalizado VARCHAR(100)
+        AS (LOWER(REGEXP_REPLACE(TRIM(profesor), '^(Dr|Dra|Prof|Profa|Mtro|Mtra|Ing|Lic)[.]?[[:space:]]+', ''))) STORED,
 
     PRIMARY KEY (clave_materia, seccion, id_periodo),
+    INDEX idx_curso_profesor (profesor_normalizado, id_periodo),
 
     -- Foreign Keys
     FOREIGN KEY (clave_materia) REFERENCES materia(clave) 
@@ -64,6 +68,14 @@ CREATE TABLE horario (
     dia_semana ENUM('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado') NOT NULL,
     hora_inicio TIME NOT NULL,
     duracion_minutos INT NOT NULL CHECK (duracion_minutos > 0),
+    -- Stored end time so overlap checks can use the indexes below
+    hora_fin TIME AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED,
+
+    -- Indexes for overlap checks (range scan on hora_inicio, hora_fin read from the index)
+    INDEX idx_horario_salon_slot (id_salon, id_periodo, dia_semana, hora_inicio, hora_fin),
+    INDEX idx_horario_periodo_slot (id_periodo, dia_semana, hora_inicio, hora_fin),
+    -- Keyset pagination of the full schedule (id_horario is implicit in InnoDB secondary indexes)
+    INDEX idx_horario_listado (id_periodo, clave_materia, seccion_curso, hora_inicio),
 
     -- Relationship definitions
     FOREIGN KEY (clave_materia, seccion_curso, id_periodo) 
@@ -85,13 +97,228 @@ CREATE TABLE reservacion (
     fecha DATE NOT NULL,
     hora_inicio TIME NOT NULL,
     duracion_minutos INT NOT NULL,
+    hora_fin TIME AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED,
     motivo VARCHAR(200),
 
+    INDEX idx_reservacion_salon_slot (id_salon, fecha, hora_inicio, hora_fin),
+    INDEX idx_reservacion_fecha_slot (fecha, hora_inicio, hora_fin),
+    -- Keyset pagination of a user's reservations
+    INDEX idx_reservacion_usuario_fecha (id_usuario, fecha),
+
     FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario),
     FOREIGN KEY (id_salon) REFERENCES salon(id_salon),
     FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo)
 );
 
+-- 8. RECURRING RESERVATIONS (one row per series, not per date)
+-- "Every Tuesday 14:00 in PRIMAVERA-2024" is one rule; availability and
+-- conflict checks treat it like a horario of the period.
+CREATE TABLE reservacion_periodica (
+    id_regla INT AUTO_INCREMENT PRIMARY KEY,
+
+    id_usuario VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    id_periodo VARCHAR(20) NOT NULL,
+
+    dia_semana ENUM('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') NOT NULL,
+    hora_inicio TIME NOT NULL,
+    duracion_minutos INT NOT NULL CHECK (duracion_minutos > 0),
+    hora_fin TIME AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED,
+    motivo VARCHAR(200),
+
+    -- Same shape as the horario indexes, so conflict checks are range scans
+    INDEX idx_regla_salon_slot (id_salon, id_periodo, dia_semana, hora_inicio, hora_fin),
+    INDEX idx_regla_periodo_slot (id_periodo, dia_semana, hora_inicio, hora_fin),
+    INDEX idx_regla_usuario (id_usuario),
+
+    FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario),
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon),
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo)
+);
+
+-- Dates of a series that were cancelled (the salon is free those days)
+CREATE TABLE reservacion_periodica_excepcion (
+    id_regla INT NOT NULL,
+    fecha DATE NOT NULL,
+
+    PRIMARY KEY (id_regla, fecha),
+
+    FOREIGN KEY (id_regla) REFERENCES reservacion_periodica(id_regla) ON DELETE CASCADE
+);
+
+-- 9. OCCUPANCY rollups (kept up to date by the triggers below)
+-- Minutes each classroom is occupied in a period: classes count once per
+-- occurrence of their weekday in the period, reservations once.
+CREATE TABLE ocupacion_salon_dia (
+    id_periodo VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    dia_semana ENUM('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') NOT NULL,
+    minutos_clase INT NOT NULL DEFAULT 0,
+    minutos_reservacion INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (id_periodo, id_salon, dia_semana),
+
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo) ON DELETE CASCADE,
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon) ON DELETE CASCADE
+);
+
+CREATE TABLE ocupacion_salon (
+    id_periodo VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    minutos_clase INT NOT NULL DEFAULT 0,
+    minutos_reservacion INT NOT NULL DEFAULT 0,
+    minutos_total INT AS (minutos_clase + minutos_reservacion) STORED,
+
+    PRIMARY KEY (id_periodo, id_salon),
+    -- Top-N of a period: ORDER BY minutos_total DESC LIMIT n
+    INDEX idx_ocupacion_top (id_periodo, minutos_total),
+
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo) ON DELETE CASCADE,
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon) ON DELETE CASCADE
+);
+
+DELIMITER //
+
+-- Number of dates in the period that fall on dia_semana
+CREATE FUNCTION ocurrencias_en_periodo(p_periodo VARCHAR(20), p_dia VARCHAR(10))
+RETURNS INT
+READS SQL DATA
+BEGIN
+    DECLARE v_inicio, v_fin, v_primera DATE;
+    SELECT fecha_inicio, fecha_fin INTO v_inicio, v_fin FROM periodo WHERE id_periodo = p_periodo;
+    SET v_primera = DATE_ADD(v_inicio, INTERVAL
+        MOD(FIELD(p_dia, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') - 1
+            - WEEKDAY(v_inicio) + 7, 7) DAY);
+    IF v_primera > v_fin THEN
+        RETURN 0;
+    END IF;
+    RETURN FLOOR(DATEDIFF(v_fin, v_primera) / 7) + 1;
+END //
+
+CREATE PROCEDURE sumar_ocupacion(
+    p_periodo VARCHAR(20), p_salon VARCHAR(10), p_dia VARCHAR(10),
+    p_minutos_clase INT, p_minutos_reservacion INT
+)
+BEGIN
+    IF p_salon IS NOT NULL THEN
+        INSERT INTO ocupacion_salon_dia (id_periodo, id_salon, dia_semana, minutos_clase, minutos_reservacion)
+        VALUES (p_periodo, p_salon, p_dia, p_minutos_clase, p_minutos_reservacion)
+        ON DUPLICATE KEY UPDATE
+            minutos_clase = minutos_clase + p_minutos_clase,
+            minutos_reservacion = minutos_reservacion + p_minutos_reservacion;
+
+        INSERT INTO ocupacion_salon (id_periodo, id_salon, minutos_clase, minutos_reservacion)
+        VALUES (p_periodo, p_salon, p_minutos_clase, p_minutos_reservacion)
+        ON DUPLICATE KEY UPDATE
+            minutos_clase = minutos_clase + p_minutos_clase,
+            minutos_reservacion = minutos_reservacion + p_minutos_reservacion;
+    END IF;
+END //
+
+-- Rebuilds both rollups from horario and reservacion (migrations, repairs)
+CREATE PROCEDURE recalcular_ocupacion()
+BEGIN
+    DELETE FROM ocupacion_salon_dia;
+    DELETE FROM ocupacion_salon;
+
+    INSERT INTO ocupacion_salon_dia (id_periodo, id_salon, dia_semana, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, dia_semana, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM (
+        SELECT h.id_periodo, h.id_salon, CAST(h.dia_semana AS CHAR) AS dia_semana,
+               h.duracion_minutos * ocurrencias_en_periodo(h.id_periodo, h.dia_semana) AS minutos_clase,
+               0 AS minutos_reservacion
+        FROM horario h
+        WHERE h.id_salon IS NOT NULL
+        UNION ALL
+        SELECT r.id_periodo, r.id_salon,
+               ELT(WEEKDAY(r.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+               0, r.duracion_minutos
+        FROM reservacion r
+        UNION ALL
+        SELECT rp.id_periodo, rp.id_salon, CAST(rp.dia_semana AS CHAR),
+               0, rp.duracion_minutos * (ocurrencias_en_periodo(rp.id_periodo, rp.dia_semana)
+                   - (SELECT COUNT(*) FROM reservacion_periodica_excepcion e WHERE e.id_regla = rp.id_regla))
+        FROM reservacion_periodica rp
+    ) AS t
+    GROUP BY id_periodo, id_salon, dia_semana;
+
+    INSERT INTO ocupacion_salon (id_periodo, id_salon, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM ocupacion_salon_dia
+    GROUP BY id_periodo, id_salon;
+END //
+
+CREATE TRIGGER trg_horario_ocupacion_ins AFTER INSERT ON horario FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana), 0) //
+
+CREATE TRIGGER trg_horario_ocupacion_del AFTER DELETE ON horario FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        -OLD.duracion_minutos * ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana), 0) //
+
+CREATE TRIGGER trg_horario_ocupacion_upd AFTER UPDATE ON horario FOR EACH ROW
+BEGIN
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        -OLD.duracion_minutos * ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana), 0);
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana), 0);
+END //
+
+CREATE TRIGGER trg_reservacion_ocupacion_ins AFTER INSERT ON reservacion FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon,
+        ELT(WEEKDAY(NEW.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, NEW.duracion_minutos) //
+
+CREATE TRIGGER trg_reservacion_ocupacion_del AFTER DELETE ON reservacion FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon,
+        ELT(WEEKDAY(OLD.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, -OLD.duracion_minutos) //
+
+CREATE TRIGGER trg_reservacion_ocupacion_upd AFTER UPDATE ON reservacion FOR EACH ROW
+BEGIN
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon,
+        ELT(WEEKDAY(OLD.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, -OLD.duracion_minutos);
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon,
+        ELT(WEEKDAY(NEW.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, NEW.duracion_minutos);
+END //
+
+-- A rule occupies every occurrence of its weekday in the period except its exceptions.
+-- BEFORE DELETE: the exceptions still exist (the FK cascade removes them without firing triggers).
+CREATE TRIGGER trg_regla_ocupacion_ins AFTER INSERT ON reservacion_periodica FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        0, NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana)) //
+
+CREATE TRIGGER trg_regla_ocupacion_del BEFORE DELETE ON reservacion_periodica FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        0, -OLD.duracion_minutos * (ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana)
+            - (SELECT COUNT(*) FROM reservacion_periodica_excepcion e WHERE e.id_regla = OLD.id_regla))) //
+
+CREATE TRIGGER trg_excepcion_ocupacion_ins AFTER INSERT ON reservacion_periodica_excepcion FOR EACH ROW
+BEGIN
+    DECLARE v_periodo VARCHAR(20);
+    DECLARE v_salon VARCHAR(10);
+    DECLARE v_dia VARCHAR(10);
+    DECLARE v_duracion INT;
+    SELECT id_periodo, id_salon, dia_semana, duracion_minutos INTO v_periodo, v_salon, v_dia, v_duracion
+    FROM reservacion_periodica WHERE id_regla = NEW.id_regla;
+    CALL sumar_ocupacion(v_periodo, v_salon, v_dia, 0, -v_duracion);
+END //
+
+CREATE TRIGGER trg_excepcion_ocupacion_del AFTER DELETE ON reservacion_periodica_excepcion FOR EACH ROW
+BEGIN
+    DECLARE v_periodo VARCHAR(20);
+    DECLARE v_salon VARCHAR(10);
+    DECLARE v_dia VARCHAR(10);
+    DECLARE v_duracion INT;
+    SELECT id_periodo, id_salon, dia_semana, duracion_minutos INTO v_periodo, v_salon, v_dia, v_duracion
+    FROM reservacion_periodica WHERE id_regla = OLD.id_regla;
+    CALL sumar_ocupacion(v_periodo, v_salon, v_dia, 0, v_duracion);
+END //
+
+DELIMITER ;
+
 -- Periods
 INSERT INTO periodo VALUES 
 ('OTOÑO-2023', '2023-08-01', '2023-12-10'),
@@ -153,7 +380,7 @@ INSERT INTO usuario VALUES
 ('100000', 'Coordinación', 'Administrador');
 
 -- Courses (We offer Databases in two sections)
-INSERT INTO curso VALUES 
+INSERT INTO curso (clave_materia, seccion, id_periodo, profesor) VALUES 
 ('LIS-2082', 1, 'PRIMAVERA-2024', 'Dr. Zechinelli'),
 ('LIS-2082', 2, 'PRIMAVERA-2024', 'Prof. Sustituto'),
 ('MAT-1010', 1, 'PRIMAVERA-2024', 'Prof. Matemático'),
@@ -0,0 +1,299 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Umbral (ms) a partir del cual una sentencia se escribe en el log de consultas lentas
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG", "slow_queries.log")
+
+# Cantidad de muestras recientes que se conservan por función para los percentiles
+VENTANA_MUESTRAS = int(os.getenv("DB_METRICS_WINDOW", 1000))
+
+_slow_logger = logging.getLogger("scheduleee.slow_queries")
+_slow_logger.propagate = False
+_slow_logger_lock = threading.Lock()
+
+
+def _logger_consultas_lentas() -> logging.Logger:
+    # El FileHandler se crea la primera vez que hay una consulta lenta
+    if not _slow_logger.handlers:
+        with _slow_logger_lock:
+            if not _slow_logger.handlers:
+                handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                _slow_logger.addHandler(handler)
+                _slow_logger.setLevel(logging.INFO)
+    return _slow_logger
+
+
+def _funcion_llamadora() -> str:
+    """
+    Busca en la pila la primera función pública de `modules.*` que ejecutó la
+    sentencia (ej. obtener_disponibilidad_salones, crear_reservacion_periodica).
+    """
+    frame = sys._getframe(2)
+    respaldo = None
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        nombre = frame.f_code.co_name
+        if not modulo.startswith("config."):
+            if respaldo is None:
+                respaldo = nombre
+            if modulo.startswith("modules.") and not nombre.startswith(("_", "<")):
+                return nombre
+        frame = frame.f_back
+    return respaldo or "desconocida"
+
+
+def _estimar_bytes(filas) -> int:
+    total = 0
+    for fila in filas:
+        valores = fila.values() if isinstance(fila, dict) else fila
+        for valor in valores:
+            if valor is None:
+                continue
+            if isinstance(valor, (str, bytes, bytearray)):
+                total += len(valor)
+            else:
+                total += 8
+    return total
+
+
+def _redactar(sql: str, params) -> str:
+    """SQL en una línea y solo el tipo de cada parámetro, nunca su valor."""
+    sql_plano = " ".join(sql.split())
+    if not params:
+        return sql_plano
+    if isinstance(params, dict):
+        tipos = ", ".join(f"{k}={type(v).__name__}" for k, v in params.items())
+    else:
+        tipos = ", ".join(type(v).__name__ for v in params)
+    return f"{sql_plano} -- params: [{tipos}]"
+
+
+class RegistroMetricas:
+    """Histogramas móviles de latencia por función, guardados en memoria."""
+
+    def __init__(self, ventana: int):
+        self.ventana = ventana
+        self._lock = threading.Lock()
+        self._por_funcion: dict[str, dict] = {}
+
+    def registrar(self, funcion: str, ms: float, filas: int, bytes_leidos: int, error: bool):
+        with self._lock:
+            datos = self._por_funcion.get(funcion)
+            if datos is None:
+                datos = {
+                    "muestras": deque(maxlen=self.ventana),
+                    "sentencias": 0,
+                    "errores": 0,
+                    "filas": 0,
+                    "bytes": 0,
+                }
+                self._por_funcion[funcion] = datos
+            datos["muestras"].append(ms)
+            datos["sentencias"] += 1
+            datos["filas"] += filas
+            datos["bytes"] += bytes_leidos
+            if error:
+                datos["errores"] += 1
+
+    def resumen(self) -> list[dict]:
+        """Una fila por función con p50/p95/p99 sobre la ventana reciente."""
+        with self._lock:
+            copia = {f: (sorted(d["muestras"]), dict(d)) for f, d in self._por_funcion.items()}
+
+        filas = []
+        for funcion, (muestras, datos) in copia.items():
+            filas.append({
+                "funcion": funcion,
+                "sentencias": datos["sentencias"],
+                "errores": datos["errores"],
+                "p50_ms": round(_percentil(muestras, 50), 2),
+                "p95_ms": round(_percentil(muestras, 95), 2),
+                "p99_ms": round(_percentil(muestras, 99), 2),
+                "max_ms": round(muestras[-1], 2) if muestras else 0.0,
+                "filas": datos["filas"],
+                "bytes": datos["bytes"],
+            })
+        filas.sort(key=lambda f: f["p95_ms"], reverse=True)
+        return filas
+
+    def reiniciar(self):
+        with self._lock:
+            self._por_funcion.clear()
+
+
+def _percentil(muestras_ordenadas: list[float], p: float) -> float:
+    if not muestras_ordenadas:
+        return 0.0
+    # Método nearest-rank
+    idx = max(0, int(round(p / 100 * len(muestras_ordenadas))) - 1)
+    return muestras_ordenadas[min(idx, len(muestras_ordenadas) - 1)]
+
+
+metricas = RegistroMetricas(VENTANA_MUESTRAS)
+
+# --- Sentencias por interacción ---
+
+# Contador de sentencias del hilo actual (cada rerun de Streamlit corre en un hilo)
+_hilo = threading.local()
+
+# Últimas interacciones medidas: rerun completo ("app") o rerun de un fragmento
+_interacciones: deque = deque(maxlen=50)
+
+
+def sentencias_del_hilo() -> int:
+    return getattr(_hilo, "sentencias", 0)
+
+
+@contextmanager
+def medir_interaccion(alcance: str):
+    """
+    Cuenta las sentencias ejecutadas durante una interacción del usuario.
+    Si ya hay una medición abierta en el hilo (fragmento ejecutado dentro del
+    rerun completo), no se abre otra.
+    """
+    if getattr(_hilo, "midiendo", False):
+        yield
+        return
+
+    _hilo.midiendo = True
+    sentencias_previas = sentencias_del_hilo()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _hilo.midiendo = False
+        _interacciones.append({
+            "alcance": alcance,
+            "sentencias": sentencias_del_hilo() - sentencias_previas,
+            "ms": round((time.perf_counter() - inicio) * 1000, 1),
+        })
+
+
+def interacciones_recientes() -> list[dict]:
+    """Interacciones medidas, la más reciente primero."""
+    return list(reversed(_interacciones))
+
+
+class CursorInstrumentado:
+    """
+    Envuelve un cursor de mysql.connector y mide cada sentencia: tiempo de
+    ejecución más lectura, filas y bytes leídos, y la función que la lanzó.
+    La sentencia se da por terminada al ejecutar la siguiente o al cerrar el cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._actual = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __iter__(self):
+        fila = self.fetchone()
+        while fila is not None:
+            yield fila
+            fila = self.fetchone()
+
+    def _iniciar(self, sql, params):
+        self._terminar()
+        _hilo.sentencias = getattr(_hilo, "sentencias", 0) + 1
+        self._actual = {
+            "funcion": _funcion_llamadora(),
+            "sql": sql,
+            "params": params,
+            "ms": 0.0,
+            "filas": 0,
+            "bytes": 0,
+            "error": False,
+        }
+
+    def _terminar(self):
+        actual = self._actual
+        if actual is None:
+            return
+        self._actual = None
+        metricas.registrar(actual["funcion"], actual["ms"], actual["filas"], actual["bytes"], actual["error"])
+        if actual["ms"] >= SLOW_QUERY_MS:
+            _logger_consultas_lentas().info(
+                "%.1f ms | %s | filas=%d | bytes=%d | %s",
+                actual["ms"], actual["funcion"], actual["filas"], actual["bytes"],
+                _redactar(actual["sql"], actual["params"]),
+            )
+
+    def _medir(self, metodo, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*args, **kwargs)
+        except Exception:
+            if self._actual is not None:
+                self._actual["error"] = True
+            raise
+        finally:
+            if self._actual is not None:
+                self._actual["ms"] += (time.perf_counter() - inicio) * 1000
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._iniciar(operation, params)
+        return self._medir(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        # Puede llegar un generador: se materializa para tomar la primera fila y pasarlas todas
+        seq_params = list(seq_params)
+        self._iniciar(operation, seq_params[0] if seq_params else None)
+        return self._medir(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def _contar(self, filas):
+        if self._actual is not None and filas:
+            self._actual["filas"] += len(filas)
+            self._actual["bytes"] += _estimar_bytes(filas)
+
+    def fetchone(self):
+        fila = self._medir(self._cursor.fetchone)
+        if fila is not None:
+            self._contar([fila])
+        return fila
+
+    def fetchmany(self, size: int = 1):
+        filas = self._medir(self._cursor.fetchmany, size)
+        self._contar(filas)
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(self._cursor.fetchall)
+        self._contar(filas)
+        return filas
+
+    def close(self):
+        self._terminar()
+        return self._cursor.close()
+
+
+class ConexionInstrumentada:
+    """Proxy de la conexión cuyo único cambio es devolver cursores instrumentados."""
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def __setattr__(self, nombre, valor):
+        # ej. conn.autocommit = False debe llegar a la conexión real
+        setattr(self._conn, nombre, valor)
+
+    def cursor(self, *args, **kwargs):
+        return CursorInstrumentado(self._conn.cursor(*args, **kwargs))
@@ -0,0 +1,23 @@
+-- Migration 001: stored end-time columns and composite indexes for overlap checks.
+--
+-- The overlap predicates used to compute ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))
+-- on every row, which prevents index use. With a stored hora_fin column the checks become
+--   hora_inicio < :fin AND hora_fin > :inicio
+-- and are answered with a range scan on the indexes below.
+USE scheduleee;
+
+ALTER TABLE horario
+    ADD COLUMN hora_fin TIME
+        AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED
+        AFTER duracion_minutos,
+    -- Conflicts for one classroom (crear_horario, actualizar_horario, _verificar_conflicto)
+    ADD INDEX idx_horario_salon_slot (id_salon, id_periodo, dia_semana, hora_inicio, hora_fin),
+    -- Occupied classrooms for a day of the week (obtener_disponibilidad_salones)
+    ADD INDEX idx_horario_periodo_slot (id_periodo, dia_semana, hora_inicio, hora_fin);
+
+ALTER TABLE reservacion
+    ADD COLUMN hora_fin TIME
+        AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED
+        AFTER duracion_minutos,
+    ADD INDEX idx_reservacion_salon_slot (id_salon, fecha, hora_inicio, hora_fin),
+    ADD INDEX idx_reservacion_fecha_slot (fecha, hora_inicio, hora_fin);
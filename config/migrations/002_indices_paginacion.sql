@@ -0,0 +1,15 @@
+-- Migration 002: indexes for keyset pagination of the schedule and reservation listings.
+--
+-- Each page is read as
+--   WHERE <key> > :last_key ORDER BY <key> LIMIT :page_size + 1
+-- so the indexes below must match the ORDER BY of each listing. A page then reads
+-- only page_size index entries, whatever the size of the table.
+USE scheduleee;
+
+ALTER TABLE horario
+    -- obtener_horario_completo_pagina: ORDER BY id_periodo, clave_materia, seccion_curso, hora_inicio, id_horario
+    ADD INDEX idx_horario_listado (id_periodo, clave_materia, seccion_curso, hora_inicio);
+
+ALTER TABLE reservacion
+    -- obtener_mis_reservaciones_pagina: WHERE id_usuario = ? ORDER BY fecha DESC, id_reservacion DESC
+    ADD INDEX idx_reservacion_usuario_fecha (id_usuario, fecha);
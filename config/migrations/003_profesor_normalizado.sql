@@ -0,0 +1,15 @@
+-- Migration 003: indexed professor name for the "por profesor" searches.
+--
+-- curso.profesor is free text ("Dr. Zechinelli"). profesor_normalizado drops the
+-- leading title, trims the spaces and lowercases the name. The column collation
+-- (utf8mb4_unicode_ci) already ignores accents. The searches then become
+--   c.profesor_normalizado LIKE 'zech%'
+-- which is a range scan on idx_curso_profesor. MariaDB keeps the column up to date.
+-- utils/text_helpers.normalizar_profesor applies the same rule to the search text.
+USE scheduleee;
+
+ALTER TABLE curso
+    ADD COLUMN profesor_normalizado VARCHAR(100)
+        AS (LOWER(REGEXP_REPLACE(TRIM(profesor), '^(Dr|Dra|Prof|Profa|Mtro|Mtra|Ing|Lic)[.]?[[:space:]]+', ''))) STORED
+        AFTER profesor,
+    ADD INDEX idx_curso_profesor (profesor_normalizado, id_periodo);
@@ -0,0 +1,148 @@
+-- Migration 004: occupancy rollups for the classroom statistics.
+--
+-- obtener_top_salones_ocupados used to run SUM(duracion_minutos) over every horario of the
+-- period on each visit and ignored reservaciones. The tables below hold the occupied minutes
+-- per (period, classroom) and per (period, classroom, weekday); triggers on horario and
+-- reservacion update them row by row, so the top-N is an ORDER BY ... LIMIT on
+-- idx_ocupacion_top. The last statements backfill them from the existing rows.
+--
+-- Rows removed by a foreign-key cascade (deleting a curso) do not fire triggers;
+-- CALL recalcular_ocupacion() rebuilds both tables after such deletes.
+USE scheduleee;
+
+-- Minutes each classroom is occupied in a period: classes count once per
+-- occurrence of their weekday in the period, reservations once.
+CREATE TABLE ocupacion_salon_dia (
+    id_periodo VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    dia_semana ENUM('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') NOT NULL,
+    minutos_clase INT NOT NULL DEFAULT 0,
+    minutos_reservacion INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (id_periodo, id_salon, dia_semana),
+
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo) ON DELETE CASCADE,
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon) ON DELETE CASCADE
+);
+
+CREATE TABLE ocupacion_salon (
+    id_periodo VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    minutos_clase INT NOT NULL DEFAULT 0,
+    minutos_reservacion INT NOT NULL DEFAULT 0,
+    minutos_total INT AS (minutos_clase + minutos_reservacion) STORED,
+
+    PRIMARY KEY (id_periodo, id_salon),
+    -- Top-N of a period: ORDER BY minutos_total DESC LIMIT n
+    INDEX idx_ocupacion_top (id_periodo, minutos_total),
+
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo) ON DELETE CASCADE,
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon) ON DELETE CASCADE
+);
+
+DELIMITER //
+
+-- Number of dates in the period that fall on dia_semana
+CREATE FUNCTION ocurrencias_en_periodo(p_periodo VARCHAR(20), p_dia VARCHAR(10))
+RETURNS INT
+READS SQL DATA
+BEGIN
+    DECLARE v_inicio, v_fin, v_primera DATE;
+    SELECT fecha_inicio, fecha_fin INTO v_inicio, v_fin FROM periodo WHERE id_periodo = p_periodo;
+    SET v_primera = DATE_ADD(v_inicio, INTERVAL
+        MOD(FIELD(p_dia, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') - 1
+            - WEEKDAY(v_inicio) + 7, 7) DAY);
+    IF v_primera > v_fin THEN
+        RETURN 0;
+    END IF;
+    RETURN FLOOR(DATEDIFF(v_fin, v_primera) / 7) + 1;
+END //
+
+CREATE PROCEDURE sumar_ocupacion(
+    p_periodo VARCHAR(20), p_salon VARCHAR(10), p_dia VARCHAR(10),
+    p_minutos_clase INT, p_minutos_reservacion INT
+)
+BEGIN
+    IF p_salon IS NOT NULL THEN
+        INSERT INTO ocupacion_salon_dia (id_periodo, id_salon, dia_semana, minutos_clase, minutos_reservacion)
+        VALUES (p_periodo, p_salon, p_dia, p_minutos_clase, p_minutos_reservacion)
+        ON DUPLICATE KEY UPDATE
+            minutos_clase = minutos_clase + p_minutos_clase,
+            minutos_reservacion = minutos_reservacion + p_minutos_reservacion;
+
+        INSERT INTO ocupacion_salon (id_periodo, id_salon, minutos_clase, minutos_reservacion)
+        VALUES (p_periodo, p_salon, p_minutos_clase, p_minutos_reservacion)
+        ON DUPLICATE KEY UPDATE
+            minutos_clase = minutos_clase + p_minutos_clase,
+            minutos_reservacion = minutos_reservacion + p_minutos_reservacion;
+    END IF;
+END //
+
+-- Rebuilds both rollups from horario and reservacion (migrations, repairs)
+CREATE PROCEDURE recalcular_ocupacion()
+BEGIN
+    DELETE FROM ocupacion_salon_dia;
+    DELETE FROM ocupacion_salon;
+
+    INSERT INTO ocupacion_salon_dia (id_periodo, id_salon, dia_semana, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, dia_semana, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM (
+        SELECT h.id_periodo, h.id_salon, CAST(h.dia_semana AS CHAR) AS dia_semana,
+               h.duracion_minutos * ocurrencias_en_periodo(h.id_periodo, h.dia_semana) AS minutos_clase,
+               0 AS minutos_reservacion
+        FROM horario h
+        WHERE h.id_salon IS NOT NULL
+        UNION ALL
+        SELECT r.id_periodo, r.id_salon,
+               ELT(WEEKDAY(r.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+               0, r.duracion_minutos
+        FROM reservacion r
+    ) AS t
+    GROUP BY id_periodo, id_salon, dia_semana;
+
+    INSERT INTO ocupacion_salon (id_periodo, id_salon, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM ocupacion_salon_dia
+    GROUP BY id_periodo, id_salon;
+END //
+
+CREATE TRIGGER trg_horario_ocupacion_ins AFTER INSERT ON horario FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana), 0) //
+
+CREATE TRIGGER trg_horario_ocupacion_del AFTER DELETE ON horario FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        -OLD.duracion_minutos * ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana), 0) //
+
+CREATE TRIGGER trg_horario_ocupacion_upd AFTER UPDATE ON horario FOR EACH ROW
+BEGIN
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        -OLD.duracion_minutos * ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana), 0);
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana), 0);
+END //
+
+CREATE TRIGGER trg_reservacion_ocupacion_ins AFTER INSERT ON reservacion FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon,
+        ELT(WEEKDAY(NEW.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, NEW.duracion_minutos) //
+
+CREATE TRIGGER trg_reservacion_ocupacion_del AFTER DELETE ON reservacion FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon,
+        ELT(WEEKDAY(OLD.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, -OLD.duracion_minutos) //
+
+CREATE TRIGGER trg_reservacion_ocupacion_upd AFTER UPDATE ON reservacion FOR EACH ROW
+BEGIN
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon,
+        ELT(WEEKDAY(OLD.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, -OLD.duracion_minutos);
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon,
+        ELT(WEEKDAY(NEW.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+        0, NEW.duracion_minutos);
+END //
+
+DELIMITER ;
+
+-- Backfill
+CALL recalcular_ocupacion();
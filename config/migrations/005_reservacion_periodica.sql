@@ -0,0 +1,118 @@
+-- Migration 005: recurring reservations stored as one rule per series.
+--
+-- crear_reservacion_periodica used to insert one reservacion row per date (~18 per
+-- period). A series is now one reservacion_periodica row, and cancelling a single date
+-- adds one reservacion_periodica_excepcion row. Conflict and availability checks read the
+-- rules like horarios (idx_regla_salon_slot / idx_regla_periodo_slot), so their cost grows
+-- with the number of rules, not with the number of dates.
+--
+-- Requires migration 004: the occupancy rollups also count the rules.
+-- Series created before this migration stay as individual reservacion rows.
+USE scheduleee;
+
+-- "Every Tuesday 14:00 in PRIMAVERA-2024" is one rule; availability and
+-- conflict checks treat it like a horario of the period.
+CREATE TABLE reservacion_periodica (
+    id_regla INT AUTO_INCREMENT PRIMARY KEY,
+
+    id_usuario VARCHAR(20) NOT NULL,
+    id_salon VARCHAR(10) NOT NULL,
+    id_periodo VARCHAR(20) NOT NULL,
+
+    dia_semana ENUM('Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') NOT NULL,
+    hora_inicio TIME NOT NULL,
+    duracion_minutos INT NOT NULL CHECK (duracion_minutos > 0),
+    hora_fin TIME AS (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))) STORED,
+    motivo VARCHAR(200),
+
+    -- Same shape as the horario indexes, so conflict checks are range scans
+    INDEX idx_regla_salon_slot (id_salon, id_periodo, dia_semana, hora_inicio, hora_fin),
+    INDEX idx_regla_periodo_slot (id_periodo, dia_semana, hora_inicio, hora_fin),
+    INDEX idx_regla_usuario (id_usuario),
+
+    FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario),
+    FOREIGN KEY (id_salon) REFERENCES salon(id_salon),
+    FOREIGN KEY (id_periodo) REFERENCES periodo(id_periodo)
+);
+
+-- Dates of a series that were cancelled (the salon is free those days)
+CREATE TABLE reservacion_periodica_excepcion (
+    id_regla INT NOT NULL,
+    fecha DATE NOT NULL,
+
+    PRIMARY KEY (id_regla, fecha),
+
+    FOREIGN KEY (id_regla) REFERENCES reservacion_periodica(id_regla) ON DELETE CASCADE
+);
+
+DELIMITER //
+
+DROP PROCEDURE IF EXISTS recalcular_ocupacion //
+
+-- Rebuilds both rollups from horario and reservacion (migrations, repairs)
+CREATE PROCEDURE recalcular_ocupacion()
+BEGIN
+    DELETE FROM ocupacion_salon_dia;
+    DELETE FROM ocupacion_salon;
+
+    INSERT INTO ocupacion_salon_dia (id_periodo, id_salon, dia_semana, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, dia_semana, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM (
+        SELECT h.id_periodo, h.id_salon, CAST(h.dia_semana AS CHAR) AS dia_semana,
+               h.duracion_minutos * ocurrencias_en_periodo(h.id_periodo, h.dia_semana) AS minutos_clase,
+               0 AS minutos_reservacion
+        FROM horario h
+        WHERE h.id_salon IS NOT NULL
+        UNION ALL
+        SELECT r.id_periodo, r.id_salon,
+               ELT(WEEKDAY(r.fecha) + 1, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo'),
+               0, r.duracion_minutos
+        FROM reservacion r
+        UNION ALL
+        SELECT rp.id_periodo, rp.id_salon, CAST(rp.dia_semana AS CHAR),
+               0, rp.duracion_minutos * (ocurrencias_en_periodo(rp.id_periodo, rp.dia_semana)
+                   - (SELECT COUNT(*) FROM reservacion_periodica_excepcion e WHERE e.id_regla = rp.id_regla))
+        FROM reservacion_periodica rp
+    ) AS t
+    GROUP BY id_periodo, id_salon, dia_semana;
+
+    INSERT INTO ocupacion_salon (id_periodo, id_salon, minutos_clase, minutos_reservacion)
+    SELECT id_periodo, id_salon, SUM(minutos_clase), SUM(minutos_reservacion)
+    FROM ocupacion_salon_dia
+    GROUP BY id_periodo, id_salon;
+END //
+
+-- A rule occupies every occurrence of its weekday in the period except its exceptions.
+-- BEFORE DELETE: the exceptions still exist (the FK cascade removes them without firing triggers).
+CREATE TRIGGER trg_regla_ocupacion_ins AFTER INSERT ON reservacion_periodica FOR EACH ROW
+    CALL sumar_ocupacion(NEW.id_periodo, NEW.id_salon, NEW.dia_semana,
+        0, NEW.duracion_minutos * ocurrencias_en_periodo(NEW.id_periodo, NEW.dia_semana)) //
+
+CREATE TRIGGER trg_regla_ocupacion_del BEFORE DELETE ON reservacion_periodica FOR EACH ROW
+    CALL sumar_ocupacion(OLD.id_periodo, OLD.id_salon, OLD.dia_semana,
+        0, -OLD.duracion_minutos * (ocurrencias_en_periodo(OLD.id_periodo, OLD.dia_semana)
+            - (SELECT COUNT(*) FROM reservacion_periodica_excepcion e WHERE e.id_regla = OLD.id_regla))) //
+
+CREATE TRIGGER trg_excepcion_ocupacion_ins AFTER INSERT ON reservacion_periodica_excepcion FOR EACH ROW
+BEGIN
+    DECLARE v_periodo VARCHAR(20);
+    DECLARE v_salon VARCHAR(10);
+    DECLARE v_dia VARCHAR(10);
+    DECLARE v_duracion INT;
+    SELECT id_periodo, id_salon, dia_semana, duracion_minutos INTO v_periodo, v_salon, v_dia, v_duracion
+    FROM reservacion_periodica WHERE id_regla = NEW.id_regla;
+    CALL sumar_ocupacion(v_periodo, v_salon, v_dia, 0, -v_duracion);
+END //
+
+CREATE TRIGGER trg_excepcion_ocupacion_del AFTER DELETE ON reservacion_periodica_excepcion FOR EACH ROW
+BEGIN
+    DECLARE v_periodo VARCHAR(20);
+    DECLARE v_salon VARCHAR(10);
+    DECLARE v_dia VARCHAR(10);
+    DECLARE v_duracion INT;
+    SELECT id_periodo, id_salon, dia_semana, duracion_minutos INTO v_periodo, v_salon, v_dia, v_duracion
+    FROM reservacion_periodica WHERE id_regla = OLD.id_regla;
+    CALL sumar_ocupacion(v_periodo, v_salon, v_dia, 0, v_duracion);
+END //
+
+DELIMITER ;
@@ -1,7 +1,13 @@
 import streamlit as st
+import pandas as pd
 from .services import autenticar_usuario, registrar_nuevo_usuario
 import time
 from utils.helpers import LOGO
+from config.metrics import metricas, SLOW_QUERY_MS, interacciones_recientes
+from config.cache import cache
+from utils.memo import consultas_ahorradas_total
+from modules.reservaciones.conflict_engine import motor_conflictos
+from modules.models import Rol
 
 def renderizar_login():
     """
@@ -89,6 +95,37 @@ def renderizar_sidebar(usuario: dict):
             unsafe_allow_html=True
         )
         st.divider()
+
+        # Panel de métricas de consultas (Solo Admin)
+        if usuario.get('rol') == Rol.ADMINISTRADOR.value:
+            with st.expander("📈 Rendimiento de consultas"):
+                resumen = metricas.resumen()
+                if resumen:
+                    st.dataframe(pd.DataFrame(resumen), use_container_width=True, hide_index=True)
+                    st.caption(f"Sentencias de más de {SLOW_QUERY_MS:.0f} ms se registran en el log de consultas lentas.")
+                else:
+                    st.caption("Aún no hay sentencias registradas.")
+                st.caption(f"Caché de catálogos: {cache.aciertos} aciertos / {cache.fallos} fallos")
+                st.caption(f"Consultas repetidas evitadas por rerun: {consultas_ahorradas_total()}")
+
+                # "app" = rerun completo; el resto son reruns de un solo fragmento
+                interacciones = interacciones_recientes()
+                if interacciones:
+                    st.markdown("**Sentencias por interacción**")
+                    st.dataframe(pd.DataFrame(interacciones), use_container_width=True, hide_index=True)
+                if st.button("Reiniciar métricas", use_container_width=True):
+                    metricas.reiniciar()
+                    st.rerun()
+                if st.button("Reconciliar motor de conflictos", use_container_width=True):
+                    diferencias = motor_conflictos.reconciliar()
+                    if diferencias is None:
+                        st.error("No se pudo leer la base de datos.")
+                    elif diferencias.pop("consistente"):
+                        st.success("El motor de conflictos coincide con la base de datos.")
+                    else:
+                        st.warning(f"Diferencias corregidas: {diferencias}")
+            st.divider()
+
         if st.button("🚪 Cerrar Sesión", use_container_width=True, type="secondary"):
             # Clear the session state
             del st.session_state['usuario_activo']
@@ -0,0 +1,249 @@
+"""
+Exportación de horarios y reservaciones a CSV o Parquet.
+
+    python -m modules.export horarios --periodo PRIMAVERA-2024 --formato parquet --salida horario.parquet
+    python -m modules.export reservaciones --periodo PRIMAVERA-2024 --salida reservaciones.csv
+
+Las filas se leen del servidor por bloques con un cursor sin buffer y se
+escriben al archivo conforme llegan, así la memoria no crece con el número
+de filas (a diferencia de fetchall() + DataFrame).
+"""
+import argparse
+import csv
+import sys
+
+import mysql.connector
+
+from config.db import get_connection
+
+TAMANO_BLOQUE = 10000
+
+FORMATOS = ["csv", "parquet"]
+
+# Columnas de cada exportación con su tipo para Parquet.
+# Las horas se exportan como texto 'HH:MM:SS' (CAST AS CHAR en el SQL).
+COLUMNAS_HORARIOS = [
+    ("id_horario", "int"), ("id_periodo", "str"), ("clave_materia", "str"), ("seccion", "int"),
+    ("materia", "str"), ("profesor", "str"), ("id_salon", "str"), ("dia_semana", "str"),
+    ("hora_inicio", "str"), ("hora_fin", "str"), ("duracion_minutos", "int"),
+]
+# Las ocurrencias de una reservación periódica llevan id_reservacion NULL y su id_regla.
+COLUMNAS_RESERVACIONES = [
+    ("id_reservacion", "int"), ("id_regla", "int"), ("id_periodo", "str"), ("id_salon", "str"), ("fecha", "date"),
+    ("hora_inicio", "str"), ("hora_fin", "str"), ("duracion_minutos", "int"),
+    ("id_usuario", "str"), ("usuario", "str"), ("motivo", "str"),
+]
+
+
+def _esquema_parquet(columnas):
+    import pyarrow as pa
+    tipos = {"int": pa.int64(), "str": pa.string(), "date": pa.date32()}
+    return pa.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+
+
+class _EscritorCSV:
+    def __init__(self, destino: str, columnas):
+        self._archivo = open(destino, "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._archivo)
+        self._csv.writerow([nombre for nombre, _ in columnas])
+
+    def escribir(self, filas):
+        self._csv.writerows(filas)
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+class _EscritorParquet:
+    """Un row group por bloque leído; nunca se arma la tabla completa."""
+
+    def __init__(self, destino: str, columnas):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Para exportar a Parquet instala pyarrow, o usa CSV.")
+        self._esquema = _esquema_parquet(columnas)
+        self._writer = pq.ParquetWriter(destino, self._esquema)
+
+    def escribir(self, filas):
+        import pyarrow as pa
+        # Filas -> columnas para construir el lote sin pasar por pandas
+        columnas = list(zip(*filas))
+        lote = pa.RecordBatch.from_arrays(
+            [pa.array(col, type=campo.type) for col, campo in zip(columnas, self._esquema)],
+            schema=self._esquema,
+        )
+        self._writer.write_batch(lote)
+
+    def cerrar(self):
+        self._writer.close()
+
+
+def _exportar(sql: str, params: list, columnas, destino: str, formato: str, progreso=None) -> int:
+    """
+    Ejecuta la consulta con un cursor sin buffer y escribe cada bloque de
+    fetchmany() al archivo. Regresa el número de filas escritas.
+    progreso(filas_escritas) se llama después de cada bloque.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido. Debe ser uno de: {', '.join(FORMATOS)}")
+
+    escritor = _EscritorParquet(destino, columnas) if formato == "parquet" else _EscritorCSV(destino, columnas)
+    total = 0
+    try:
+        with get_connection() as conn, conn.cursor(buffered=False) as cursor:
+            cursor.execute(sql, params)
+            while True:
+                filas = cursor.fetchmany(TAMANO_BLOQUE)
+                if not filas:
+                    break
+                escritor.escribir(filas)
+                total += len(filas)
+                if progreso:
+                    progreso(total)
+    finally:
+        escritor.cerrar()
+    return total
+
+
+def exportar_horarios(destino: str, formato: str = "csv", id_periodo: str = None, progreso=None) -> int:
+    """Horario completo (todas las sesiones de todos los cursos), opcionalmente de un periodo."""
+    sql = """
+        SELECT
+            h.id_horario,
+            h.id_periodo,
+            c.clave_materia,
+            c.seccion,
+            m.titulo AS materia,
+            c.profesor,
+            h.id_salon,
+            h.dia_semana,
+            CAST(h.hora_inicio AS CHAR) AS hora_inicio,
+            CAST(h.hora_fin AS CHAR) AS hora_fin,
+            h.duracion_minutos
+        FROM horario h
+        JOIN curso c
+            ON h.clave_materia = c.clave_materia
+           AND h.seccion_curso = c.seccion
+           AND h.id_periodo = c.id_periodo
+        JOIN materia m
+            ON m.clave = c.clave_materia
+    """
+    params = []
+    if id_periodo:
+        sql += " WHERE h.id_periodo = %s"
+        params.append(id_periodo)
+    sql += " ORDER BY h.id_periodo, c.clave_materia, c.seccion, h.dia_semana, h.hora_inicio"
+    return _exportar(sql, params, COLUMNAS_HORARIOS, destino, formato, progreso)
+
+
+def exportar_reservaciones(
+    destino: str,
+    formato: str = "csv",
+    id_periodo: str = None,
+    id_usuario: str = None,
+    progreso=None,
+) -> int:
+    """
+    Reservaciones, opcionalmente de un periodo y/o de un usuario.
+    Incluye cada fecha de las reservaciones periódicas dentro de su periodo,
+    salvo las fechas canceladas (reservacion_periodica_excepcion).
+    """
+    filtros, params = [], []
+    if id_periodo:
+        filtros.append("id_periodo = %s")
+        params.append(id_periodo)
+    if id_usuario:
+        filtros.append("id_usuario = %s")
+        params.append(id_usuario)
+
+    def donde(alias: str) -> str:
+        return "".join(f" AND {alias}.{filtro}" for filtro in filtros)
+
+    sql = f"""
+        WITH RECURSIVE semanas (n) AS (
+            -- 0, 1, 2, ... hasta el número de semanas del periodo más largo
+            SELECT 0
+            UNION ALL
+            SELECT n + 1 FROM semanas
+            WHERE n < (SELECT MAX(DATEDIFF(fecha_fin, fecha_inicio)) DIV 7 FROM periodo)
+        )
+        SELECT
+            r.id_reservacion,
+            NULL AS id_regla,
+            r.id_periodo,
+            r.id_salon,
+            r.fecha,
+            CAST(r.hora_inicio AS CHAR) AS hora_inicio,
+            CAST(r.hora_fin AS CHAR) AS hora_fin,
+            r.duracion_minutos,
+            r.id_usuario,
+            u.nombre AS usuario,
+            r.motivo
+        FROM reservacion r
+        JOIN usuario u ON r.id_usuario = u.id_usuario
+        WHERE 1=1{donde("r")}
+
+        UNION ALL
+
+        SELECT
+            NULL AS id_reservacion,
+            o.id_regla,
+            o.id_periodo,
+            o.id_salon,
+            o.fecha,
+            CAST(o.hora_inicio AS CHAR) AS hora_inicio,
+            CAST(o.hora_fin AS CHAR) AS hora_fin,
+            o.duracion_minutos,
+            o.id_usuario,
+            u.nombre AS usuario,
+            o.motivo
+        FROM (
+            -- Una fila por semana: primera fecha del día en el periodo + 7 * n días
+            SELECT rp.*, p.fecha_fin,
+                   DATE_ADD(p.fecha_inicio, INTERVAL
+                       MOD(FIELD(rp.dia_semana, 'Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo') - 1
+                           - WEEKDAY(p.fecha_inicio) + 7, 7) + 7 * s.n DAY) AS fecha
+            FROM reservacion_periodica rp
+            JOIN periodo p ON p.id_periodo = rp.id_periodo
+            CROSS JOIN semanas s
+            WHERE 1=1{donde("rp")}
+        ) AS o
+        JOIN usuario u ON o.id_usuario = u.id_usuario
+        WHERE o.fecha <= o.fecha_fin
+          AND NOT EXISTS (
+              SELECT 1 FROM reservacion_periodica_excepcion e
+              WHERE e.id_regla = o.id_regla AND e.fecha = o.fecha
+          )
+
+        ORDER BY fecha, hora_inicio, id_salon
+    """
+    return _exportar(sql, params + params, COLUMNAS_RESERVACIONES, destino, formato, progreso)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta horarios o reservaciones a CSV/Parquet")
+    parser.add_argument("tipo", choices=["horarios", "reservaciones"])
+    parser.add_argument("--salida", required=True)
+    parser.add_argument("--formato", choices=FORMATOS, help="Por defecto se deduce de la extensión de --salida")
+    parser.add_argument("--periodo")
+    parser.add_argument("--usuario", help="Solo para reservaciones")
+    args = parser.parse_args()
+
+    formato = args.formato or ("parquet" if args.salida.endswith(".parquet") else "csv")
+
+    def progreso(filas):
+        print(f"\r{filas:,} filas", end="", flush=True)
+
+    try:
+        if args.tipo == "horarios":
+            total = exportar_horarios(args.salida, formato, args.periodo, progreso)
+        else:
+            total = exportar_reservaciones(args.salida, formato, args.periodo, args.usuario, progreso)
+    except (ValueError, mysql.connector.Error) as err:
+        print(f"\nNo se pudo exportar: {err}", file=sys.stderr)
+        sys.exit(2)
+    print(f"\n{total:,} filas escritas en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Importación masiva de horarios desde CSV o Excel.
+
+    python -m modules.horarios.bulk_import horarios.csv [--solo-validar] [--errores errores.csv]
+
+El archivo lleva una fila por sesión con las columnas:
+clave_materia, seccion, id_periodo, id_salon, dia_semana, hora_inicio, duracion_minutos.
+
+Los salones y cursos se validan contra los catálogos en bloque. Los traslapes,
+dentro del archivo y contra los horarios ya registrados, se encuentran
+ordenando todo el lote una vez y barriéndolo. Las filas válidas se insertan
+con INSERT de varias filas por lotes y en una sola transacción.
+"""
+import argparse
+import sys
+import unicodedata
+
+import mysql.connector
+import pandas as pd
+
+from config.db import get_connection
+from config.cache import invalidar
+from modules.models import DiaSemana
+from utils.sql_helpers import marcadores
+
+COLUMNAS = ["clave_materia", "seccion", "id_periodo", "id_salon", "dia_semana", "hora_inicio", "duracion_minutos"]
+
+# horario.dia_semana no admite Domingo
+DIAS_VALIDOS = {
+    unicodedata.normalize("NFKD", d.value).encode("ascii", "ignore").decode().lower(): d.value
+    for d in DiaSemana if d is not DiaSemana.DOMINGO
+}
+
+TAMANO_LOTE = 500
+
+
+def leer_archivo(origen, nombre: str) -> pd.DataFrame:
+    """
+    Lee un .csv, .xlsx o .xls (ruta o archivo abierto) y regresa todo como texto.
+    Excel requiere openpyxl instalado.
+    """
+    if nombre.lower().endswith((".xlsx", ".xls")):
+        try:
+            df = pd.read_excel(origen, dtype=str)
+        except ImportError:
+            raise ValueError("Para importar Excel instala openpyxl, o guarda el archivo como CSV.")
+    else:
+        df = pd.read_csv(origen, dtype=str, skipinitialspace=True)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def _normalizar(df: pd.DataFrame) -> tuple[pd.DataFrame, list[dict]]:
+    """
+    Convierte tipos columna por columna. Regresa las filas bien formadas
+    (con inicio y fin en segundos) y los errores de formato.
+    """
+    faltantes = [c for c in COLUMNAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+    datos = df[COLUMNAS].copy()
+    # Número de renglón como lo ve el usuario en el archivo (encabezado = 1)
+    datos.insert(0, "fila", df.index + 2)
+    for col in ["clave_materia", "id_periodo", "id_salon", "dia_semana", "hora_inicio"]:
+        datos[col] = datos[col].fillna("").astype(str).str.strip()
+
+    datos["seccion"] = pd.to_numeric(datos["seccion"], errors="coerce")
+    datos["duracion_minutos"] = pd.to_numeric(datos["duracion_minutos"], errors="coerce")
+
+    dias = (
+        datos["dia_semana"].str.normalize("NFKD")
+        .str.encode("ascii", "ignore").str.decode("ascii").str.lower()
+    )
+    datos["dia_semana"] = dias.map(DIAS_VALIDOS)
+
+    # Acepta 'HH:MM', 'HH:MM:SS' y las horas que Excel exporta como '1900-01-01 HH:MM:SS'
+    horas = datos["hora_inicio"].str.split(" ").str[-1]
+    horas = horas.where(horas.str.count(":") != 1, horas + ":00")
+    inicio = pd.to_timedelta(horas, errors="coerce").dt.total_seconds()
+    datos["inicio"] = inicio
+    datos["fin"] = inicio + datos["duracion_minutos"] * 60
+
+    errores = []
+    reglas = [
+        ((datos["clave_materia"] == "") | (datos["id_periodo"] == "") | (datos["id_salon"] == ""),
+         "Faltan clave_materia, id_periodo o id_salon."),
+        (datos["seccion"].isna() | (datos["seccion"] % 1 != 0), "La sección debe ser un número entero."),
+        (datos["dia_semana"].isna(), "Día inválido (Lunes a Sabado)."),
+        (datos["inicio"].isna() | (datos["inicio"] >= 24 * 3600), "Hora de inicio inválida (HH:MM)."),
+        (datos["duracion_minutos"].isna() | (datos["duracion_minutos"] <= 0) | (datos["duracion_minutos"] % 1 != 0),
+         "La duración debe ser un entero positivo de minutos."),
+    ]
+    invalida = pd.Series(False, index=datos.index)
+    for mascara, mensaje in reglas:
+        # Solo se reporta el primer error de cada fila
+        nuevos = mascara & ~invalida
+        errores += [{"fila": f, "error": mensaje} for f in datos.loc[nuevos, "fila"]]
+        invalida |= mascara
+
+    validas = datos[~invalida].copy()
+    validas = validas.astype({"seccion": int, "duracion_minutos": int, "inicio": int, "fin": int})
+    return validas, errores
+
+
+def _validar_catalogos(cursor, datos: pd.DataFrame) -> tuple[pd.DataFrame, list[dict]]:
+    """Descarta filas cuyo salón o curso no existe: una consulta por catálogo."""
+    errores = []
+    if datos.empty:
+        return datos, errores
+
+    salones = datos["id_salon"].unique().tolist()
+    cursor.execute(f"SELECT id_salon FROM salon WHERE id_salon IN ({marcadores(salones)})", salones)
+    existentes = {row[0] for row in cursor.fetchall()}
+    sin_salon = ~datos["id_salon"].isin(existentes)
+    errores += [{"fila": f, "error": f"El salón {s} no existe."} for f, s in datos.loc[sin_salon, ["fila", "id_salon"]].itertuples(index=False)]
+    datos = datos[~sin_salon]
+
+    if datos.empty:
+        return datos, errores
+
+    periodos = datos["id_periodo"].unique().tolist()
+    cursor.execute(
+        f"SELECT clave_materia, seccion, id_periodo FROM curso WHERE id_periodo IN ({marcadores(periodos)})",
+        periodos,
+    )
+    cursos = pd.DataFrame(cursor.fetchall(), columns=["clave_materia", "seccion", "id_periodo"]).astype({"seccion": int})
+    con_curso = datos.merge(cursos, on=["clave_materia", "seccion", "id_periodo"], how="left", indicator=True)
+    sin_curso = (con_curso["_merge"] == "left_only").to_numpy()
+    errores += [
+        {"fila": f, "error": f"El curso {c} sección {s} no existe en {p}."}
+        for f, c, s, p in datos.loc[sin_curso, ["fila", "clave_materia", "seccion", "id_periodo"]].itertuples(index=False)
+    ]
+    return datos[~sin_curso], errores
+
+
+def _cargar_existentes(cursor, periodos: list[str], bloquear: bool) -> pd.DataFrame:
+    """Horarios registrados en los periodos del archivo, con inicio y fin en segundos."""
+    sql = f"""
+        SELECT id_horario, id_salon, id_periodo, dia_semana,
+               TIME_TO_SEC(hora_inicio) AS inicio, TIME_TO_SEC(hora_fin) AS fin
+        FROM horario
+        WHERE id_periodo IN ({marcadores(periodos)})
+        {"FOR UPDATE" if bloquear else ""}
+    """
+    cursor.execute(sql, periodos)
+    existentes = pd.DataFrame(
+        cursor.fetchall(),
+        columns=["id_horario", "id_salon", "id_periodo", "dia_semana", "inicio", "fin"],
+    )
+    return existentes.astype({"inicio": int, "fin": int})
+
+
+def _barrido_traslapes(datos: pd.DataFrame, existentes: pd.DataFrame) -> tuple[pd.DataFrame, list[dict]]:
+    """
+    Ordena archivo y BD juntos por (salón, periodo, día, inicio) y marca:
+    - cada fila del archivo que empieza antes del mayor fin visto en su grupo;
+    - la fila del archivo que sigue abierta cuando empieza un horario existente
+      (una fila que empieza antes que el existente y termina después).
+    Un solo sort + cummax agrupado, sin comparar pares de filas.
+    """
+    if datos.empty:
+        return datos, []
+
+    claves = ["id_salon", "id_periodo", "dia_semana"]
+    lote = pd.concat([
+        existentes.assign(fila=pd.NA, origen=0),
+        datos[["fila"] + claves + ["inicio", "fin"]].assign(id_horario=pd.NA, origen=1),
+    ], ignore_index=True)
+    # A igual inicio los existentes van primero para que el choque se le atribuya al archivo
+    lote = lote.sort_values(claves + ["inicio", "origen"], kind="mergesort", ignore_index=True)
+
+    grupos = lote.groupby(claves, sort=False)["fin"]
+    lote["max_fin_previo"] = grupos.cummax().groupby([lote[c] for c in claves], sort=False).shift()
+    choque = (lote["origen"] == 1) & (lote["inicio"] < lote["max_fin_previo"])
+
+    errores = []
+    if choque.any():
+        # Para el mensaje: la fila anterior del grupo con el mayor fin
+        lote["pos_max"] = lote.index.where(lote["fin"] == grupos.cummax())
+        lote["pos_max"] = lote.groupby(claves, sort=False)["pos_max"].ffill()
+        lote["pos_previa"] = lote.groupby(claves, sort=False)["pos_max"].shift()
+        for _, fila in lote[choque].iterrows():
+            otra = lote.loc[int(fila["pos_previa"])]
+            if otra["origen"] == 0:
+                contra = f"el horario existente #{int(otra['id_horario'])}"
+            else:
+                contra = f"la fila {int(otra['fila'])} del archivo"
+            errores.append({
+                "fila": int(fila["fila"]),
+                "error": f"Se traslapa con {contra} ({fila['id_salon']}, {fila['dia_semana']}).",
+            })
+
+    # Sentido contrario: un existente que empieza dentro de una fila del archivo.
+    # Las filas del archivo sin choque empiezan después de todo lo anterior, así
+    # que no se traslapan entre sí y solo la última de ellas puede seguir abierta.
+    aceptada = (lote["origen"] == 1) & ~choque
+    por_grupo = [lote[c] for c in claves]
+    fila_abierta = lote["fila"].where(aceptada).groupby(por_grupo, sort=False).ffill()
+    fin_abierta = lote["fin"].where(aceptada).groupby(por_grupo, sort=False).ffill()
+    choque_existente = (lote["origen"] == 0) & fila_abierta.notna() & (lote["inicio"] < fin_abierta)
+    for pos, fila in lote[choque_existente].iterrows():
+        errores.append({
+            "fila": int(fila_abierta[pos]),
+            "error": f"Se traslapa con el horario existente #{int(fila['id_horario'])} ({fila['id_salon']}, {fila['dia_semana']}).",
+        })
+
+    # Una fila del archivo puede chocar con varios existentes: un error por fila
+    errores = list({e["fila"]: e for e in reversed(errores)}.values())[::-1]
+    filas_con_choque = {e["fila"] for e in errores}
+    return datos[~datos["fila"].isin(filas_con_choque)], errores
+
+
+def _reporte(errores: list[dict]) -> pd.DataFrame:
+    return pd.DataFrame(errores, columns=["fila", "error"]).sort_values("fila", ignore_index=True)
+
+
+def _validar(cursor, df: pd.DataFrame, bloquear: bool) -> tuple[pd.DataFrame, list[dict]]:
+    datos, errores = _normalizar(df)
+    datos, errores_catalogo = _validar_catalogos(cursor, datos)
+    errores += errores_catalogo
+    if datos.empty:
+        return datos, errores
+    existentes = _cargar_existentes(cursor, datos["id_periodo"].unique().tolist(), bloquear)
+    datos, errores_traslape = _barrido_traslapes(datos, existentes)
+    return datos, errores + errores_traslape
+
+
+def validar_horarios(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Vista previa sin escribir: regresa (filas que se importarían, reporte de errores por fila).
+    Lanza ValueError si al archivo le faltan columnas.
+    """
+    with get_connection() as conn, conn.cursor() as cursor:
+        datos, errores = _validar(cursor, df, bloquear=False)
+    return datos[["fila"] + COLUMNAS], _reporte(errores)
+
+
+def importar_horarios(df: pd.DataFrame, progreso=None, tamano_lote: int = TAMANO_LOTE) -> tuple[int, pd.DataFrame]:
+    """
+    Valida e inserta las filas válidas en una transacción. Los horarios de los
+    periodos del archivo se bloquean durante la validación para que nadie
+    inserte un traslape entre la revisión y el INSERT.
+    progreso(insertadas, total) se llama después de cada lote.
+    Regresa (filas insertadas, reporte de errores por fila).
+    """
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+            datos, errores = _validar(cursor, df, bloquear=True)
+
+            filas = [
+                (r.id_salon, r.hora_inicio_str, r.duracion_minutos, r.dia_semana, r.clave_materia, r.seccion, r.id_periodo)
+                for r in datos.assign(
+                    hora_inicio_str=pd.to_timedelta(datos["inicio"], unit="s").astype(str).str.split(" ").str[-1]
+                ).itertuples(index=False)
+            ]
+            insert_sql = """
+                INSERT INTO horario (id_salon, hora_inicio, duracion_minutos, dia_semana, clave_materia, seccion_curso, id_periodo)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            for i in range(0, len(filas), tamano_lote):
+                cursor.executemany(insert_sql, filas[i:i + tamano_lote])
+                if progreso:
+                    progreso(min(i + tamano_lote, len(filas)), len(filas))
+
+            conn.commit()
+            if filas:
+                invalidar("horarios")
+            return len(filas), _reporte(errores)
+
+    except mysql.connector.Error as err:
+        # get_connection() revierte la transacción al salir con error
+        return 0, _reporte([{"fila": 0, "error": f"Error al importar, no se guardó ninguna fila: {err}"}])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa horarios desde un CSV o Excel")
+    parser.add_argument("archivo")
+    parser.add_argument("--solo-validar", action="store_true", help="Reporta errores sin insertar")
+    parser.add_argument("--errores", help="Escribe el reporte de errores en este CSV")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE)
+    args = parser.parse_args()
+
+    try:
+        df = leer_archivo(args.archivo, args.archivo)
+        if args.solo_validar:
+            validas, errores = validar_horarios(df)
+            print(f"{len(validas)} filas válidas, {len(errores)} con errores.")
+        else:
+            def progreso(hechas, total):
+                print(f"\r{hechas}/{total} filas insertadas", end="", flush=True)
+            insertadas, errores = importar_horarios(df, progreso, args.lote)
+            print(f"\n{insertadas} horarios importados, {len(errores)} filas con errores.")
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        sys.exit(2)
+
+    if args.errores:
+        errores.to_csv(args.errores, index=False)
+    elif not errores.empty:
+        print(errores.to_string(index=False))
+    sys.exit(1 if not errores.empty else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,53 @@
 # modules/horarios/queries.py
 from config.db import get_connection
+from utils.memo import memo_por_ejecucion
+from utils.sql_helpers import condicion_keyset, dividir_pagina
+from utils.text_helpers import normalizar_profesor, patron_prefijo
 import mysql.connector
 import pandas as pd
 
+# Filas por página en los listados paginados
+TAMANO_PAGINA = 50
+
+@memo_por_ejecucion
 def obtener_horario_completo() -> pd.DataFrame:
     
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT
-                h.id_horario,
-                h.hora_inicio,
-                h.duracion_minutos,
-                h.dia_semana,
-                s.id_salon,
-                s.tipo           AS tipo_salon,
-                s.capacidad,
-                m.titulo         AS materia,
-                c.clave_materia  AS curso_clave,
-                c.seccion        AS curso_seccion,
-                c.profesor,
-                p.id_periodo,
-                p.fecha_inicio,
-                p.fecha_fin
-            FROM horario h
-            JOIN curso c
-                ON h.clave_materia = c.clave_materia
-               AND h.seccion_curso = c.seccion
-               AND h.id_periodo = c.id_periodo
-            JOIN materia m
-                ON m.clave = c.clave_materia
-            JOIN salon s
-                ON s.id_salon = h.id_salon
-            JOIN periodo p
-                ON p.id_periodo = c.id_periodo
-            ORDER BY p.id_periodo, c.clave_materia, c.seccion, h.hora_inicio;
-        """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT
+                    h.id_horario,
+                    h.hora_inicio,
+                    h.duracion_minutos,
+                    h.dia_semana,
+                    s.id_salon,
+                    s.tipo           AS tipo_salon,
+                    s.capacidad,
+                    m.titulo         AS materia,
+                    c.clave_materia  AS curso_clave,
+                    c.seccion        AS curso_seccion,
+                    c.profesor,
+                    p.id_periodo,
+                    p.fecha_inicio,
+                    p.fecha_fin
+                FROM horario h
+                JOIN curso c
+                    ON h.clave_materia = c.clave_materia
+                   AND h.seccion_curso = c.seccion
+                   AND h.id_periodo = c.id_periodo
+                JOIN materia m
+                    ON m.clave = c.clave_materia
+                JOIN salon s
+                    ON s.id_salon = h.id_salon
+                JOIN periodo p
+                    ON p.id_periodo = c.id_periodo
+                ORDER BY p.id_periodo, c.clave_materia, c.seccion, h.hora_inicio;
+            """
+
+            cursor.execute(query)
+            rows = cursor.fetchall()
+
+            return pd.DataFrame(rows)
 
     except mysql.connector.Error as err:
         print(" Error MySQL:", err)
@@ -50,72 +55,183 @@ def obtener_horario_completo() -> pd.DataFrame:
     except Exception as e:
         print(" Error inesperado:", e)
         return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
+
+# Llave de orden del horario completo; usa idx_horario_listado
+_ORDEN_COMPLETO = ["h.id_periodo", "h.clave_materia", "h.seccion_curso", "h.hora_inicio", "h.id_horario"]
+
+def obtener_horario_completo_pagina(
+    despues_de: tuple | None = None,
+    tamano: int = TAMANO_PAGINA,
+) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Una página del horario completo con paginación por llave: cada página lee
+    solo `tamano` filas del índice, sin OFFSET. `despues_de` es la llave que
+    regresó la página anterior (None para la primera); regresa (página, llave siguiente).
+    """
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT
+                    h.id_horario,
+                    h.hora_inicio,
+                    h.duracion_minutos,
+                    h.dia_semana,
+                    s.id_salon,
+                    s.tipo           AS tipo_salon,
+                    s.capacidad,
+                    m.titulo         AS materia,
+                    h.clave_materia  AS curso_clave,
+                    h.seccion_curso  AS curso_seccion,
+                    c.profesor,
+                    h.id_periodo
+                FROM horario h
+                JOIN curso c
+                    ON h.clave_materia = c.clave_materia
+                   AND h.seccion_curso = c.seccion
+                   AND h.id_periodo = c.id_periodo
+                JOIN materia m
+                    ON m.clave = c.clave_materia
+                JOIN salon s
+                    ON s.id_salon = h.id_salon
+            """
+            params = []
+            if despues_de:
+                condicion, params = condicion_keyset(_ORDEN_COMPLETO, despues_de)
+                query += f" WHERE {condicion}"
+            query += f" ORDER BY {', '.join(_ORDEN_COMPLETO)} LIMIT %s;"
+            params.append(tamano + 1)
+
+            cursor.execute(query, params)
+            pagina, siguiente = dividir_pagina(
+                cursor.fetchall(),
+                ["id_periodo", "curso_clave", "curso_seccion", "hora_inicio", "id_horario"],
+                tamano,
+            )
+            return pd.DataFrame(pagina), siguiente
+
+    except mysql.connector.Error as err:
+        print(" Error MySQL:", err)
+        return pd.DataFrame(), None
+
+@memo_por_ejecucion
+def obtener_resumen_horarios() -> dict:
+    """Totales para las métricas del horario completo sin traer las filas."""
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT
+                    COUNT(*) AS horarios,
+                    COUNT(DISTINCT id_salon) AS salones,
+                    COUNT(DISTINCT clave_materia) AS materias
+                FROM horario;
+            """)
+            return cursor.fetchone()
+    except mysql.connector.Error as err:
+        print(" Error MySQL:", err)
+        return {"horarios": 0, "salones": 0, "materias": 0}
+
+def _consulta_filtrar_horario(id_periodo, dia_semana, clave_materia, id_salon, profesor) -> tuple[str, list]:
+    query = """
+        SELECT
+            h.id_horario,
+            h.hora_inicio,
+            h.duracion_minutos,
+            h.dia_semana,
+            s.id_salon,
+            s.tipo AS tipo_salon,
+            m.titulo AS materia,
+            c.clave_materia AS curso_clave,
+            c.seccion AS curso_seccion,
+            c.profesor,
+            c.id_periodo
+        FROM horario h
+        JOIN curso c
+            ON h.clave_materia = c.clave_materia
+           AND h.seccion_curso = c.seccion
+           AND h.id_periodo = c.id_periodo
+        JOIN materia m
+            ON m.clave = c.clave_materia
+        JOIN salon s
+            ON s.id_salon = h.id_salon
+        WHERE 1=1
+    """
+
+    params = []
+
+    if id_periodo:
+        query += " AND h.id_periodo = %s"
+        params.append(id_periodo)
+
+    if dia_semana and dia_semana != "Todos":
+        query += " AND h.dia_semana = %s"
+        params.append(dia_semana)
+
+    if clave_materia:
+        query += " AND h.clave_materia = %s"
+        params.append(clave_materia)
+
+    if id_salon:
+        query += " AND h.id_salon = %s"
+        params.append(id_salon)
+
+    if profesor and normalizar_profesor(profesor):
+        # Búsqueda por prefijo sobre idx_curso_profesor ("zech" -> "Dr. Zechinelli")
+        query += " AND c.profesor_normalizado LIKE %s"
+        params.append(patron_prefijo(normalizar_profesor(profesor)))
+
+    return query, params
 
 def filtrar_horario(
     id_periodo: str = None,
     dia_semana: str = None,
     clave_materia: str = None,
-    id_salon: str = None
+    id_salon: str = None,
+    profesor: str = None
 ) -> pd.DataFrame:
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = """
-            SELECT
-                h.id_horario,
-                h.hora_inicio,
-                h.duracion_minutos,
-                h.dia_semana,
-                s.id_salon,
-                s.tipo AS tipo_salon,
-                m.titulo AS materia,
-                c.clave_materia AS curso_clave,
-                c.seccion AS curso_seccion,
-                c.profesor,
-                c.id_periodo
-            FROM horario h
-            JOIN curso c
-                ON h.clave_materia = c.clave_materia
-               AND h.seccion_curso = c.seccion
-               AND h.id_periodo = c.id_periodo
-            JOIN materia m
-                ON m.clave = c.clave_materia
-            JOIN salon s
-                ON s.id_salon = h.id_salon
-            WHERE 1=1
-        """
-
-        params = []
-
-        if id_periodo:
-            query += " AND c.id_periodo = %s"
-            params.append(id_periodo)
-        
-        if dia_semana and dia_semana != "Todos":
-            query += " AND h.dia_semana = %s"
-            params.append(dia_semana)
-            
-        if clave_materia:
-            query += " AND c.clave_materia = %s"
-            params.append(clave_materia)
-            
-        if id_salon:
-            query += " AND h.id_salon = %s"
-            params.append(id_salon)
-
-        query += " ORDER BY h.hora_inicio ASC;"
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query, params = _consulta_filtrar_horario(id_periodo, dia_semana, clave_materia, id_salon, profesor)
+            query += " ORDER BY h.hora_inicio ASC, h.id_horario ASC;"
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+            return pd.DataFrame(rows)
 
     except mysql.connector.Error as err:
         print(" Error MySQL:", err)
         return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
+
+# Llave de orden de filtrar_horario: (hora_inicio, id_horario)
+_ORDEN_FILTRO = ["h.hora_inicio", "h.id_horario"]
+
+def filtrar_horario_pagina(
+    id_periodo: str = None,
+    dia_semana: str = None,
+    clave_materia: str = None,
+    id_salon: str = None,
+    profesor: str = None,
+    despues_de: tuple | None = None,
+    tamano: int = TAMANO_PAGINA,
+) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Una página de filtrar_horario. `despues_de` es la llave que regresó la
+    página anterior (None para la primera); regresa (página, llave siguiente).
+    """
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query, params = _consulta_filtrar_horario(id_periodo, dia_semana, clave_materia, id_salon, profesor)
+            if despues_de:
+                condicion, params_keyset = condicion_keyset(_ORDEN_FILTRO, despues_de)
+                query += f" AND {condicion}"
+                params += params_keyset
+            query += f" ORDER BY {', '.join(_ORDEN_FILTRO)} LIMIT %s;"
+            params.append(tamano + 1)
+
+            cursor.execute(query, params)
+            pagina, siguiente = dividir_pagina(cursor.fetchall(), ["hora_inicio", "id_horario"], tamano)
+            return pd.DataFrame(pagina), siguiente
+
+    except mysql.connector.Error as err:
+        print(" Error MySQL:", err)
+        return pd.DataFrame(), None
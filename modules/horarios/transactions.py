@@ -2,6 +2,9 @@ import mysql.connector
 from datetime import time
 from typing import List, Optional
 from config.db import get_connection
+from config.cache import invalidar
+from utils.time_helpers import hora_a_str, calcular_hora_fin
+from utils.sql_helpers import marcadores, tabla_de_valores
 
 
 def crear_horario(
@@ -13,44 +16,93 @@ def crear_horario(
     curso_seccion: int,
     id_periodo: str,
 ) -> tuple[bool, str]:
-   
+    return crear_horarios_curso(
+        curso_clave, curso_seccion, id_periodo,
+        [(id_salon, hora_inicio, duracion_min, dias_semana)],
+    )
+
+def _traslapes_internos(filas: list[tuple]) -> list[str]:
+    """Bloques de la misma solicitud que chocan entre sí (mismo salón y día)."""
+    por_salon_dia: dict[tuple, list] = {}
+    for id_salon, dia, inicio, fin, _ in filas:
+        por_salon_dia.setdefault((id_salon, dia), []).append((inicio, fin))
+    choques = []
+    for (id_salon, dia), intervalos in por_salon_dia.items():
+        intervalos.sort()
+        # Las horas van como 'HH:MM:SS' con ceros a la izquierda: se comparan como texto
+        if any(fin_ant > inicio for (_, fin_ant), (inicio, _) in zip(intervalos, intervalos[1:])):
+            choques.append(f"{dia} en {id_salon}")
+    return choques
+
+def crear_horarios_curso(
+    curso_clave: str,
+    curso_seccion: int,
+    id_periodo: str,
+    bloques: List[tuple[str, time, int, List[str]]],
+) -> tuple[bool, str]:
+    """
+    Registra todas las sesiones de un curso en una transacción.
+    Cada bloque es (id_salon, hora_inicio, duracion_min, dias_semana).
+
+    Sin importar cuántos bloques y días sean, se hace una consulta que valida
+    los salones y bloquea los traslapes, y un INSERT de varias filas.
+    """
+    if not bloques or any(not dias for _, _, _, dias in bloques):
+        return False, "Debe seleccionar al menos un día."
+
+    # Una fila por (salón, día) a insertar
+    filas = []
+    for id_salon, hora_inicio, duracion_min, dias_semana in bloques:
+        hora_str = hora_a_str(hora_inicio)
+        hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
+        for dia in dias_semana:
+            filas.append((id_salon, dia, hora_str, hora_fin_str, duracion_min))
 
-    conn = None
-    cursor = None
+    choques = _traslapes_internos(filas)
+    if choques:
+        return False, f"Los bloques solicitados se traslapan entre sí: {', '.join(choques)}."
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
 
-        hora_str = hora_inicio.strftime("%H:%M:%S")
-
-        if not dias_semana:
-             return False, "Debe seleccionar al menos un día."
-
-        # Validar que el salon exista
-        cursor.execute("SELECT id_salon FROM salon WHERE id_salon = %s", (id_salon,))
-        if not cursor.fetchone():
-            return False, "El salón especificado no existe."
-
-        for dia in dias_semana:
-            conflicto_sql = """
-                SELECT id_horario
-                FROM horario
-                WHERE id_salon    = %s
-                  AND dia_semana = %s
-                  AND id_periodo = %s
-                  -- traslape de intervalos de tiempo
-                  AND hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-                  AND %s < ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))
+            bloques_sql, bloques_params = tabla_de_valores(
+                [("id_salon", None), ("dia_semana", None), ("hora_inicio", "TIME"), ("hora_fin", "TIME")],
+                [fila[:4] for fila in filas],
+            )
+            # Salones inexistentes (s.id_salon NULL) y traslapes (h.id_horario no NULL)
+            # de todos los días en una sola consulta; FOR UPDATE bloquea los choques
+            verificacion_sql = f"""
+                SELECT b.id_salon, b.dia_semana, s.id_salon AS salon_existente, h.id_horario
+                FROM ({bloques_sql}) AS b
+                LEFT JOIN salon s   ON s.id_salon = b.id_salon
+                LEFT JOIN horario h ON h.id_salon = b.id_salon
+                                   AND h.id_periodo = %s
+                                   AND h.dia_semana = b.dia_semana
+                                   -- traslape de intervalos de tiempo (usa idx_horario_salon_slot)
+                                   AND h.hora_inicio < b.hora_fin
+                                   AND h.hora_fin > b.hora_inicio
                 FOR UPDATE;
             """
-            conflicto_params = (id_salon, dia, id_periodo, hora_str, duracion_min, hora_str)
-            cursor.execute(conflicto_sql, conflicto_params)
+            cursor.execute(verificacion_sql, bloques_params + [id_periodo])
+            resultado = cursor.fetchall()
 
-            if cursor.fetchone():
+            faltantes = sorted({id_salon for id_salon, _, existente, _ in resultado if existente is None})
+            if faltantes:
+                conn.rollback()
+                if len(faltantes) == 1 and len(bloques) == 1:
+                    return False, "El salón especificado no existe."
+                return False, f"Los salones especificados no existen: {', '.join(faltantes)}."
+
+            conflictos = list(dict.fromkeys(
+                (id_salon, dia) for id_salon, dia, _, id_horario in resultado if id_horario is not None
+            ))
+            if conflictos:
                 conn.rollback()
-                return False, f"Ya existe un horario que se traslapa en ese salón para el día {dia}."
+                if len(conflictos) == 1:
+                    return False, f"Ya existe un horario que se traslapa en ese salón para el día {conflictos[0][1]}."
+                detalle = ", ".join(f"{dia} en {id_salon}" for id_salon, dia in conflictos)
+                return False, f"Ya existen horarios que se traslapan: {detalle}."
 
             insert_sql = """
                 INSERT INTO horario (
@@ -62,29 +114,20 @@ def crear_horario(
                     seccion_curso,
                     id_periodo
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s);
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
-            insert_params = (
-                id_salon,
-                hora_str,
-                duracion_min,
-                dia,
-                curso_clave,
-                curso_seccion,
-                id_periodo,
-            )
-            cursor.execute(insert_sql, insert_params)
+            cursor.executemany(insert_sql, [
+                (id_salon, hora_str, duracion_min, dia, curso_clave, curso_seccion, id_periodo)
+                for id_salon, dia, hora_str, _, duracion_min in filas
+            ])
 
-        conn.commit()
-        return True, "Horarios creados correctamente"
+            conn.commit()
+            invalidar("horarios")
+            return True, "Horarios creados correctamente"
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         return False, f"Error al crear el horario: {err}"
-    finally:
-        if cursor:
-            cursor.close()
 
 def actualizar_horario(
     id_horario: int,
@@ -93,100 +136,99 @@ def actualizar_horario(
     duracion_min: int,
     dia_semana: str,
 ) -> tuple[bool, str]:
-   
-    conn = None
-    cursor = None
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
-
-        hora_str = hora_inicio.strftime("%H:%M:%S")
-
-        # Obtener el id_periodo del horario actual para validar conflicto en el mismo periodo
-        cursor.execute("SELECT id_periodo FROM horario WHERE id_horario = %s", (id_horario,))
-        row = cursor.fetchone()
-        if not row:
-             conn.rollback()
-             return False, "No se encontró el horario a actualizar."
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+
+            hora_str = hora_a_str(hora_inicio)
+            hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
+
+            # Obtener el id_periodo del horario actual para validar conflicto en el mismo periodo
+            cursor.execute("SELECT id_periodo FROM horario WHERE id_horario = %s", (id_horario,))
+            row = cursor.fetchone()
+            if not row:
+                 conn.rollback()
+                 return False, "No se encontró el horario a actualizar."
         
-        current_periodo = row[0]
+            current_periodo = row[0]
 
-        # 1) Checar traslape, excluyendo el propio idHorario
+            # 1) Checar traslape, excluyendo el propio idHorario
         
-        conflicto_sql = """
-            SELECT id_horario
-            FROM horario
-            WHERE id_salon    = %s
-              AND dia_semana = %s
-              AND id_periodo = %s
-              AND id_horario <> %s
-              AND hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-              AND %s < ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))
-            FOR UPDATE;
-        """
-        conflicto_params = (id_salon, dia_semana, current_periodo, id_horario,
-                            hora_str, duracion_min, hora_str)
-        cursor.execute(conflicto_sql, conflicto_params)
-
-        if cursor.fetchone():
-            conn.rollback()
-            return False, "El nuevo horario se traslapa con otro ya existente en ese salón."
+            conflicto_sql = """
+                SELECT id_horario
+                FROM horario
+                WHERE id_salon    = %s
+                  AND dia_semana = %s
+                  AND id_periodo = %s
+                  AND id_horario <> %s
+                  AND hora_inicio < %s
+                  AND hora_fin > %s
+                FOR UPDATE;
+            """
+            conflicto_params = (id_salon, dia_semana, current_periodo, id_horario,
+                                hora_fin_str, hora_str)
+            cursor.execute(conflicto_sql, conflicto_params)
+
+            if cursor.fetchone():
+                conn.rollback()
+                return False, "El nuevo horario se traslapa con otro ya existente en ese salón."
 
        
-        update_sql = """
-            UPDATE horario
-            SET id_salon    = %s,
-                hora_inicio       = %s,
-                duracion_minutos   = %s,
-                dia_semana = %s
-            WHERE id_horario = %s;
-        """
-        update_params = (id_salon, hora_str, duracion_min, dia_semana, id_horario)
-        cursor.execute(update_sql, update_params)
-
-        if cursor.rowcount == 0:
-            conn.rollback()
-            return False, "No se pudo actualizar el horario."
-
-        conn.commit()
-        return True, "Horario actualizado correctamente"
+            update_sql = """
+                UPDATE horario
+                SET id_salon    = %s,
+                    hora_inicio       = %s,
+                    duracion_minutos   = %s,
+                    dia_semana = %s
+                WHERE id_horario = %s;
+            """
+            update_params = (id_salon, hora_str, duracion_min, dia_semana, id_horario)
+            cursor.execute(update_sql, update_params)
+
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False, "No se pudo actualizar el horario."
+
+            conn.commit()
+            invalidar("horarios")
+            return True, "Horario actualizado correctamente"
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         return False, f"Error al actualizar el horario: {err}"
-    finally:
-        if cursor:
-            cursor.close()
 
 def eliminar_horario(id_horario: int) -> tuple[bool, str]:
-    conn = None
-    cursor = None
+    return eliminar_horarios([id_horario])[int(id_horario)]
+
+def eliminar_horarios(ids_horario: list[int]) -> dict[int, tuple[bool, str]]:
+    """
+    Elimina varios horarios en una sola transacción con un DELETE ... IN (...).
+    Regresa {id_horario: (éxito, mensaje)}; si algo falla no se elimina ninguno.
+    """
+    ids = list(dict.fromkeys(int(i) for i in ids_horario))
+    if not ids:
+        return {}
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+            lista = marcadores(ids)
 
-        delete_sql = """
-            DELETE FROM horario
-            WHERE id_horario = %s;
-        """
-        cursor.execute(delete_sql, (id_horario,))
+            cursor.execute(f"SELECT id_horario FROM horario WHERE id_horario IN ({lista}) FOR UPDATE", ids)
+            existentes = {row[0] for row in cursor.fetchall()}
 
-        if cursor.rowcount == 0:
-            conn.rollback()
-            return False, "No se encontró el horario a eliminar."
+            cursor.execute(f"DELETE FROM horario WHERE id_horario IN ({lista})", ids)
 
-        conn.commit()
-        return True, "Horario eliminado correctamente"
+            conn.commit()
+            if existentes:
+                invalidar("horarios")
+            return {
+                id_horario: (True, "Horario eliminado correctamente")
+                if id_horario in existentes else (False, "No se encontró el horario a eliminar.")
+                for id_horario in ids
+            }
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
-        return False, f"Error al eliminar el horario: {err}"
-    finally:
-        if cursor:
-            cursor.close()
+        # get_connection() revierte la transacción al salir con error
+        return {id_horario: (False, f"Error al eliminar el horario: {err}") for id_horario in ids}
@@ -0,0 +1,221 @@
+"""
+Auditoría de traslapes ya guardados en la BD.
+
+Las validaciones de transactions.py solo revisan al escribir y dentro de un
+salón. Este escaneo recorre todas las filas (incluidas las de init.sql, SQL
+directo o inserciones que compitieron entre la verificación y el INSERT) y
+reporta cada par que se traslapa:
+
+- horario / horario, horario / regla, regla / regla: mismo salón, periodo y
+  día de la semana (regla = reservación periódica).
+- reservacion / reservacion: mismo salón y fecha.
+- horario / reservacion, regla / reservacion: la reservación cae en una fecha
+  en que la clase o la serie ocurre (mismo salón, día de la semana y periodo
+  que contiene la fecha; las fechas canceladas de una serie no cuentan).
+- profesor: un mismo profesor con dos clases a la misma hora en el periodo,
+  en cualquier salón.
+
+Las filas llegan ordenadas del servidor por bloques (cursor sin buffer) y
+cada grupo se barre en O(n log n + pares).
+
+    python -m modules.integrity --salida traslapes.csv
+"""
+import argparse
+import heapq
+import sys
+from itertools import groupby
+
+import mysql.connector
+import pandas as pd
+
+from config.db import get_connection
+from modules.periodos import tabla_periodos
+
+TAMANO_BLOQUE = 10000
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+
+COLUMNAS = [
+    "tipo", "id_periodo", "id_salon", "profesor", "dia_semana", "fecha",
+    "id_a", "inicio_a", "fin_a", "id_b", "inicio_b", "fin_b",
+]
+
+
+def _hora(segundos: int) -> str:
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}"
+
+
+def _filas(cursor, sql: str, params=()):
+    """Filas de la consulta, leídas del servidor de TAMANO_BLOQUE en TAMANO_BLOQUE."""
+    cursor.execute(sql, params)
+    while True:
+        bloque = cursor.fetchmany(TAMANO_BLOQUE)
+        if not bloque:
+            return
+        yield from bloque
+
+
+def barrer(intervalos):
+    """
+    Pares que se traslapan en intervalos [inicio, fin) ordenados por inicio.
+    intervalos: iterable de (inicio, fin, dato). Genera (dato_a, dato_b).
+    Los activos se guardan en un heap por fin: cada intervalo se agrega y se
+    quita una vez, y cada par se reporta una sola vez.
+    """
+    activos = []  # (fin, orden, inicio, dato)
+    for orden, (inicio, fin, dato) in enumerate(intervalos):
+        while activos and activos[0][0] <= inicio:
+            heapq.heappop(activos)
+        for _, _, _, otro in activos:
+            yield otro, dato
+        heapq.heappush(activos, (fin, orden, inicio, dato))
+
+
+# Orden de los orígenes dentro de un par ("horario/reservacion", nunca al revés)
+_ORIGENES = ["horario", "regla", "reservacion"]
+
+
+def _par(tipo, a, b, **contexto) -> dict:
+    return {
+        "tipo": tipo,
+        **contexto,
+        "id_a": a[0], "inicio_a": _hora(a[1]), "fin_a": _hora(a[2]),
+        "id_b": b[0], "inicio_b": _hora(b[1]), "fin_b": _hora(b[2]),
+    }
+
+
+def _par_origenes(a, b, **contexto) -> dict:
+    """Par de (origen, (id, inicio, fin)) con los orígenes en el orden de _ORIGENES."""
+    if _ORIGENES.index(a[0]) > _ORIGENES.index(b[0]):
+        a, b = b, a
+    return _par(f"{a[0]}/{b[0]}", a[1], b[1], **contexto)
+
+
+def _traslapes_semanales(cursor) -> tuple[list[dict], dict]:
+    """
+    Pares entre clases y reservaciones periódicas de un mismo salón, periodo
+    y día. Regresa también los intervalos por (salón, periodo, día) para
+    cruzarlos con las reservaciones de cada fecha.
+    """
+    reporte = []
+    semanales = {}
+    filas = _filas(cursor, """
+        SELECT id_salon, id_periodo, CAST(dia_semana AS CHAR) AS dia, 'horario', id_horario,
+               TIME_TO_SEC(hora_inicio) AS inicio, TIME_TO_SEC(hora_fin)
+        FROM horario
+        WHERE id_salon IS NOT NULL
+        UNION ALL
+        SELECT id_salon, id_periodo, CAST(dia_semana AS CHAR), 'regla', id_regla,
+               TIME_TO_SEC(hora_inicio), TIME_TO_SEC(hora_fin)
+        FROM reservacion_periodica
+        ORDER BY id_salon, id_periodo, dia, inicio
+    """)
+    for (id_salon, id_periodo, dia), grupo in groupby(filas, key=lambda f: f[:3]):
+        intervalos = [(ini, fin, (origen, (id_x, ini, fin))) for *_, origen, id_x, ini, fin in grupo]
+        semanales[(id_salon, id_periodo, dia)] = intervalos
+        for a, b in barrer(intervalos):
+            reporte.append(_par_origenes(a, b, id_periodo=id_periodo, id_salon=id_salon, dia_semana=dia))
+    return reporte, semanales
+
+
+def _traslapes_reservaciones(cursor, semanales: dict, excepciones: set) -> list[dict]:
+    """
+    Pares con al menos una reservación. Para cada (salón, fecha) se mezclan
+    las reservaciones con las clases y series de ese día de la semana en el
+    periodo que contiene la fecha (sin las series que cancelaron esa fecha),
+    y se barre todo junto.
+    """
+    reporte = []
+    filas = _filas(cursor, """
+        SELECT id_salon, fecha, id_reservacion, TIME_TO_SEC(hora_inicio), TIME_TO_SEC(hora_fin)
+        FROM reservacion
+        ORDER BY id_salon, fecha, hora_inicio
+    """)
+    for (id_salon, fecha), grupo in groupby(filas, key=lambda f: f[:2]):
+        dia = DIAS_SEMANA[fecha.weekday()]
+        id_periodo = tabla_periodos.periodo_de(fecha)
+        intervalos = [(ini, fin, ("reservacion", (id_r, ini, fin))) for _, _, id_r, ini, fin in grupo]
+        intervalos += [
+            (ini, fin, (origen, dato))
+            for ini, fin, (origen, dato) in semanales.get((id_salon, id_periodo, dia), [])
+            if origen != "regla" or (dato[0], fecha) not in excepciones
+        ]
+        intervalos.sort(key=lambda i: i[0])
+
+        for a, b in barrer(intervalos):
+            if a[0] != "reservacion" and b[0] != "reservacion":
+                continue  # Ya reportado por semana en _traslapes_semanales
+            reporte.append(_par_origenes(
+                a, b, id_periodo=id_periodo, id_salon=id_salon, dia_semana=dia, fecha=fecha,
+            ))
+    return reporte
+
+
+def _traslapes_profesores(cursor) -> list[dict]:
+    """Clases del mismo profesor a la misma hora en cualquier salón (usa profesor_normalizado)."""
+    reporte = []
+    filas = _filas(cursor, """
+        SELECT c.profesor_normalizado, h.id_periodo, CAST(h.dia_semana AS CHAR), h.id_horario,
+               TIME_TO_SEC(h.hora_inicio), TIME_TO_SEC(h.hora_fin), c.profesor
+        FROM horario h
+        JOIN curso c
+            ON h.clave_materia = c.clave_materia
+           AND h.seccion_curso = c.seccion
+           AND h.id_periodo = c.id_periodo
+        WHERE c.profesor_normalizado <> ''
+        ORDER BY c.profesor_normalizado, h.id_periodo, h.dia_semana, h.hora_inicio
+    """)
+    for (_, id_periodo, dia), grupo in groupby(filas, key=lambda f: f[:3]):
+        intervalos = [(ini, fin, (id_h, ini, fin, profesor)) for _, _, _, id_h, ini, fin, profesor in grupo]
+        for a, b in barrer(intervalos):
+            reporte.append(_par(
+                "profesor", a, b,
+                id_periodo=id_periodo, profesor=a[3], dia_semana=dia,
+            ))
+    return reporte
+
+
+def escanear_traslapes() -> pd.DataFrame:
+    """
+    Recorre horarios, reservaciones y series periódicas y regresa un renglón por cada
+    par que se traslapa (columnas COLUMNAS). Vacío si la BD está íntegra.
+    Lanza mysql.connector.Error si no se puede leer la BD.
+    """
+    # Una conexión por consulta: un cursor sin buffer debe terminar antes del siguiente
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT id_regla, fecha FROM reservacion_periodica_excepcion")
+        excepciones = {tuple(row) for row in cursor.fetchall()}
+    with get_connection() as conn, conn.cursor(buffered=False) as cursor:
+        reporte, semanales = _traslapes_semanales(cursor)
+    with get_connection() as conn, conn.cursor(buffered=False) as cursor:
+        reporte += _traslapes_reservaciones(cursor, semanales, excepciones)
+    with get_connection() as conn, conn.cursor(buffered=False) as cursor:
+        reporte += _traslapes_profesores(cursor)
+    return pd.DataFrame(reporte, columns=COLUMNAS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca horarios y reservaciones que se traslapan en toda la BD")
+    parser.add_argument("--salida", help="CSV con un renglón por traslape")
+    args = parser.parse_args()
+
+    try:
+        df = escanear_traslapes()
+    except mysql.connector.Error as err:
+        print(f"No se pudo leer la base de datos: {err}", file=sys.stderr)
+        sys.exit(2)
+
+    if df.empty:
+        print("Sin traslapes.")
+        return
+    for tipo, n in df["tipo"].value_counts().items():
+        print(f"{tipo:>24}: {n:,}")
+    if args.salida:
+        df.to_csv(args.salida, index=False)
+        print(f"Reporte en {args.salida}")
+    # Código de salida distinto de 0 para usarlo desde cron / CI
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Tabla de periodos en memoria.
+
+Los periodos son pocos y casi nunca cambian, así que en lugar de preguntar a
+la BD "¿qué periodo contiene esta fecha?" en cada consulta se guardan
+ordenados por fecha_inicio y se resuelven con bisect. Se vuelve a leer
+después de cualquier invalidar("periodos") (crear_nuevo_curso al crear un
+periodo nuevo) o al vencer PERIODOS_TTL.
+"""
+import os
+import threading
+import time as _time
+from bisect import bisect_right
+from datetime import date
+
+import mysql.connector
+
+from config.cache import al_invalidar
+from config.db import get_connection
+
+# Segundos máximos que se sirve una carga sin invalidaciones en este proceso
+# (ej. otro servidor creando periodos en la misma BD)
+PERIODOS_TTL = float(os.getenv("DB_PERIODOS_TTL", 3600))
+
+
+class TablaPeriodos:
+    """
+    Periodos ordenados por fecha_inicio. Los periodos no se traslapan
+    (obtener_fechas_periodo los genera en meses distintos), así que el único
+    candidato para una fecha es el último que empieza en o antes de ella.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (inicios, [(id_periodo, fecha_inicio, fecha_fin)], cargada_en)
+        self._carga: tuple | None = None
+        self._desactualizado = True
+
+    def marcar_desactualizado(self):
+        self._desactualizado = True
+
+    def _vigente(self, carga) -> bool:
+        return (
+            carga is not None
+            and not self._desactualizado
+            and _time.monotonic() - carga[2] < self.ttl
+        )
+
+    def recargar(self):
+        with self._lock:
+            if self._vigente(self._carga):
+                return self._carga
+            self._desactualizado = False
+            try:
+                with get_connection() as conn, conn.cursor() as cursor:
+                    cursor.execute("SELECT id_periodo, fecha_inicio, fecha_fin FROM periodo ORDER BY fecha_inicio")
+                    filas = [tuple(row) for row in cursor.fetchall()]
+            except mysql.connector.Error as err:
+                print("❌ Error al cargar los periodos:", err)
+                self._desactualizado = True
+                return None
+            self._carga = ([inicio for _, inicio, _ in filas], filas, _time.monotonic())
+            return self._carga
+
+    def _actual(self):
+        carga = self._carga
+        if self._vigente(carga):
+            return carga
+        return self.recargar()
+
+    def periodo_de(self, fecha: date) -> str | None:
+        """id_periodo que contiene la fecha, o None si ninguno la cubre."""
+        carga = self._actual()
+        if carga is None:
+            return None
+        inicios, filas, _ = carga
+        k = bisect_right(inicios, fecha)
+        if k == 0:
+            return None
+        id_periodo, _, fecha_fin = filas[k - 1]
+        return id_periodo if fecha <= fecha_fin else None
+
+    def rango(self, id_periodo: str) -> tuple[date, date] | None:
+        """(fecha_inicio, fecha_fin) del periodo, o None si no existe."""
+        carga = self._actual()
+        if carga is None:
+            return None
+        for periodo, inicio, fin in carga[1]:
+            if periodo == id_periodo:
+                return inicio, fin
+        return None
+
+
+tabla_periodos = TablaPeriodos(PERIODOS_TTL)
+
+
+@al_invalidar
+def _al_escribir(etiquetas: tuple):
+    if "periodos" in etiquetas:
+        tabla_periodos.marcar_desactualizado()
@@ -0,0 +1,414 @@
+"""
+Motor de conflictos en memoria.
+
+Guarda la ocupación de todos los salones para responder en microsegundos
+"¿está libre el salón X?" y "¿qué salones están libres?" sin ir a la BD.
+Solo ve las escrituras de otros procesos al recargar, así que nunca decide
+por sí mismo que un salón está ocupado: la verificación dentro de la
+transacción (_verificar_conflicto) es la que decide.
+
+Las reservaciones que este proceso crea o cancela se aplican a la carga en
+memoria (agregar_reservacion, quitar_reservaciones, ...) en lugar de
+recargar todo; los cambios de horarios, salones y periodos sí recargan.
+"""
+import os
+import threading
+import time as _time
+from bisect import bisect_left
+from datetime import date, time
+
+import mysql.connector
+
+from config.cache import al_invalidar
+from config.db import get_connection
+
+# Segundos máximos que se sirve una carga aunque no haya habido escrituras en
+# este proceso (ej. otro servidor escribiendo en la misma BD)
+MOTOR_TTL = float(os.getenv("DB_CONFLICT_ENGINE_TTL", 300))
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+
+# Etiquetas de caché cuyas escrituras obligan a recargar. Las de "reservaciones"
+# llegan como cambios puntuales desde transactions.py.
+_ETIQUETAS = {"horarios", "salones", "periodos"}
+
+
+def _segundos(hora: time) -> int:
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+class IndiceIntervalos:
+    """
+    Intervalos [inicio, fin) en segundos, ordenados por inicio, con el máximo
+    fin acumulado. Cumple el papel de un árbol de intervalos estático:
+    los que empiezan antes de `fin` son un prefijo (bisect) y hay traslape
+    si alguno de ellos termina después de `inicio`.
+    """
+
+    __slots__ = ("_inicios", "_fines", "_max_fin")
+
+    def __init__(self, intervalos: list[tuple[int, int]]):
+        intervalos = sorted(intervalos)
+        self._inicios = [i for i, _ in intervalos]
+        self._fines = [f for _, f in intervalos]
+        self._max_fin = []
+        maximo = 0
+        for fin in self._fines:
+            maximo = max(maximo, fin)
+            self._max_fin.append(maximo)
+
+    def __len__(self) -> int:
+        return len(self._inicios)
+
+    def traslapa(self, inicio: int, fin: int) -> bool:
+        k = bisect_left(self._inicios, fin)
+        return k > 0 and self._max_fin[k - 1] > inicio
+
+
+def _indice(intervalos: list[tuple[int, int]]) -> IndiceIntervalos | None:
+    return IndiceIntervalos(intervalos) if intervalos else None
+
+
+class _Instantanea:
+    """
+    Ocupación cargada de la BD en un momento dado. Después de armarse solo
+    cambia por los métodos agregar_* / quitar_*, que MotorConflictos llama
+    con su lock; cada uno rearma solo el índice de la clave que tocó.
+    """
+
+    def __init__(self, periodos, salones, filas_horario, filas_reservacion, filas_regla, excepciones, desde: date):
+        self.periodos = periodos            # [(id_periodo, fecha_inicio, fecha_fin)]
+        self.salones = salones              # [id_salon] ordenados
+        self.filas_horario = filas_horario  # {(id_horario, id_salon, id_periodo, dia, inicio, fin)}
+        self.filas_reservacion = filas_reservacion  # {(id_reservacion, id_salon, fecha, inicio, fin)}
+        self.filas_regla = filas_regla      # {(id_regla, id_salon, id_periodo, dia, inicio, fin)}
+        self.excepciones = excepciones      # {(id_regla, fecha)}
+        self.desde = desde
+        self.cargada_en = _time.monotonic()
+
+        por_clave: dict[tuple, list] = {}
+        for _, id_salon, id_periodo, dia, inicio, fin in filas_horario:
+            por_clave.setdefault((id_salon, id_periodo, dia), []).append((inicio, fin))
+        self.horarios = {clave: IndiceIntervalos(v) for clave, v in por_clave.items()}
+
+        # (id_salon, fecha) -> {id_reservacion: (inicio, fin)}, para rearmar un índice al cambiar
+        self._reservaciones_por_clave: dict[tuple, dict] = {}
+        self._reservacion_por_id: dict[int, tuple] = {}
+        for fila in filas_reservacion:
+            id_r, id_salon, fecha, inicio, fin = fila
+            self._reservaciones_por_clave.setdefault((id_salon, fecha), {})[id_r] = (inicio, fin)
+            self._reservacion_por_id[id_r] = fila
+        self.reservaciones = {
+            clave: IndiceIntervalos(list(v.values())) for clave, v in self._reservaciones_por_clave.items()
+        }
+
+        # Reglas periódicas: el índice descarta rápido; si hay traslape se revisa
+        # regla por regla si esa fecha está cancelada
+        por_clave = {}
+        self._regla_por_id: dict[int, tuple] = {}
+        for fila in filas_regla:
+            id_regla, id_salon, id_periodo, dia, inicio, fin = fila
+            por_clave.setdefault((id_salon, id_periodo, dia), []).append((id_regla, inicio, fin))
+            self._regla_por_id[id_regla] = fila
+        self.reglas = {clave: (IndiceIntervalos([(i, f) for _, i, f in v]), v) for clave, v in por_clave.items()}
+
+    def agregar_reservacion(self, fila: tuple):
+        """fila: (id_reservacion, id_salon, fecha, inicio, fin). Las anteriores a `desde` no se guardan."""
+        id_r, id_salon, fecha, inicio, fin = fila
+        if fecha < self.desde or id_r in self._reservacion_por_id:
+            return
+        self.filas_reservacion.add(fila)
+        self._reservacion_por_id[id_r] = fila
+        intervalos = self._reservaciones_por_clave.setdefault((id_salon, fecha), {})
+        intervalos[id_r] = (inicio, fin)
+        self.reservaciones[(id_salon, fecha)] = IndiceIntervalos(list(intervalos.values()))
+
+    def quitar_reservaciones(self, ids: list[int]):
+        for id_r in ids:
+            fila = self._reservacion_por_id.pop(id_r, None)
+            if fila is None:
+                continue
+            self.filas_reservacion.discard(fila)
+            clave = (fila[1], fila[2])
+            intervalos = self._reservaciones_por_clave[clave]
+            del intervalos[id_r]
+            indice = _indice(list(intervalos.values()))
+            if indice is None:
+                del self._reservaciones_por_clave[clave]
+                self.reservaciones.pop(clave, None)
+            else:
+                self.reservaciones[clave] = indice
+
+    def _reindexar_reglas(self, clave: tuple, reglas: list):
+        indice = _indice([(i, f) for _, i, f in reglas])
+        if indice is None:
+            self.reglas.pop(clave, None)
+        else:
+            self.reglas[clave] = (indice, reglas)
+
+    def agregar_regla(self, fila: tuple):
+        """fila: (id_regla, id_salon, id_periodo, dia, inicio, fin)."""
+        id_regla, id_salon, id_periodo, dia, inicio, fin = fila
+        if id_regla in self._regla_por_id:
+            return
+        self.filas_regla.add(fila)
+        self._regla_por_id[id_regla] = fila
+        clave = (id_salon, id_periodo, dia)
+        anteriores = self.reglas.get(clave, (None, []))[1]
+        self._reindexar_reglas(clave, anteriores + [(id_regla, inicio, fin)])
+
+    def quitar_reglas(self, ids: list[int]):
+        """Quita las reglas y sus excepciones (en la BD se borran en cascada)."""
+        quitadas = set()
+        for id_regla in ids:
+            fila = self._regla_por_id.pop(id_regla, None)
+            if fila is None:
+                continue
+            quitadas.add(id_regla)
+            self.filas_regla.discard(fila)
+            clave = (fila[1], fila[2], fila[3])
+            restantes = [r for r in self.reglas.get(clave, (None, []))[1] if r[0] != id_regla]
+            self._reindexar_reglas(clave, restantes)
+        if quitadas:
+            self.excepciones = {e for e in self.excepciones if e[0] not in quitadas}
+
+    def agregar_excepciones(self, excepciones: list[tuple]):
+        """[(id_regla, fecha)]; las de reglas desconocidas o anteriores a `desde` no se guardan."""
+        self.excepciones |= {
+            (id_regla, fecha) for id_regla, fecha in excepciones
+            if fecha >= self.desde and id_regla in self._regla_por_id
+        }
+
+    def periodos_de(self, fecha: date) -> list[str]:
+        return [p for p, inicio, fin in self.periodos if inicio <= fecha <= fin]
+
+    def ocupado(self, id_salon: str, fecha: date, periodos: list[str], inicio: int, fin: int) -> bool:
+        dia = DIAS_SEMANA[fecha.weekday()]
+        for id_periodo in periodos:
+            indice = self.horarios.get((id_salon, id_periodo, dia))
+            if indice is not None and indice.traslapa(inicio, fin):
+                return True
+            reglas = self.reglas.get((id_salon, id_periodo, dia))
+            if reglas is not None and reglas[0].traslapa(inicio, fin):
+                if any(
+                    i < fin and f > inicio and (id_regla, fecha) not in self.excepciones
+                    for id_regla, i, f in reglas[1]
+                ):
+                    return True
+        indice = self.reservaciones.get((id_salon, fecha))
+        return indice is not None and indice.traslapa(inicio, fin)
+
+
+def _cargar(desde: date) -> _Instantanea:
+    """Lee periodos, salones, horarios, reservaciones y reglas periódicas (con excepciones desde `desde`)."""
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT id_periodo, fecha_inicio, fecha_fin FROM periodo")
+        periodos = [tuple(row) for row in cursor.fetchall()]
+
+        cursor.execute("SELECT id_salon FROM salon ORDER BY id_salon")
+        salones = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT id_horario, id_salon, id_periodo, dia_semana,
+                   TIME_TO_SEC(hora_inicio), TIME_TO_SEC(hora_fin)
+            FROM horario
+        """)
+        filas_horario = {
+            (id_h, salon, periodo, dia, int(ini), int(fin))
+            for id_h, salon, periodo, dia, ini, fin in cursor.fetchall()
+        }
+
+        # Las reservaciones pasadas no pueden chocar con una nueva; no se cargan
+        cursor.execute("""
+            SELECT id_reservacion, id_salon, fecha,
+                   TIME_TO_SEC(hora_inicio), TIME_TO_SEC(hora_fin)
+            FROM reservacion
+            WHERE fecha >= %s
+        """, (desde,))
+        filas_reservacion = {
+            (id_r, salon, fecha, int(ini), int(fin))
+            for id_r, salon, fecha, ini, fin in cursor.fetchall()
+        }
+
+        cursor.execute("""
+            SELECT id_regla, id_salon, id_periodo, dia_semana,
+                   TIME_TO_SEC(hora_inicio), TIME_TO_SEC(hora_fin)
+            FROM reservacion_periodica
+        """)
+        filas_regla = {
+            (id_rg, salon, periodo, dia, int(ini), int(fin))
+            for id_rg, salon, periodo, dia, ini, fin in cursor.fetchall()
+        }
+
+        cursor.execute(
+            "SELECT id_regla, fecha FROM reservacion_periodica_excepcion WHERE fecha >= %s", (desde,)
+        )
+        excepciones = {tuple(row) for row in cursor.fetchall()}
+
+    return _Instantanea(periodos, salones, filas_horario, filas_reservacion, filas_regla, excepciones, desde)
+
+
+class MotorConflictos:
+    """
+    Ocupación de salones en memoria, compartida por todas las sesiones.
+
+    Se carga la primera vez que se usa y se vuelve a cargar después de cualquier
+    invalidar() de horarios, salones o periodos, o al vencer MOTOR_TTL. Las
+    reservaciones de este proceso se aplican como cambios puntuales. Los
+    métodos regresan None cuando no pueden responder (BD caída o fecha
+    anterior a la carga); quien llama debe ir entonces a la BD.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._instantanea: _Instantanea | None = None
+        self._desactualizado = True
+
+    def marcar_desactualizado(self):
+        self._desactualizado = True
+
+    def _vigente(self, inst: _Instantanea | None) -> bool:
+        return (
+            inst is not None
+            and not self._desactualizado
+            and inst.desde == date.today()
+            and _time.monotonic() - inst.cargada_en < self.ttl
+        )
+
+    def recargar(self) -> _Instantanea | None:
+        with self._lock:
+            # Otra sesión pudo recargar mientras se esperaba el lock
+            if self._vigente(self._instantanea):
+                return self._instantanea
+            self._desactualizado = False
+            try:
+                self._instantanea = _cargar(date.today())
+            except mysql.connector.Error as err:
+                print("❌ Error al cargar el motor de conflictos:", err)
+                self._desactualizado = True
+                return None
+            return self._instantanea
+
+    def _actual(self) -> _Instantanea | None:
+        inst = self._instantanea
+        if self._vigente(inst):
+            return inst
+        return self.recargar()
+
+    def _aplicar(self, cambio):
+        """
+        Aplica cambio(instantanea) con el lock: si hay una recarga en curso se
+        espera a que termine y el cambio se aplica sobre la carga nueva (los
+        métodos ignoran filas que ya están). Sin carga no hay nada que cambiar.
+        """
+        with self._lock:
+            if self._instantanea is not None:
+                cambio(self._instantanea)
+
+    def agregar_reservacion(self, id_reservacion: int, id_salon: str, fecha: date, hora_inicio: time, duracion_min: int):
+        inicio = _segundos(hora_inicio)
+        fila = (id_reservacion, id_salon, fecha, inicio, inicio + duracion_min * 60)
+        self._aplicar(lambda inst: inst.agregar_reservacion(fila))
+
+    def quitar_reservaciones(self, ids: list[int]):
+        self._aplicar(lambda inst: inst.quitar_reservaciones(ids))
+
+    def agregar_regla(
+        self, id_regla: int, id_salon: str, id_periodo: str, dia_semana: str,
+        hora_inicio: time, duracion_min: int, excepciones: list[date] = ()
+    ):
+        inicio = _segundos(hora_inicio)
+        fila = (id_regla, id_salon, id_periodo, dia_semana, inicio, inicio + duracion_min * 60)
+
+        def cambio(inst):
+            inst.agregar_regla(fila)
+            inst.agregar_excepciones([(id_regla, f) for f in excepciones])
+        self._aplicar(cambio)
+
+    def quitar_reglas(self, ids: list[int]):
+        self._aplicar(lambda inst: inst.quitar_reglas(ids))
+
+    def agregar_excepciones(self, excepciones: list[tuple[int, date]]):
+        self._aplicar(lambda inst: inst.agregar_excepciones(excepciones))
+
+    def esta_libre(self, id_salon: str, fecha: date, hora_inicio: time, duracion_min: int) -> bool | None:
+        inst = self._actual()
+        if inst is None or fecha < inst.desde:
+            return None
+        inicio = _segundos(hora_inicio)
+        return not inst.ocupado(id_salon, fecha, inst.periodos_de(fecha), inicio, inicio + duracion_min * 60)
+
+    def salones_libres(self, fecha: date, hora_inicio: time, duracion_min: int) -> list[str] | None:
+        resultado = self.salones_libres_lote([(fecha, hora_inicio, duracion_min)])
+        return None if resultado is None else resultado[0]
+
+    def salones_libres_lote(self, consultas: list[tuple[date, time, int]]) -> list[list[str]] | None:
+        """
+        Para cada (fecha, hora_inicio, duracion_min) regresa los salones libres,
+        todo sobre la misma carga para que las respuestas sean consistentes entre sí.
+        """
+        inst = self._actual()
+        if inst is None or any(fecha < inst.desde for fecha, _, _ in consultas):
+            return None
+        resultado = []
+        for fecha, hora_inicio, duracion_min in consultas:
+            periodos = inst.periodos_de(fecha)
+            inicio = _segundos(hora_inicio)
+            fin = inicio + duracion_min * 60
+            resultado.append([s for s in inst.salones if not inst.ocupado(s, fecha, periodos, inicio, fin)])
+        return resultado
+
+    def fechas_en_conflicto(self, id_salon: str, fechas: list[date], hora_inicio: time, duracion_min: int) -> list[date] | None:
+        inst = self._actual()
+        if inst is None or any(fecha < inst.desde for fecha in fechas):
+            return None
+        inicio = _segundos(hora_inicio)
+        fin = inicio + duracion_min * 60
+        return [f for f in fechas if inst.ocupado(id_salon, f, inst.periodos_de(f), inicio, fin)]
+
+    def reconciliar(self) -> dict | None:
+        """
+        Compara la carga en memoria contra la BD y se queda con la de la BD.
+        Regresa cuántas filas sobraban o faltaban en memoria; si todo es 0 el
+        motor estaba al día.
+        """
+        anterior = self._instantanea
+        with self._lock:
+            try:
+                nueva = _cargar(date.today())
+            except mysql.connector.Error as err:
+                print("❌ Error al reconciliar el motor de conflictos:", err)
+                return None
+            self._instantanea = nueva
+            self._desactualizado = False
+
+        if anterior is None:
+            filas_h, filas_r, filas_rg, excepciones = set(), set(), set(), set()
+        else:
+            filas_h = anterior.filas_horario
+            filas_r = {f for f in anterior.filas_reservacion if f[2] >= nueva.desde}
+            filas_rg = anterior.filas_regla
+            excepciones = {e for e in anterior.excepciones if e[1] >= nueva.desde}
+
+        diferencias = {
+            "horarios_faltantes": len(nueva.filas_horario - filas_h),
+            "horarios_sobrantes": len(filas_h - nueva.filas_horario),
+            "reservaciones_faltantes": len(nueva.filas_reservacion - filas_r),
+            "reservaciones_sobrantes": len(filas_r - nueva.filas_reservacion),
+            "periodicas_faltantes": len(nueva.filas_regla - filas_rg),
+            "periodicas_sobrantes": len(filas_rg - nueva.filas_regla),
+            "excepciones_faltantes": len(nueva.excepciones - excepciones),
+            "excepciones_sobrantes": len(excepciones - nueva.excepciones),
+        }
+        diferencias["consistente"] = not any(diferencias.values())
+        return diferencias
+
+
+motor_conflictos = MotorConflictos(MOTOR_TTL)
+
+
+@al_invalidar
+def _al_escribir(etiquetas: tuple):
+    if _ETIQUETAS.intersection(etiquetas):
+        motor_conflictos.marcar_desactualizado()
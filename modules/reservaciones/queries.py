@@ -1,198 +1,523 @@
 # ⚠️ ACID Logic: create_secure_reservation()
+import numpy as np
 import pandas as pd
-from config.db import get_connection
+from config.db import get_connection, respaldo_solo_lectura
+from config.cache import cacheado
 import mysql.connector
-from datetime import date, time
+from datetime import date, time, timedelta
+from utils.time_helpers import hora_a_str, calcular_hora_fin
+from utils.sql_helpers import condicion_keyset, dividir_pagina, tabla_de_valores, marcadores
+from utils.period_helpers import fechas_del_dia_semana
+from modules.periodos import tabla_periodos
+from modules.salones.queries import obtener_catalogo_salones
+from modules.salones.analytics import INICIO_JORNADA, MINUTOS_FRANJA, FRANJAS
 
-def obtener_disponibilidad_salones(fecha: date, hora_inicio: time, duracion_min: int) -> pd.DataFrame:
+# Filas por página en los listados paginados
+TAMANO_PAGINA = 50
+
+def obtener_disponibilidad_salones(
+    fecha: date,
+    hora_inicio: time,
+    duracion_min: int,
+    id_periodo: str = None
+) -> pd.DataFrame:
     """
     Returns available classrooms by checking against both:
     1. Recurring class schedules (Horario) active during the period of the given date.
     2. One-time reservations (Reservacion) on the specific date.
+    id_periodo is the period containing `fecha`; if omitted it is resolved
+    with tabla_periodos.
     """
+    if id_periodo is None:
+        id_periodo = tabla_periodos.periodo_de(fecha)
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # 1. Helper: Map Python weekday (0=Monday) to DB Enum ('Lunes', etc.)
-        dias_semana = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
-        dia_nombre = dias_semana[fecha.weekday()]
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            # 1. Helper: Map Python weekday (0=Monday) to DB Enum ('Lunes', etc.)
+            dias_semana = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+            dia_nombre = dias_semana[fecha.weekday()]
         
-        hora_str = hora_inicio.strftime("%H:%M:%S")
-
-        # Logic: 
-        # Exclude salons where (StartRequested < EndExisting) AND (StartExisting < EndRequested)
-        # For Horario: We also check if 'fecha' is within the Period range (fecha_inicio, fecha_fin).
-
-        query = """
-            SELECT 
-                s.id_salon,
-                s.tipo,
-                s.capacidad
-            FROM salon s
-            WHERE s.id_salon NOT IN (
-                -- Check Recurring Classes (Horario)
-                SELECT h.id_salon
-                FROM horario h
-                JOIN periodo p ON h.id_periodo = p.id_periodo
-                WHERE h.dia_semana = %s
-                  AND %s BETWEEN p.fecha_inicio AND p.fecha_fin
-                  -- Overlap check:
-                  AND h.hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-                  AND %s < ADDTIME(h.hora_inicio, SEC_TO_TIME(h.duracion_minutos * 60))
+            hora_str = hora_a_str(hora_inicio)
+            hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
+
+            # Logic: 
+            # Exclude salons where (StartExisting < EndRequested) AND (EndExisting > StartRequested)
+            # EndExisting is the stored hora_fin column, so both checks are index range scans.
+            # For Horario: only classes of the period that contains 'fecha' (already resolved,
+            # so no JOIN with periodo). With no period, h.id_periodo = NULL matches nothing.
+
+            query = """
+                SELECT 
+                    s.id_salon,
+                    s.tipo,
+                    s.capacidad
+                FROM salon s
+                WHERE s.id_salon NOT IN (
+                    -- Check Recurring Classes (Horario)
+                    SELECT h.id_salon
+                    FROM horario h
+                    WHERE h.id_periodo = %s
+                      AND h.dia_semana = %s
+                      -- Overlap check:
+                      AND h.hora_inicio < %s
+                      AND h.hora_fin > %s
                 
-                UNION
+                    UNION
                 
-                -- Check One-time Reservations (Reservacion)
-                SELECT r.id_salon
-                FROM reservacion r
-                WHERE r.fecha = %s
-                  -- Overlap check:
-                  AND r.hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-                  AND %s < ADDTIME(r.hora_inicio, SEC_TO_TIME(r.duracion_minutos * 60))
+                    -- Check One-time Reservations (Reservacion)
+                    SELECT r.id_salon
+                    FROM reservacion r
+                    WHERE r.fecha = %s
+                      -- Overlap check:
+                      AND r.hora_inicio < %s
+                      AND r.hora_fin > %s
+
+                    UNION
+
+                    -- Check Recurring Reservations, like a Horario, unless this date was cancelled
+                    SELECT rp.id_salon
+                    FROM reservacion_periodica rp
+                    WHERE rp.id_periodo = %s
+                      AND rp.dia_semana = %s
+                      AND rp.hora_inicio < %s
+                      AND rp.hora_fin > %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM reservacion_periodica_excepcion e
+                          WHERE e.id_regla = rp.id_regla AND e.fecha = %s
+                      )
+                )
+                ORDER BY s.id_salon;
+            """
+
+            # Params must match the %s order exactly:
+            # Part 1 (Horario): id_periodo, dia_nombre, hora_fin_str, hora_str
+            # Part 2 (Reservacion): fecha, hora_fin_str, hora_str
+            # Part 3 (Reservacion periodica): id_periodo, dia_nombre, hora_fin_str, hora_str, fecha
+            params = (
+                id_periodo, dia_nombre, hora_fin_str, hora_str,
+                fecha, hora_fin_str, hora_str,
+                id_periodo, dia_nombre, hora_fin_str, hora_str, fecha
             )
-            ORDER BY s.id_salon;
-        """
-
-        # Params must match the %s order exactly:
-        # Part 1 (Horario): dia_nombre, fecha, hora_str, duracion_min, hora_str
-        # Part 2 (Reservacion): fecha, hora_str, duracion_min, hora_str
-        params = (
-            dia_nombre, fecha, hora_str, duracion_min, hora_str,
-            fecha, hora_str, duracion_min, hora_str
-        )
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
 
-        return pd.DataFrame(rows)
+            return pd.DataFrame(rows)
 
     except mysql.connector.Error as err:
         print("❌ Error SQL:", err)
         return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
 
 
-def obtener_ocupacion_salon(id_salon: str) -> pd.DataFrame:
+def obtener_disponibilidad_salones_lote(
+    franjas: list[tuple[date, time, int]]
+) -> pd.DataFrame:
     """
-    Obtiene la ocupación de un salón en un día específico.
+    Versión por lotes de obtener_disponibilidad_salones: una sola consulta
+    para muchas franjas (fecha, hora_inicio, duracion_min), ej. todas las
+    medias horas de un día.
+
+    Las franjas viajan como tabla derivada con su periodo y día ya resueltos,
+    y la consulta regresa solo los pares (franja, salón) ocupados. Regresa una
+    matriz booleana franja × salón (True = libre) con índice
+    (fecha, hora_inicio, duracion_min) en el orden recibido y una columna por
+    salón del catálogo. Vacía si hubo error de BD.
     """
+    if not franjas:
+        return pd.DataFrame()
+    dias_semana = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+    filas = [
+        (i, fecha, tabla_periodos.periodo_de(fecha), dias_semana[fecha.weekday()],
+         hora_a_str(hora_inicio), calcular_hora_fin(hora_inicio, duracion_min))
+        for i, (fecha, hora_inicio, duracion_min) in enumerate(franjas)
+    ]
+    franjas_sql, franjas_params = tabla_de_valores(
+        [("franja", "SIGNED"), ("fecha", "DATE"), ("id_periodo", None),
+         ("dia_semana", None), ("hora_inicio", "TIME"), ("hora_fin", "TIME")],
+        filas
+    )
+
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Fixed column names (camelCase -> snake_case) and JOIN logic
-        query = """
-            SELECT 
-                s.id_salon,
-                s.tipo,
-                s.capacidad,
-                h.id_horario,
-                h.hora_inicio,
-                h.duracion_minutos,
-                h.dia_semana,
-                m.titulo AS materia,
-                c.clave_materia AS curso_clave,
-                c.seccion AS seccion,
-                c.profesor,
-                p.id_periodo,
-                p.fecha_inicio,
-                p.fecha_fin
-            FROM horario h
-            JOIN salon s         ON h.id_salon = s.id_salon
-            JOIN curso c         ON h.clave_materia = c.clave_materia
-                                 AND h.seccion_curso = c.seccion
-                                 AND h.id_periodo = c.id_periodo
-            JOIN materia m       ON m.clave = c.clave_materia
-            JOIN periodo p       ON p.id_periodo = c.id_periodo
-            WHERE s.id_salon = %s
-            ORDER BY h.dia_semana, h.hora_inicio;
-        """
-
-        cursor.execute(query, (id_salon,))
-        rows = cursor.fetchall()
-
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor() as cursor:
+            # Mismas tres fuentes que obtener_disponibilidad_salones, unidas a
+            # las franjas en lugar de filtrar por una sola fecha y hora.
+            # Sin periodo (id_periodo NULL) no hay clases ni reglas que choquen.
+            query = f"""
+                WITH franjas AS ({franjas_sql})
+                SELECT f.franja, h.id_salon
+                FROM franjas f
+                JOIN horario h
+                    ON h.id_periodo = f.id_periodo
+                   AND h.dia_semana = f.dia_semana
+                   AND h.hora_inicio < f.hora_fin
+                   AND h.hora_fin > f.hora_inicio
+
+                UNION
+
+                SELECT f.franja, r.id_salon
+                FROM franjas f
+                JOIN reservacion r
+                    ON r.fecha = f.fecha
+                   AND r.hora_inicio < f.hora_fin
+                   AND r.hora_fin > f.hora_inicio
+
+                UNION
+
+                SELECT f.franja, rp.id_salon
+                FROM franjas f
+                JOIN reservacion_periodica rp
+                    ON rp.id_periodo = f.id_periodo
+                   AND rp.dia_semana = f.dia_semana
+                   AND rp.hora_inicio < f.hora_fin
+                   AND rp.hora_fin > f.hora_inicio
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM reservacion_periodica_excepcion e
+                    WHERE e.id_regla = rp.id_regla AND e.fecha = f.fecha
+                );
+            """
+
+            cursor.execute(query, franjas_params)
+            ocupados = cursor.fetchall()
 
     except mysql.connector.Error as err:
         print("❌ Error SQL:", err)
         return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
+
+    # Salones del catálogo en caché: la disponibilidad cuesta una sola consulta
+    catalogo = obtener_catalogo_salones()
+    salones = catalogo["id_salon"].tolist() if not catalogo.empty else []
+    posicion = {id_salon: j for j, id_salon in enumerate(salones)}
+    libres = np.ones((len(franjas), len(salones)), dtype=bool)
+    for franja, id_salon in ocupados:
+        if id_salon in posicion:
+            libres[franja, posicion[id_salon]] = False
+    return pd.DataFrame(
+        libres,
+        index=pd.MultiIndex.from_tuples(franjas, names=["fecha", "hora_inicio", "duracion_min"]),
+        columns=pd.Index(salones, name="id_salon"),
+    )
+
+
+def obtener_salones_libres_patron(
+    id_periodo: str,
+    dia_semana: str,
+    hora_inicio: time,
+    duracion_min: int,
+    max_conflictos: int = 0
+) -> pd.DataFrame:
+    """
+    Salones libres en todas las fechas de un patrón semanal (día + hora en un
+    periodo), o en todas salvo `max_conflictos` de ellas, en una sola consulta.
+
+    Se arman los pares (salón, fecha) que chocan con una clase, una reservación
+    o una reservación periódica no cancelada esa fecha, y se cuentan por salón.
+    Columnas: id_salon, tipo, capacidad, conflictos, fechas_conflicto (lista de
+    fechas). Ordenado por menos conflictos y luego menor capacidad.
+    """
+    columnas = ["id_salon", "tipo", "capacidad", "conflictos", "fechas_conflicto"]
+    rango = tabla_periodos.rango(id_periodo)
+    dias_semana = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+    if rango is None or dia_semana not in dias_semana:
+        return pd.DataFrame(columns=columnas)
+    fechas = fechas_del_dia_semana(*rango, dias_semana.index(dia_semana))
+    if not fechas:
+        return pd.DataFrame(columns=columnas)
+
+    hora_str = hora_a_str(hora_inicio)
+    hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
+    fechas_sql, fechas_params = tabla_de_valores([("fecha", "DATE")], [(f,) for f in fechas])
+
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            # Clases y reglas chocan en todas las fechas del patrón (menos las
+            # canceladas de la regla); las reservaciones solo en su fecha.
+            # UNION quita los pares repetidos para contar cada fecha una vez.
+            query = f"""
+                WITH fechas AS ({fechas_sql})
+                SELECT
+                    s.id_salon,
+                    s.tipo,
+                    s.capacidad,
+                    COUNT(c.fecha) AS conflictos,
+                    GROUP_CONCAT(c.fecha ORDER BY c.fecha) AS fechas_conflicto
+                FROM salon s
+                LEFT JOIN (
+                    SELECT h.id_salon, f.fecha
+                    FROM horario h
+                    CROSS JOIN fechas f
+                    WHERE h.id_periodo = %s
+                      AND h.dia_semana = %s
+                      -- usa idx_horario_periodo_slot
+                      AND h.hora_inicio < %s
+                      AND h.hora_fin > %s
+
+                    UNION
+
+                    SELECT r.id_salon, r.fecha
+                    FROM reservacion r
+                    JOIN fechas f ON r.fecha = f.fecha
+                    -- usa idx_reservacion_fecha_slot
+                    WHERE r.hora_inicio < %s
+                      AND r.hora_fin > %s
+
+                    UNION
+
+                    SELECT rp.id_salon, f.fecha
+                    FROM reservacion_periodica rp
+                    CROSS JOIN fechas f
+                    WHERE rp.id_periodo = %s
+                      AND rp.dia_semana = %s
+                      -- usa idx_regla_periodo_slot
+                      AND rp.hora_inicio < %s
+                      AND rp.hora_fin > %s
+                      AND NOT EXISTS (
+                          SELECT 1 FROM reservacion_periodica_excepcion e
+                          WHERE e.id_regla = rp.id_regla AND e.fecha = f.fecha
+                      )
+                ) AS c ON c.id_salon = s.id_salon
+                GROUP BY s.id_salon, s.tipo, s.capacidad
+                HAVING COUNT(c.fecha) <= %s
+                ORDER BY conflictos, s.capacidad, s.id_salon;
+            """
+            params = fechas_params + [
+                id_periodo, dia_semana, hora_fin_str, hora_str,
+                hora_fin_str, hora_str,
+                id_periodo, dia_semana, hora_fin_str, hora_str,
+                max_conflictos,
+            ]
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+    except mysql.connector.Error as err:
+        print("❌ Error SQL:", err)
+        return pd.DataFrame(columns=columnas)
+
+    for row in rows:
+        texto = row["fechas_conflicto"]
+        row["fechas_conflicto"] = [date.fromisoformat(f) for f in texto.split(",")] if texto else []
+    return pd.DataFrame(rows, columns=columnas)
+
+
+@cacheado("horarios", "reservaciones", "salones", "periodos")
+def obtener_ocupacion_salon(id_salon: str, inicio_semana: date) -> pd.DataFrame:
+    """
+    Cuadrícula de una semana de un salón: una fila por franja de
+    MINUTOS_FRANJA (FRANJAS) y una columna por día de Lunes a Domingo
+    ("Lunes 15/01"). Cada celda dice qué la ocupa ("📘 clave-sección materia",
+    "📌 motivo" o "🔁 motivo" para una reservación periódica) o queda vacía.
+
+    Solo se leen las clases y series de los periodos que tocan la semana, y
+    en cada fecha solo las de su periodo; las reservaciones, solo las de la
+    semana. inicio_semana puede ser cualquier día: se usa el lunes de esa
+    semana. Vacía si hubo error de BD.
+    """
+    lunes = inicio_semana - timedelta(days=inicio_semana.weekday())
+    fechas = [lunes + timedelta(days=i) for i in range(7)]
+    domingo = fechas[-1]
+    dias_semana = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
+    periodo_de_fecha = [tabla_periodos.periodo_de(f) for f in fechas]
+    periodos = sorted({p for p in periodo_de_fecha if p is not None})
+
+    horarios, reglas = [], []
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            if periodos:
+                # usa idx_horario_salon_slot
+                cursor.execute(f"""
+                    SELECT h.id_periodo, CAST(h.dia_semana AS CHAR),
+                           TIME_TO_SEC(h.hora_inicio) DIV 60, TIME_TO_SEC(h.hora_fin) DIV 60,
+                           CONCAT('📘 ', h.clave_materia, '-', h.seccion_curso, ' ', m.titulo)
+                    FROM horario h
+                    JOIN materia m ON m.clave = h.clave_materia
+                    WHERE h.id_salon = %s
+                      AND h.id_periodo IN ({marcadores(periodos)})
+                """, [id_salon] + periodos)
+                horarios = cursor.fetchall()
+
+                # Series con sus fechas canceladas dentro de la semana
+                cursor.execute(f"""
+                    SELECT rp.id_periodo, CAST(rp.dia_semana AS CHAR),
+                           TIME_TO_SEC(rp.hora_inicio) DIV 60, TIME_TO_SEC(rp.hora_fin) DIV 60,
+                           CONCAT('🔁 ', COALESCE(rp.motivo, 'Reservación periódica')),
+                           GROUP_CONCAT(e.fecha)
+                    FROM reservacion_periodica rp
+                    LEFT JOIN reservacion_periodica_excepcion e
+                        ON e.id_regla = rp.id_regla
+                       AND e.fecha BETWEEN %s AND %s
+                    WHERE rp.id_salon = %s
+                      AND rp.id_periodo IN ({marcadores(periodos)})
+                    GROUP BY rp.id_regla
+                """, [lunes, domingo, id_salon] + periodos)
+                reglas = cursor.fetchall()
+
+            # usa idx_reservacion_salon_slot
+            cursor.execute("""
+                SELECT fecha,
+                       TIME_TO_SEC(hora_inicio) DIV 60, TIME_TO_SEC(hora_fin) DIV 60,
+                       CONCAT('📌 ', COALESCE(motivo, 'Reservación'))
+                FROM reservacion
+                WHERE id_salon = %s
+                  AND fecha BETWEEN %s AND %s
+            """, (id_salon, lunes, domingo))
+            reservaciones = cursor.fetchall()
+
+    except mysql.connector.Error as err:
+        print("❌ Error SQL:", err)
+        return pd.DataFrame()
+
+    # (día 0-6, minuto inicial, minuto final, etiqueta) de toda la semana
+    eventos = [(fecha.weekday(), ini, fin, etiqueta) for fecha, ini, fin, etiqueta in reservaciones]
+    for d, (fecha, id_periodo) in enumerate(zip(fechas, periodo_de_fecha)):
+        eventos += [
+            (d, ini, fin, etiqueta)
+            for periodo, dia, ini, fin, etiqueta in horarios
+            if periodo == id_periodo and dia == dias_semana[d]
+        ]
+        eventos += [
+            (d, ini, fin, etiqueta)
+            for periodo, dia, ini, fin, etiqueta, canceladas in reglas
+            if periodo == id_periodo and dia == dias_semana[d]
+            and str(fecha) not in (canceladas or "").split(",")
+        ]
+
+    celdas = [[""] * 7 for _ in FRANJAS]
+    for d, ini, fin, etiqueta in eventos:
+        # Franjas que el evento toca, aunque sea en parte
+        primera = max((ini - INICIO_JORNADA) // MINUTOS_FRANJA, 0)
+        ultima = min((fin - INICIO_JORNADA - 1) // MINUTOS_FRANJA, len(FRANJAS) - 1)
+        for f in range(primera, ultima + 1):
+            celdas[f][d] = f"{celdas[f][d]} / {etiqueta}" if celdas[f][d] else etiqueta
+
+    return pd.DataFrame(
+        celdas,
+        index=pd.Index(FRANJAS, name="franja"),
+        columns=[f"{dias_semana[d]} {fecha:%d/%m}" for d, fecha in enumerate(fechas)],
+    )
+
 
 def obtener_mis_reservaciones(id_usuario: str) -> pd.DataFrame:
     """
     Obtiene las reservaciones de un usuario.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Fixed table/column names and JOIN condition
-        query = """
-            SELECT 
-                r.id_reservacion,
-                r.id_periodo,
-                r.id_salon,
-                r.fecha,
-                r.hora_inicio,
-                r.duracion_minutos,
-                r.motivo,
-                u.nombre AS usuario
-            FROM reservacion r
-            JOIN usuario u ON r.id_usuario = u.id_usuario
-            WHERE r.id_usuario = %s
-            ORDER BY r.fecha DESC;
-        """
-
-        cursor.execute(query, (id_usuario,))
-        rows = cursor.fetchall()
-
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            # Fixed table/column names and JOIN condition
+            query = """
+                SELECT 
+                    r.id_reservacion,
+                    r.id_periodo,
+                    r.id_salon,
+                    r.fecha,
+                    r.hora_inicio,
+                    r.duracion_minutos,
+                    r.motivo,
+                    u.nombre AS usuario
+                FROM reservacion r
+                JOIN usuario u ON r.id_usuario = u.id_usuario
+                WHERE r.id_usuario = %s
+                ORDER BY r.fecha DESC, r.id_reservacion DESC;
+            """
+
+            cursor.execute(query, (id_usuario,))
+            rows = cursor.fetchall()
+
+            return pd.DataFrame(rows)
+
+    except mysql.connector.Error as err:
+        print("❌ Error SQL:", err)
+        return pd.DataFrame()
+
+def obtener_mis_reservaciones_pagina(
+    id_usuario: str,
+    despues_de: tuple | None = None,
+    tamano: int = TAMANO_PAGINA,
+) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Una página de obtener_mis_reservaciones (más recientes primero) con
+    paginación por llave sobre (fecha, id_reservacion); usa
+    idx_reservacion_usuario_fecha. Regresa (página, llave siguiente).
+    """
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT 
+                    r.id_reservacion,
+                    r.id_periodo,
+                    r.id_salon,
+                    r.fecha,
+                    r.hora_inicio,
+                    r.duracion_minutos,
+                    r.motivo,
+                    u.nombre AS usuario
+                FROM reservacion r
+                JOIN usuario u ON r.id_usuario = u.id_usuario
+                WHERE r.id_usuario = %s
+            """
+            params = [id_usuario]
+            if despues_de:
+                condicion, params_keyset = condicion_keyset(["r.fecha", "r.id_reservacion"], despues_de, descendente=True)
+                query += f" AND {condicion}"
+                params += params_keyset
+            query += " ORDER BY r.fecha DESC, r.id_reservacion DESC LIMIT %s;"
+            params.append(tamano + 1)
+
+            cursor.execute(query, params)
+            pagina, siguiente = dividir_pagina(cursor.fetchall(), ["fecha", "id_reservacion"], tamano)
+            return pd.DataFrame(pagina), siguiente
+
+    except mysql.connector.Error as err:
+        print("❌ Error SQL:", err)
+        return pd.DataFrame(), None
+
+def obtener_mis_reservaciones_periodicas(id_usuario: str) -> pd.DataFrame:
+    """
+    Series periódicas de un usuario (una fila por serie) con sus fechas
+    canceladas como lista.
+    """
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT
+                    rp.id_regla,
+                    rp.id_periodo,
+                    rp.id_salon,
+                    rp.dia_semana,
+                    rp.hora_inicio,
+                    rp.duracion_minutos,
+                    rp.motivo,
+                    GROUP_CONCAT(e.fecha ORDER BY e.fecha SEPARATOR ', ') AS fechas_canceladas
+                FROM reservacion_periodica rp
+                LEFT JOIN reservacion_periodica_excepcion e ON e.id_regla = rp.id_regla
+                WHERE rp.id_usuario = %s
+                GROUP BY rp.id_regla
+                ORDER BY rp.id_periodo DESC, rp.dia_semana, rp.hora_inicio;
+            """
+
+            cursor.execute(query, (id_usuario,))
+            return pd.DataFrame(cursor.fetchall())
 
     except mysql.connector.Error as err:
         print("❌ Error SQL:", err)
         return pd.DataFrame()
-    finally:
-        if cursor:
-            cursor.close()
 
+@cacheado("periodos")
+@respaldo_solo_lectura
 def obtener_periodos() -> list[str]:
     """
     Retorna lista de IDs de periodos.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id_periodo FROM periodo ORDER BY fecha_inicio DESC")
-        # return list of strings
-        return [row[0] for row in cursor.fetchall()]
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT id_periodo FROM periodo ORDER BY fecha_inicio DESC")
+            # return list of strings
+            return [row[0] for row in cursor.fetchall()]
     except Exception as e:
         print("Error fetching periods:", e)
         return []
-    finally:
-        if cursor:
-            cursor.close()
 
 def obtener_periodo_activo(fecha: date) -> str:
     """
     Retorna el id_periodo que cubre la fecha dada, o None si no hay.
+    Se resuelve en memoria (tabla_periodos), sin ir a la BD.
     """
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        query = "SELECT id_periodo FROM periodo WHERE %s BETWEEN fecha_inicio AND fecha_fin LIMIT 1"
-        cursor.execute(query, (fecha,))
-        row = cursor.fetchone()
-        if row:
-            return row[0]
-        return None
-    except Exception as e:
-        print("Error fetching active period:", e)
-        return None
-    finally:
-        if cursor:
-            cursor.close()
+    return tabla_periodos.periodo_de(fecha)
@@ -0,0 +1,127 @@
+"""
+Recomendación de salones para una reservación.
+
+En lugar de listar todos los salones libres por id, ordena los que alcanzan
+el cupo pedido de menor a mayor capacidad (el que mejor se ajusta primero),
+para no ocupar un auditorio con una junta de diez personas. Si ninguno
+alcanza, sugiere las horas de inicio más cercanas en las que sí hay uno.
+"""
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+from config.cache import cacheado
+from modules.salones.queries import obtener_catalogo_salones
+from .conflict_engine import motor_conflictos
+from .queries import obtener_disponibilidad_salones_lote
+
+# Horas en que se sugieren alternativas y qué tan lejos de la pedida
+INICIO_JORNADA = time(7, 0)
+FIN_JORNADA = time(22, 0)
+PASO_ALTERNATIVAS_MIN = 30
+MAX_DESFASE_MIN = 180
+
+COLUMNAS = ["id_salon", "tipo", "capacidad", "lugares_sobrantes"]
+
+
+class IndiceCapacidad:
+    """
+    Salones ordenados por capacidad, uno por tipo y otro con todos (tipo None).
+    bisect encuentra el primero con cupo suficiente y de ahí se avanza solo
+    hasta juntar `limite` salones libres.
+    """
+
+    def __init__(self, catalogo: list[tuple[str, int, str]]):
+        self._por_tipo: dict[str | None, tuple[list[int], list[tuple]]] = {}
+        for tipo in {None} | {t for _, _, t in catalogo}:
+            filas = sorted(
+                (f for f in catalogo if tipo is None or f[2] == tipo),
+                key=lambda f: (f[1], f[0]),
+            )
+            self._por_tipo[tipo] = ([f[1] for f in filas], filas)
+
+    def mejores(self, libres: set[str], asistentes: int, tipo: str | None = None, limite: int = 5) -> list[tuple]:
+        """[(id_salon, capacidad, tipo)] libres con capacidad >= asistentes, la menor primero."""
+        capacidades, filas = self._por_tipo.get(tipo, ([], []))
+        resultado = []
+        for fila in filas[bisect_left(capacidades, asistentes):]:
+            if fila[0] in libres:
+                resultado.append(fila)
+                if len(resultado) == limite:
+                    break
+        return resultado
+
+
+@cacheado("salones")
+def _indice_capacidad() -> IndiceCapacidad:
+    df = obtener_catalogo_salones()
+    if df.empty:
+        return IndiceCapacidad([])
+    return IndiceCapacidad(list(df[["id_salon", "capacidad", "tipo"]].itertuples(index=False, name=None)))
+
+
+def _horas_alternativas(hora_inicio: time, duracion_min: int) -> list[time]:
+    """Inicios a ±30, ±60, ... minutos de la hora pedida dentro de la jornada, el más cercano primero."""
+    base = datetime.combine(date.min, hora_inicio)
+    primero = datetime.combine(date.min, INICIO_JORNADA)
+    ultimo = datetime.combine(date.min, FIN_JORNADA) - timedelta(minutes=duracion_min)
+    horas = []
+    for desfase in range(PASO_ALTERNATIVAS_MIN, MAX_DESFASE_MIN + 1, PASO_ALTERNATIVAS_MIN):
+        for signo in (-1, 1):
+            candidata = base + timedelta(minutes=signo * desfase)
+            if primero <= candidata <= ultimo and candidata.date() == date.min:
+                horas.append(candidata.time())
+    return horas
+
+
+def _a_dataframe(filas: list[tuple], asistentes: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(id_salon, tipo, capacidad, capacidad - asistentes) for id_salon, capacidad, tipo in filas],
+        columns=COLUMNAS,
+    )
+
+
+def recomendar_salones(
+    fecha: date,
+    hora_inicio: time,
+    duracion_min: int,
+    asistentes: int,
+    tipo: str | None = None,
+    limite: int = 5,
+    max_alternativas: int = 3,
+) -> tuple[pd.DataFrame, list[tuple[time, pd.DataFrame]]]:
+    """
+    Salones libres con cupo para `asistentes` (y del `tipo`, si se da),
+    ordenados por menor capacidad suficiente.
+
+    Regresa (recomendados, alternativas). Solo si no hay recomendados,
+    alternativas trae hasta `max_alternativas` pares (hora_inicio, salones)
+    con las horas más cercanas en que sí hay salón adecuado.
+    """
+    indice = _indice_capacidad()
+    horas = [hora_inicio] + _horas_alternativas(hora_inicio, duracion_min)
+
+    # El motor de conflictos resuelve todas las horas en una sola pasada; si no
+    # responde, la BD también, con una sola consulta por lotes.
+    consultas = [(fecha, h, duracion_min) for h in horas]
+    lote = motor_conflictos.salones_libres_lote(consultas)
+    if lote is None:
+        matriz = obtener_disponibilidad_salones_lote(consultas)
+        lote = [matriz.columns[fila].tolist() for fila in matriz.to_numpy()] if not matriz.empty else [[]] * len(horas)
+
+    def libres_en(i: int) -> set[str]:
+        return set(lote[i])
+
+    recomendados = indice.mejores(libres_en(0), asistentes, tipo, limite)
+    if recomendados:
+        return _a_dataframe(recomendados, asistentes), []
+
+    alternativas = []
+    for i in range(1, len(horas)):
+        filas = indice.mejores(libres_en(i), asistentes, tipo, limite)
+        if filas:
+            alternativas.append((horas[i], _a_dataframe(filas, asistentes)))
+            if len(alternativas) == max_alternativas:
+                break
+    return _a_dataframe([], asistentes), alternativas
@@ -1,34 +1,41 @@
 from config.db import get_connection
+from config.cache import invalidar
 import mysql.connector
 from datetime import date, time, timedelta, datetime
+from utils.time_helpers import hora_a_str, calcular_hora_fin
+from utils.period_helpers import fechas_del_dia_semana
+from utils.sql_helpers import tabla_de_valores, marcadores
+from modules.periodos import tabla_periodos
+from .conflict_engine import motor_conflictos
 
 # Mapeo de días para coincidir con la base de datos (ENUM en español)
 DIAS_SEMANA = ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado', 'Domingo']
 
-def _verificar_conflicto(cursor, id_salon: str, fecha: date, hora_inicio: time, duracion_min: int) -> bool:
+def _verificar_conflicto(cursor, id_salon: str, fecha: date, hora_inicio: time, duracion_min: int, id_periodo: str) -> bool:
     """
     Verifica si existe conflicto con Horarios (clases) o Reservaciones existentes.
+    id_periodo es el periodo que contiene la fecha.
     Retorna True si hay conflicto, False si está libre.
     """
-    hora_str = hora_inicio.strftime("%H:%M:%S")
+    hora_str = hora_a_str(hora_inicio)
+    hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
     dia_nombre = DIAS_SEMANA[fecha.weekday()]
 
     # 1. Verificar conflicto con Horarios (Clases recurrentes)
-    # Debemos verificar si la fecha cae dentro del periodo de la clase y coincide el día/hora.
+    # Solo las clases del periodo que contiene la fecha, en el mismo día/hora.
     sql_horario = """
         SELECT h.id_horario
         FROM horario h
-        JOIN periodo p ON h.id_periodo = p.id_periodo
         WHERE h.id_salon = %s
+          AND h.id_periodo = %s
           AND h.dia_semana = %s
-          AND %s BETWEEN p.fecha_inicio AND p.fecha_fin
-          -- Chequeo de traslape de horas
-          AND h.hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-          AND %s < ADDTIME(h.hora_inicio, SEC_TO_TIME(h.duracion_minutos * 60))
+          -- Chequeo de traslape de horas (usa idx_horario_salon_slot)
+          AND h.hora_inicio < %s
+          AND h.hora_fin > %s
         LIMIT 1;
     """
-    # Params: id_salon, dia_semana, fecha, hora_inicio_str, duracion_min, hora_inicio_str
-    cursor.execute(sql_horario, (id_salon, dia_nombre, fecha, hora_str, duracion_min, hora_str))
+    # Params: id_salon, id_periodo, dia_semana, hora_fin_str, hora_inicio_str
+    cursor.execute(sql_horario, (id_salon, id_periodo, dia_nombre, hora_fin_str, hora_str))
     if cursor.fetchone():
         return True
 
@@ -38,13 +45,34 @@ def _verificar_conflicto(cursor, id_salon: str, fecha: date, hora_inicio: time,
         FROM reservacion
         WHERE id_salon = %s
           AND fecha = %s
-          -- Chequeo de traslape
-          AND hora_inicio < ADDTIME(%s, SEC_TO_TIME(%s * 60))
-          AND %s < ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))
+          -- Chequeo de traslape (usa idx_reservacion_salon_slot)
+          AND hora_inicio < %s
+          AND hora_fin > %s
         LIMIT 1;
     """
-    # Params: id_salon, fecha, hora_inicio_str, duracion_min, hora_inicio_str
-    cursor.execute(sql_reservacion, (id_salon, fecha, hora_str, duracion_min, hora_str))
+    # Params: id_salon, fecha, hora_fin_str, hora_inicio_str
+    cursor.execute(sql_reservacion, (id_salon, fecha, hora_fin_str, hora_str))
+    if cursor.fetchone():
+        return True
+
+    # 3. Verificar conflicto con Reservaciones periódicas (como un horario, salvo fechas canceladas)
+    sql_regla = """
+        SELECT rp.id_regla
+        FROM reservacion_periodica rp
+        WHERE rp.id_salon = %s
+          AND rp.id_periodo = %s
+          AND rp.dia_semana = %s
+          -- Chequeo de traslape (usa idx_regla_salon_slot)
+          AND rp.hora_inicio < %s
+          AND rp.hora_fin > %s
+          AND NOT EXISTS (
+              SELECT 1 FROM reservacion_periodica_excepcion e
+              WHERE e.id_regla = rp.id_regla AND e.fecha = %s
+          )
+        LIMIT 1;
+    """
+    # Params: id_salon, id_periodo, dia_semana, hora_fin_str, hora_inicio_str, fecha
+    cursor.execute(sql_regla, (id_salon, id_periodo, dia_nombre, hora_fin_str, hora_str, fecha))
     if cursor.fetchone():
         return True
 
@@ -62,38 +90,103 @@ def crear_reservacion(
     """
     a) Registrar una reservación individual para una fecha y hora exacta.
        Verifica conflictos con reservaciones y horarios.
+       id_periodo debe ser el periodo que contiene la fecha; si no, se rechaza,
+       porque los horarios de otro periodo no se revisarían.
     """
-    conn = None
-    cursor = None
+
+    # El periodo sale de la fecha (tabla en memoria, sin consulta), no del llamador
+    periodo_fecha = tabla_periodos.periodo_de(fecha)
+    if periodo_fecha is None:
+        return False, "No hay un periodo académico que contenga esa fecha."
+    if periodo_fecha != id_periodo:
+        return False, f"La fecha {fecha} pertenece al periodo {periodo_fecha}, no a {id_periodo}."
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
-
-        # Verificar conflictos
-        if _verificar_conflicto(cursor, id_salon, fecha, hora_inicio, duracion_min):
-            conn.rollback()
-            return False, "El salón no está disponible en el horario seleccionado (conflicto con clase o reservación)."
-
-        # Insertar
-        hora_str = hora_inicio.strftime("%H:%M:%S")
-        insert_sql = """
-            INSERT INTO reservacion (id_usuario, id_salon, id_periodo, fecha, hora_inicio, duracion_minutos, motivo)
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
-        """
-        cursor.execute(insert_sql, (id_usuario, id_salon, id_periodo, fecha, hora_str, duracion_min, motivo))
-
-        conn.commit()
-        return True, "Reservación creada correctamente"
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+
+            # Verificar conflictos
+            if _verificar_conflicto(cursor, id_salon, fecha, hora_inicio, duracion_min, periodo_fecha):
+                conn.rollback()
+                return False, "El salón no está disponible en el horario seleccionado (conflicto con clase o reservación)."
+
+            # Insertar
+            hora_str = hora_inicio.strftime("%H:%M:%S")
+            insert_sql = """
+                INSERT INTO reservacion (id_usuario, id_salon, id_periodo, fecha, hora_inicio, duracion_minutos, motivo)
+                VALUES (%s, %s, %s, %s, %s, %s, %s);
+            """
+            cursor.execute(insert_sql, (id_usuario, id_salon, periodo_fecha, fecha, hora_str, duracion_min, motivo))
+            id_reservacion = cursor.lastrowid
+
+            conn.commit()
+            motor_conflictos.agregar_reservacion(id_reservacion, id_salon, fecha, hora_inicio, duracion_min)
+            invalidar("reservaciones")
+            return True, "Reservación creada correctamente"
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         return False, f"Error al crear la reservación: {err}"
-    finally:
-        if cursor:
-            cursor.close()
+
+def _fechas_en_conflicto(
+    cursor, id_salon: str, fechas: list[date], hora_inicio: time, duracion_min: int, id_periodo: str
+) -> list[date]:
+    """
+    Versión por lotes de _verificar_conflicto: revisa todas las fechas en una
+    sola consulta y regresa las que chocan con un Horario, una Reservación o
+    una Reservación periódica (salvo en sus fechas canceladas).
+    Todas las fechas deben caer en el mismo día de la semana y dentro de id_periodo.
+    """
+    hora_str = hora_a_str(hora_inicio)
+    hora_fin_str = calcular_hora_fin(hora_inicio, duracion_min)
+    dia_nombre = DIAS_SEMANA[fechas[0].weekday()]
+
+    fechas_sql, fechas_params = tabla_de_valores([("fecha", "DATE")], [(f,) for f in fechas])
+    sql = f"""
+        SELECT f.fecha
+        FROM ({fechas_sql}) AS f
+        WHERE EXISTS (
+                -- Clases recurrentes del periodo (todas las fechas caen en él)
+                SELECT 1
+                FROM horario h
+                WHERE h.id_salon = %s
+                  AND h.id_periodo = %s
+                  AND h.dia_semana = %s
+                  AND h.hora_inicio < %s
+                  AND h.hora_fin > %s
+              )
+           OR EXISTS (
+                -- Reservaciones de esa fecha (usa idx_reservacion_salon_slot)
+                SELECT 1
+                FROM reservacion r
+                WHERE r.id_salon = %s
+                  AND r.fecha = f.fecha
+                  AND r.hora_inicio < %s
+                  AND r.hora_fin > %s
+              )
+           OR EXISTS (
+                -- Reservaciones periódicas del mismo día que no cancelaron esa fecha
+                SELECT 1
+                FROM reservacion_periodica rp
+                WHERE rp.id_salon = %s
+                  AND rp.id_periodo = %s
+                  AND rp.dia_semana = %s
+                  AND rp.hora_inicio < %s
+                  AND rp.hora_fin > %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM reservacion_periodica_excepcion e
+                      WHERE e.id_regla = rp.id_regla AND e.fecha = f.fecha
+                  )
+              )
+        ORDER BY f.fecha;
+    """
+    params = fechas_params + [
+        id_salon, id_periodo, dia_nombre, hora_fin_str, hora_str,
+        id_salon, hora_fin_str, hora_str,
+        id_salon, id_periodo, dia_nombre, hora_fin_str, hora_str,
+    ]
+    cursor.execute(sql, params)
+    return [row[0] for row in cursor.fetchall()]
 
 def crear_reservacion_periodica(
     id_usuario: str,
@@ -102,102 +195,100 @@ def crear_reservacion_periodica(
     hora_inicio: time,
     duracion_min: int,
     id_periodo: str,
-    motivo: str
+    motivo: str,
+    omitir_fechas: list[date] | None = None
 ) -> tuple[bool, str]:
     """
     b) Reservar un salón para un día de la semana por todo un periodo.
        Ejemplo: "Todos los martes del periodo Primavera 2024 a las 14:00".
-       Si una falla, todas se cancelan (atomicidad).
+       Si una fecha choca, no se reserva ninguna (atomicidad).
+       Las fechas se revisan en una sola consulta y la serie se guarda como una
+       sola fila de reservacion_periodica (no una reservación por fecha).
+       omitir_fechas (ej. las fechas_conflicto de obtener_salones_libres_patron)
+       no se revisan y se guardan desde el inicio como fechas canceladas.
     """
-    conn = None
-    cursor = None
 
     # Validar día de semana input
     if dia_semana not in DIAS_SEMANA:
         return False, f"Día inválido. Debe ser uno de: {', '.join(DIAS_SEMANA)}"
 
+    # 1. Obtener fechas del periodo (tabla en memoria, sin consulta)
+    rango = tabla_periodos.rango(id_periodo)
+    if not rango:
+        return False, "Periodo no encontrado."
+    fecha_inicio_p, fecha_fin_p = rango
+
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
-
-        # 1. Obtener fechas del periodo
-        cursor.execute("SELECT fecha_inicio, fecha_fin FROM periodo WHERE id_periodo = %s", (id_periodo,))
-        periodo_row = cursor.fetchone()
-        
-        if not periodo_row:
-            return False, "Periodo no encontrado."
-        
-        fecha_inicio_p, fecha_fin_p = periodo_row # Son objetos date
-
-        # 2. Iterar por todas las fechas del periodo
-        curr_date = fecha_inicio_p
-        reservas_creadas = 0
-        
-        target_weekday = DIAS_SEMANA.index(dia_semana) # 0 for Lunes, etc.
-        hora_str = hora_inicio.strftime("%H:%M:%S")
-
-        while curr_date <= fecha_fin_p:
-            if curr_date.weekday() == target_weekday:
-                # Verificar conflicto para esta fecha específica
-                if _verificar_conflicto(cursor, id_salon, curr_date, hora_inicio, duracion_min):
-                    conn.rollback()
-                    return False, f"Conflicto detectado en la fecha {curr_date}. No se realizó ninguna reservación."
-                
-                # Insertar
-                insert_sql = """
-                    INSERT INTO reservacion (id_usuario, id_salon, id_periodo, fecha, hora_inicio, duracion_minutos, motivo)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s);
-                """
-                cursor.execute(insert_sql, (id_usuario, id_salon, id_periodo, curr_date, hora_str, duracion_min, motivo))
-                reservas_creadas += 1
-            
-            curr_date += timedelta(days=1)
-
-        if reservas_creadas == 0:
-            conn.rollback()
-            return False, "No se encontraron días correspondientes en el periodo seleccionado."
-
-        conn.commit()
-        return True, f"Se crearon {reservas_creadas} reservaciones periódicas correctamente."
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+
+            # 2. Generar todas las fechas del día elegido dentro del periodo
+            fechas = fechas_del_dia_semana(fecha_inicio_p, fecha_fin_p, DIAS_SEMANA.index(dia_semana))
+            omitidas = set(omitir_fechas or []) & set(fechas)
+            fechas = [f for f in fechas if f not in omitidas]
+            if not fechas:
+                return False, "No se encontraron días correspondientes en el periodo seleccionado."
+
+            # 3. Verificar conflictos de todas las fechas a la vez
+            conflictos = _fechas_en_conflicto(cursor, id_salon, fechas, hora_inicio, duracion_min, id_periodo)
+            if conflictos:
+                conn.rollback()
+                lista = ", ".join(str(f) for f in conflictos)
+                return False, f"Conflicto detectado en {len(conflictos)} fecha(s): {lista}. No se realizó ninguna reservación."
+
+            # 4. Guardar la serie como una regla
+            insert_sql = """
+                INSERT INTO reservacion_periodica (id_usuario, id_salon, id_periodo, dia_semana, hora_inicio, duracion_minutos, motivo)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(insert_sql, (
+                id_usuario, id_salon, id_periodo, dia_semana, hora_a_str(hora_inicio), duracion_min, motivo
+            ))
+            id_regla = cursor.lastrowid
+            if omitidas:
+                cursor.executemany(
+                    "INSERT INTO reservacion_periodica_excepcion (id_regla, fecha) VALUES (%s, %s)",
+                    [(id_regla, f) for f in sorted(omitidas)]
+                )
+
+            conn.commit()
+            motor_conflictos.agregar_regla(
+                id_regla, id_salon, id_periodo, dia_semana, hora_inicio, duracion_min, sorted(omitidas)
+            )
+            invalidar("reservaciones")
+            mensaje = f"Reservación periódica creada: {len(fechas)} fechas ({dia_semana} de {fechas[0]} a {fechas[-1]})"
+            if omitidas:
+                mensaje += f", sin {len(omitidas)} fecha(s) omitida(s)"
+            return True, mensaje + "."
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         return False, f"Error al crear reservaciones periódicas: {err}"
-    finally:
-        if cursor:
-            cursor.close()
 
 def cancelar_reservacion(id_reservacion: int) -> tuple[bool, str]:
     """
     c.1) Cancelar una reservación específica.
     """
-    conn = None
-    cursor = None
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
 
-        delete_sql = "DELETE FROM reservacion WHERE id_reservacion = %s;"
-        cursor.execute(delete_sql, (id_reservacion,))
+            delete_sql = "DELETE FROM reservacion WHERE id_reservacion = %s;"
+            cursor.execute(delete_sql, (id_reservacion,))
 
-        if cursor.rowcount == 0:
-            conn.rollback()
-            return False, "No se encontró la reservación a cancelar."
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False, "No se encontró la reservación a cancelar."
 
-        conn.commit()
-        return True, "Reservación cancelada correctamente"
+            conn.commit()
+            motor_conflictos.quitar_reservaciones([id_reservacion])
+            invalidar("reservaciones")
+            return True, "Reservación cancelada correctamente"
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         return False, f"Error al cancelar la reservación: {err}"
-    finally:
-        if cursor:
-            cursor.close()
 
 def cancelar_reservaciones_por_intervalo(
     id_usuario: str,
@@ -206,34 +297,142 @@ def cancelar_reservaciones_por_intervalo(
 ) -> tuple[bool, str]:
     """
     c.2) Cancelar reservaciones en un intervalo de fechas para un usuario.
+         Las series periódicas que caen completas en el intervalo se borran;
+         de las demás se cancelan solo las fechas dentro del intervalo.
+    """
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+
+            # Ids a borrar, bloqueados, para quitarlos también del motor de conflictos
+            cursor.execute("""
+                SELECT id_reservacion
+                FROM reservacion
+                WHERE id_usuario = %s
+                  AND fecha BETWEEN %s AND %s
+                FOR UPDATE;
+            """, (id_usuario, fecha_inicio, fecha_fin))
+            ids_reservacion = [row[0] for row in cursor.fetchall()]
+
+            deleted_count = 0
+            if ids_reservacion:
+                cursor.execute(
+                    f"DELETE FROM reservacion WHERE id_reservacion IN ({marcadores(ids_reservacion)})",
+                    ids_reservacion,
+                )
+                deleted_count = cursor.rowcount
+
+            # Series del usuario en periodos que tocan el intervalo
+            cursor.execute("""
+                SELECT rp.id_regla, rp.dia_semana, p.fecha_inicio, p.fecha_fin
+                FROM reservacion_periodica rp
+                JOIN periodo p ON p.id_periodo = rp.id_periodo
+                WHERE rp.id_usuario = %s
+                  AND p.fecha_inicio <= %s
+                  AND p.fecha_fin >= %s
+                FOR UPDATE;
+            """, (id_usuario, fecha_fin, fecha_inicio))
+            reglas_completas, excepciones = [], []
+            for id_regla, dia, inicio_p, fin_p in cursor.fetchall():
+                if fecha_inicio <= inicio_p and fin_p <= fecha_fin:
+                    reglas_completas.append(id_regla)
+                    continue
+                fechas = fechas_del_dia_semana(max(inicio_p, fecha_inicio), min(fin_p, fecha_fin), DIAS_SEMANA.index(dia))
+                excepciones += [(id_regla, f) for f in fechas]
+
+            if reglas_completas:
+                cursor.execute(
+                    f"DELETE FROM reservacion_periodica WHERE id_regla IN ({marcadores(reglas_completas)})",
+                    reglas_completas,
+                )
+                deleted_count += cursor.rowcount
+            if excepciones:
+                cursor.executemany(
+                    "INSERT IGNORE INTO reservacion_periodica_excepcion (id_regla, fecha) VALUES (%s, %s)",
+                    excepciones,
+                )
+                deleted_count += cursor.rowcount
+
+            if deleted_count == 0:
+                conn.rollback() # O commit, pero avisando que no hubo nada
+                return False, "No se encontraron reservaciones en ese rango para cancelar."
+
+            conn.commit()
+            motor_conflictos.quitar_reservaciones(ids_reservacion)
+            motor_conflictos.quitar_reglas(reglas_completas)
+            motor_conflictos.agregar_excepciones(excepciones)
+            invalidar("reservaciones")
+            return True, f"Se cancelaron {deleted_count} reservaciones correctamente."
+
+    except mysql.connector.Error as err:
+        # get_connection() revierte la transacción al salir con error
+        return False, f"Error al cancelar reservaciones: {err}"
+
+def cancelar_reservacion_periodica(id_regla: int) -> tuple[bool, str]:
+    """
+    c.3) Cancelar una serie periódica completa: se borra su regla (una fila).
     """
-    conn = None
-    cursor = None
 
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
 
-        delete_sql = """
-            DELETE FROM reservacion
-            WHERE id_usuario = %s
-              AND fecha BETWEEN %s AND %s;
-        """
-        cursor.execute(delete_sql, (id_usuario, fecha_inicio, fecha_fin))
-        deleted_count = cursor.rowcount
+            cursor.execute("DELETE FROM reservacion_periodica WHERE id_regla = %s;", (id_regla,))
 
-        if deleted_count == 0:
-            conn.rollback() # O commit, pero avisando que no hubo nada
-            return False, "No se encontraron reservaciones en ese rango para cancelar."
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False, "No se encontró la reservación periódica a cancelar."
 
-        conn.commit()
-        return True, f"Se cancelaron {deleted_count} reservaciones correctamente."
+            conn.commit()
+            motor_conflictos.quitar_reglas([id_regla])
+            invalidar("reservaciones")
+            return True, "Reservación periódica cancelada correctamente"
 
     except mysql.connector.Error as err:
-        if conn:
-            conn.rollback()
-        return False, f"Error al cancelar reservaciones: {err}"
-    finally:
-        if cursor:
-            cursor.close()
+        # get_connection() revierte la transacción al salir con error
+        return False, f"Error al cancelar la reservación periódica: {err}"
+
+def cancelar_fecha_periodica(id_regla: int, fecha: date) -> tuple[bool, str]:
+    """
+    c.4) Cancelar una sola fecha de una serie periódica: se agrega una
+         excepción (una fila) y el salón queda libre ese día.
+    """
+
+    try:
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+
+            cursor.execute("""
+                SELECT rp.dia_semana, p.fecha_inicio, p.fecha_fin
+                FROM reservacion_periodica rp
+                JOIN periodo p ON p.id_periodo = rp.id_periodo
+                WHERE rp.id_regla = %s
+                FOR UPDATE;
+            """, (id_regla,))
+            row = cursor.fetchone()
+            if not row:
+                conn.rollback()
+                return False, "No se encontró la reservación periódica."
+
+            dia, inicio_p, fin_p = row
+            if DIAS_SEMANA[fecha.weekday()] != dia or not (inicio_p <= fecha <= fin_p):
+                conn.rollback()
+                return False, f"La fecha {fecha} no pertenece a la serie ({dia} de {inicio_p} a {fin_p})."
+
+            cursor.execute(
+                "INSERT IGNORE INTO reservacion_periodica_excepcion (id_regla, fecha) VALUES (%s, %s);",
+                (id_regla, fecha),
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return False, f"La fecha {fecha} ya estaba cancelada."
+
+            conn.commit()
+            motor_conflictos.agregar_excepciones([(id_regla, fecha)])
+            invalidar("reservaciones")
+            return True, f"Se canceló la fecha {fecha} de la reservación periódica"
+
+    except mysql.connector.Error as err:
+        # get_connection() revierte la transacción al salir con error
+        return False, f"Error al cancelar la fecha: {err}"
@@ -1,9 +1,11 @@
 import streamlit as st
-from datetime import datetime, time, date
+from datetime import datetime, time, date, timedelta
 import pandas as pd
 from .queries import (
-    obtener_disponibilidad_salones, 
-    obtener_mis_reservaciones, 
+    obtener_mis_reservaciones_pagina, 
+    obtener_mis_reservaciones_periodicas,
+    obtener_salones_libres_patron,
+    obtener_disponibilidad_salones_lote,
     obtener_periodos, 
     obtener_periodo_activo
 )
@@ -11,8 +13,17 @@ from .transactions import (
     crear_reservacion, 
     crear_reservacion_periodica, 
     cancelar_reservacion, 
-    cancelar_reservaciones_por_intervalo
+    cancelar_reservaciones_por_intervalo,
+    cancelar_reservacion_periodica,
+    cancelar_fecha_periodica,
+    DIAS_SEMANA,
 )
+from .recommender import recomendar_salones, INICIO_JORNADA, FIN_JORNADA
+from utils.ui import fragmento, exportacion_descargable, paginador
+from modules.models import TipoSalon
+from modules.periodos import tabla_periodos
+from utils.period_helpers import fechas_del_dia_semana
+from modules.export import exportar_reservaciones
 
 def view_reservaciones():
     """
@@ -25,232 +36,452 @@ def view_reservaciones():
     
     # --- TAB 1: NUEVA RESERVACIÓN ---
     with tab_nueva:
-        st.markdown("### 🔍 Generar Nueva Reservación")
-        
-        tipo_reserva = st.radio(
-            "Tipo de Reservación", 
-            ["Individual (Fecha específica)", "Periódica (Día de la semana por todo el periodo)"],
-            horizontal=True
-        )
-
-        usuario = st.session_state.get('usuario_activo')
-        if not usuario:
-            st.warning("🔒 Debes iniciar sesión para realizar reservaciones.")
-            st.stop()
-        
-        id_usuario = usuario.get('id_usuario')
+        _tab_nueva_reservacion()
 
-        if tipo_reserva.startswith("Individual"):
-            # --- MODO INDIVIDUAL ---
-            with st.container(border=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    fecha_reserva = st.date_input(
-                        "Fecha", 
-                        min_value=datetime.today(),
-                        value=datetime.today(),
-                        help="Selecciona el día para la reservación",
-                        key="res_fecha"
-                    )
-                with col2:
-                    hora_inicio = st.time_input(
-                        "Hora de Inicio", 
-                        value=time(9, 0),
-                        step=1800, 
-                        key="res_hora"
-                    )
-                with col3:
-                    duracion = st.number_input(
-                        "Duración (min)", 
-                        min_value=30, max_value=300, step=30, value=60,
-                        key="res_duracion"
+    # --- TAB 2: MIS RESERVACIONES ---
+    with tab_mis:
+        _tab_mis_reservaciones()
+
+
+@fragmento
+def _tab_nueva_reservacion():
+    """Consulta de disponibilidad y alta de reservaciones individuales o periódicas."""
+    st.markdown("### 🔍 Generar Nueva Reservación")
+
+    # Mensaje de la reservación creada antes del último rerun
+    if 'res_mensaje' in st.session_state:
+        st.success(f"🎉 {st.session_state.pop('res_mensaje')}")
+        st.balloons()
+
+    tipo_reserva = st.radio(
+        "Tipo de Reservación", 
+        ["Individual (Fecha específica)", "Periódica (Día de la semana por todo el periodo)"],
+        horizontal=True
+    )
+
+    usuario = st.session_state.get('usuario_activo')
+    if not usuario:
+        st.warning("🔒 Debes iniciar sesión para realizar reservaciones.")
+        st.stop()
+
+    id_usuario = usuario.get('id_usuario')
+
+    if tipo_reserva.startswith("Individual"):
+        # --- MODO INDIVIDUAL ---
+        with st.container(border=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                fecha_reserva = st.date_input(
+                    "Fecha", 
+                    min_value=datetime.today(),
+                    value=datetime.today(),
+                    help="Selecciona el día para la reservación",
+                    key="res_fecha"
+                )
+            with col2:
+                hora_inicio = st.time_input(
+                    "Hora de Inicio", 
+                    value=time(9, 0),
+                    step=1800, 
+                    key="res_hora"
+                )
+            with col3:
+                duracion = st.number_input(
+                    "Duración (min)", 
+                    min_value=30, max_value=300, step=30, value=60,
+                    key="res_duracion"
+                )
+
+            col4, col5 = st.columns(2)
+            with col4:
+                asistentes = st.number_input(
+                    "Asistentes",
+                    min_value=1, max_value=500, step=1, value=10,
+                    key="res_asistentes"
+                )
+            with col5:
+                tipo_opcion = st.selectbox(
+                    "Tipo de Salón",
+                    ["Cualquiera"] + [t.value for t in TipoSalon],
+                    key="res_tipo"
+                )
+
+            # Botón de búsqueda de disponibilidad
+            if st.button("Consultar Disponibilidad", type="primary", use_container_width=True):
+                with st.spinner("Buscando salones disponibles..."):
+                    # Salones libres con cupo suficiente, el de menor capacidad primero
+                    df, alternativas = recomendar_salones(
+                        fecha_reserva, hora_inicio, duracion, asistentes,
+                        None if tipo_opcion == "Cualquiera" else tipo_opcion,
+                        limite=10
                     )
-                
-                # Botón de búsqueda de disponibilidad
-                if st.button("Consultar Disponibilidad", type="primary", use_container_width=True):
-                    with st.spinner("Buscando salones disponibles..."):
-                        df = obtener_disponibilidad_salones(fecha_reserva, hora_inicio, duracion)
-                        st.session_state['res_disponibles'] = df
-                        st.session_state['res_params'] = {
-                            'fecha': fecha_reserva,
-                            'hora': hora_inicio,
-                            'duracion': duracion
-                        }
-
-            # Mostrar resultados si existen en session_state
-            if 'res_disponibles' in st.session_state:
-                df_disponibles = st.session_state['res_disponibles']
-                
-                # Verificar si los parámetros de búsqueda cambiaron (opcional, por ahora confiamos en el usuario)
-                
-                if not df_disponibles.empty:
-                    st.success(f"✅ Se encontraron {len(df_disponibles)} espacios disponibles.")
-                    st.dataframe(
-                        df_disponibles, 
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "id_salon": "Salón",
-                            "tipo": "Tipo",
-                            "capacidad": "Capacidad"
-                        }
+                    st.session_state['res_disponibles'] = df
+                    st.session_state['res_alternativas'] = alternativas
+                    st.session_state['res_params'] = {
+                        'fecha': fecha_reserva,
+                        'hora': hora_inicio,
+                        'duracion': duracion
+                    }
+
+        # Cuadrícula salón × media hora del día elegido, en una sola consulta
+        with st.expander("🗓️ Disponibilidad de todo el día"):
+            if st.button("Ver cuadrícula del día", key="res_ver_dia"):
+                with st.spinner("Consultando todas las franjas del día..."):
+                    st.session_state['res_dia'] = (
+                        (fecha_reserva, duracion),
+                        obtener_disponibilidad_salones_lote(_franjas_del_dia(fecha_reserva, duracion))
                     )
-                    
-                    st.divider()
-                    st.subheader("Confirmar Reservación")
-                    
-                    with st.form("form_confirmar_reserva"):
-                        # Selección del salón de la lista de disponibles
-                        opciones_salones = df_disponibles['id_salon'].tolist()
-                        seleccion_salon = st.selectbox("Selecciona el Salón", opciones_salones)
-                        motivo = st.text_input("Motivo de la reservación", placeholder="Ej. Asesoría de proyecto final")
-                        
-                        submitted = st.form_submit_button("Confirmar Reservación")
-                        
-                        if submitted:
-                            if not motivo:
-                                st.error("⚠️ Debes ingresar un motivo.")
-                            else:
-                                params = st.session_state.get('res_params', {})
-                                # Usar params guardados para consistencia
-                                f_res = params.get('fecha', fecha_reserva)
-                                h_ini = params.get('hora', hora_inicio)
-                                dur = params.get('duracion', duracion)
-                                
-                                id_periodo = obtener_periodo_activo(f_res)
-                                if not id_periodo:
-                                    st.error("❌ No hay un periodo académico activo para esta fecha.")
-                                else:
-                                    success, msg = crear_reservacion(
-                                        id_usuario, seleccion_salon, f_res, 
-                                        h_ini, dur, id_periodo, motivo
-                                    )
-                                    if success:
-                                        st.success(f"🎉 {msg}")
-                                        st.balloons()
-                                        # Limpiar resultados para reiniciar flujo
-                                        del st.session_state['res_disponibles']
-                                        # st.rerun() # Opcional
-                                    else:
-                                        st.error(f"❌ {msg}")
-                else:
-                    st.error("❌ No hay salones disponibles en ese horario.")
-                    if st.button("Limpiar búsqueda"):
-                        del st.session_state['res_disponibles']
-                        st.rerun()
+            dia_consultado = st.session_state.get('res_dia')
+            if dia_consultado and dia_consultado[0] == (fecha_reserva, duracion):
+                _cuadricula_dia(dia_consultado[1])
 
-        else:
-            # --- MODO PERIÓDICO ---
-            st.info("ℹ️ Esta opción reservará el salón seleccionado para **todos** los días de la semana elegidos dentro del periodo seleccionado.")
-            
-            with st.container(border=True):
-                # Cargar periodos
-                lista_periodos = obtener_periodos()
-                if not lista_periodos:
-                    st.error("No se encontraron periodos registrados.")
-                else:
-                    col_p, col_d = st.columns(2)
-                    with col_p:
-                        periodo_sel = st.selectbox("Periodo Académico", lista_periodos)
-                    with col_d:
-                        dia_semana_sel = st.selectbox("Día de la Semana", ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado'])
-
-                    col_h, col_dur = st.columns(2)
-                    with col_h:
-                        hora_inicio_p = st.time_input("Hora de Inicio", value=time(9, 0), step=1800, key="p_hora")
-                    with col_dur:
-                        duracion_p = st.number_input("Duración (min)", min_value=30, max_value=300, step=30, value=60, key="p_dur")
-                    
-                    salon_input = st.text_input("ID del Salón (Ej. IA104)", help="Ingresa el código del salón a reservar.")
-                    motivo_p = st.text_input("Motivo", placeholder="Ej. Taller semanal de Python", key="p_motivo")
-
-                    if st.button("Crear Reservaciones Periódicas", type="primary"):
-                        if not salon_input or not motivo_p:
-                            st.warning("⚠️ Debes ingresar el salón y el motivo.")
-                        else:
-                            with st.spinner("Procesando reservaciones masivas..."):
-                                success, msg = crear_reservacion_periodica(
-                                    id_usuario, salon_input, dia_semana_sel, 
-                                    hora_inicio_p, duracion_p, periodo_sel, motivo_p
-                                )
-                            
-                            if success:
-                                st.success(f"🎉 {msg}")
-                            else:
-                                st.error(f"❌ {msg}")
+        # Mostrar resultados si existen en session_state
+        if 'res_disponibles' in st.session_state:
+            df_disponibles = st.session_state['res_disponibles']
 
-    # --- TAB 2: MIS RESERVACIONES ---
-    with tab_mis:
-        st.markdown("### 🗒️ Gestión de mis Reservaciones")
-        
-        usuario = st.session_state.get('usuario_activo')
-        if not usuario:
-            st.warning("Debes iniciar sesión para ver tus reservaciones.")
-        else:
-            id_usuario = usuario.get('id_usuario')
-            
-            # Cargar reservaciones
-            df_reservas = obtener_mis_reservaciones(id_usuario)
-            
-            if not df_reservas.empty:
+            # Verificar si los parámetros de búsqueda cambiaron (opcional, por ahora confiamos en el usuario)
+
+            if not df_disponibles.empty:
+                st.success(f"✅ Se encontraron {len(df_disponibles)} espacios adecuados (el que mejor se ajusta primero).")
                 st.dataframe(
-                    df_reservas,
+                    df_disponibles, 
                     use_container_width=True,
                     hide_index=True,
                     column_config={
-                        "id_reservacion": st.column_config.NumberColumn("# ID", format="%d", width="small"),
                         "id_salon": "Salón",
-                        "fecha": st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
-                        "hora_inicio": st.column_config.TimeColumn("Hora", format="HH:mm"),
-                        "duracion_minutos": st.column_config.NumberColumn("Duración", format="%d min"),
-                        "motivo": "Motivo"
+                        "tipo": "Tipo",
+                        "capacidad": "Capacidad",
+                        "lugares_sobrantes": "Lugares sobrantes"
                     }
                 )
-                
+
                 st.divider()
-                col_c1, col_c2 = st.columns(2)
-                
-                # Cancelación Individual
-                with col_c1:
-                    st.subheader("Cancelar una Reservación")
-                    ids_reservas = df_reservas['id_reservacion'].tolist()
-                    
-                    with st.form("form_cancel_single"):
-                        id_cancelar = st.selectbox("Selecciona ID a cancelar", ids_reservas)
-                        confirm = st.checkbox(f"Estoy seguro de cancelar", key="chk_single")
-                        
-                        if st.form_submit_button("❌ Cancelar Seleccionada"):
-                            if confirm:
-                                success, msg = cancelar_reservacion(id_cancelar)
-                                if success:
-                                    st.success(msg)
-                                    st.rerun()
-                                else:
-                                    st.error(msg)
+                st.subheader("Confirmar Reservación")
+
+                with st.form("form_confirmar_reserva"):
+                    # Selección del salón de la lista de disponibles
+                    opciones_salones = df_disponibles['id_salon'].tolist()
+                    seleccion_salon = st.selectbox("Selecciona el Salón", opciones_salones)
+                    motivo = st.text_input("Motivo de la reservación", placeholder="Ej. Asesoría de proyecto final")
+
+                    submitted = st.form_submit_button("Confirmar Reservación")
+
+                    if submitted:
+                        if not motivo:
+                            st.error("⚠️ Debes ingresar un motivo.")
+                        else:
+                            params = st.session_state.get('res_params', {})
+                            # Usar params guardados para consistencia
+                            f_res = params.get('fecha', fecha_reserva)
+                            h_ini = params.get('hora', hora_inicio)
+                            dur = params.get('duracion', duracion)
+
+                            id_periodo = obtener_periodo_activo(f_res)
+                            if not id_periodo:
+                                st.error("❌ No hay un periodo académico activo para esta fecha.")
                             else:
-                                st.warning("Debes marcar la casilla de confirmación.")
-
-                # Cancelación por Intervalo
-                with col_c2:
-                    st.subheader("Cancelar por Rango")
-                    
-                    with st.form("form_cancel_range"):
-                        st.markdown("Borra todas tus reservaciones en un periodo.")
-                        d_inicio = st.date_input("Fecha Inicio", value=date.today())
-                        d_fin = st.date_input("Fecha Fin", value=date.today())
-                        confirm_range = st.checkbox("Confirmar eliminación masiva", key="chk_range")
-                        
-                        if st.form_submit_button("🗑️ Cancelar en Rango"):
-                            if d_inicio > d_fin:
-                                st.error("La fecha de inicio no puede ser mayor a la fin.")
-                            elif confirm_range:
-                                success, msg = cancelar_reservaciones_por_intervalo(id_usuario, d_inicio, d_fin)
+                                success, msg = crear_reservacion(
+                                    id_usuario, seleccion_salon, f_res, 
+                                    h_ini, dur, id_periodo, motivo
+                                )
                                 if success:
-                                    st.success(msg)
+                                    # Limpiar resultados para reiniciar flujo
+                                    del st.session_state['res_disponibles']
+                                    # Rerun completo para que "Mis Reservaciones" se actualice
+                                    st.session_state['res_mensaje'] = msg
                                     st.rerun()
                                 else:
-                                    st.error(msg)
+                                    st.error(f"❌ {msg}")
+            else:
+                st.error("❌ No hay salones disponibles con ese cupo en ese horario.")
+                # Horas cercanas en las que sí hay un salón adecuado
+                alternativas = st.session_state.get('res_alternativas', [])
+                if alternativas:
+                    st.info("💡 Horarios cercanos con salones adecuados:")
+                    for hora_alt, df_alt in alternativas:
+                        col_a, col_b = st.columns([3, 1])
+                        col_a.write(f"**{hora_alt.strftime('%H:%M')}** — {', '.join(df_alt['id_salon'])}")
+                        if col_b.button(f"Usar {hora_alt.strftime('%H:%M')}", key=f"res_alt_{hora_alt}"):
+                            st.session_state['res_disponibles'] = df_alt
+                            st.session_state['res_alternativas'] = []
+                            st.session_state['res_params']['hora'] = hora_alt
+                            st.rerun()
+                if st.button("Limpiar búsqueda"):
+                    del st.session_state['res_disponibles']
+                    st.rerun()
+
+    else:
+        # --- MODO PERIÓDICO ---
+        st.info("ℹ️ Esta opción reservará el salón seleccionado para **todos** los días de la semana elegidos dentro del periodo seleccionado.")
+
+        with st.container(border=True):
+            # Cargar periodos
+            lista_periodos = obtener_periodos()
+            if not lista_periodos:
+                st.error("No se encontraron periodos registrados.")
+            else:
+                col_p, col_d = st.columns(2)
+                with col_p:
+                    periodo_sel = st.selectbox("Periodo Académico", lista_periodos)
+                with col_d:
+                    dia_semana_sel = st.selectbox("Día de la Semana", ['Lunes', 'Martes', 'Miercoles', 'Jueves', 'Viernes', 'Sabado'])
+
+                col_h, col_dur = st.columns(2)
+                with col_h:
+                    hora_inicio_p = st.time_input("Hora de Inicio", value=time(9, 0), step=1800, key="p_hora")
+                with col_dur:
+                    duracion_p = st.number_input("Duración (min)", min_value=30, max_value=300, step=30, value=60, key="p_dur")
+
+                # Salones libres en todas las fechas del patrón (o en todas menos k), en una sola consulta
+                col_k, col_buscar = st.columns([1, 2], vertical_alignment="bottom")
+                with col_k:
+                    max_conflictos = st.number_input(
+                        "Fechas con conflicto aceptables", min_value=0, max_value=5, value=0, key="p_k",
+                        help="Incluye salones ocupados en hasta este número de fechas; esas fechas se omiten de la serie."
+                    )
+                patron = (periodo_sel, dia_semana_sel, hora_inicio_p, duracion_p, max_conflictos)
+                with col_buscar:
+                    if st.button("🔍 Buscar salones libres en todo el periodo", use_container_width=True):
+                        with st.spinner("Revisando todas las fechas del periodo..."):
+                            st.session_state['p_patron'] = (patron, obtener_salones_libres_patron(*patron))
+
+                # Fechas a omitir por salón, solo si la búsqueda corresponde a los datos actuales
+                omitir_por_salon = {}
+                busqueda = st.session_state.get('p_patron')
+                if busqueda and busqueda[0] == patron:
+                    df_patron = busqueda[1]
+                    if df_patron.empty:
+                        st.warning("⚠️ Ningún salón está libre en esas fechas con ese número de conflictos.")
+                    else:
+                        omitir_por_salon = dict(zip(df_patron['id_salon'], df_patron['fechas_conflicto']))
+                        libres = df_patron[df_patron['conflictos'] == 0]
+                        parciales = df_patron[df_patron['conflictos'] > 0]
+
+                        st.markdown(f"**✅ Libres en todas las fechas: {len(libres)}**")
+                        st.dataframe(
+                            libres[['id_salon', 'tipo', 'capacidad']],
+                            use_container_width=True, hide_index=True,
+                            column_config={"id_salon": "Salón", "tipo": "Tipo", "capacidad": "Capacidad"}
+                        )
+                        if not parciales.empty:
+                            st.markdown(f"**⚠️ Libres salvo en algunas fechas: {len(parciales)}**")
+                            st.dataframe(
+                                parciales.assign(fechas_conflicto=parciales['fechas_conflicto'].map(
+                                    lambda fechas: ", ".join(str(f) for f in fechas)
+                                )),
+                                use_container_width=True, hide_index=True,
+                                column_config={
+                                    "id_salon": "Salón", "tipo": "Tipo", "capacidad": "Capacidad",
+                                    "conflictos": "Conflictos", "fechas_conflicto": "Fechas ocupadas"
+                                }
+                            )
+
+                        col_sel, col_usar = st.columns([3, 1], vertical_alignment="bottom")
+                        with col_sel:
+                            salon_sugerido = st.selectbox("Salón encontrado", df_patron['id_salon'].tolist(), key="p_sugerido")
+                        with col_usar:
+                            st.button(
+                                "Usar salón", use_container_width=True,
+                                on_click=lambda: st.session_state.update(p_salon=st.session_state['p_sugerido'])
+                            )
+
+                salon_input = st.text_input("ID del Salón (Ej. IA104)", help="Ingresa el código del salón a reservar.", key="p_salon")
+                motivo_p = st.text_input("Motivo", placeholder="Ej. Taller semanal de Python", key="p_motivo")
+
+                omitir = omitir_por_salon.get(salon_input, [])
+                if omitir:
+                    st.caption(f"Se omitirán {len(omitir)} fecha(s) ocupadas: {', '.join(str(f) for f in omitir)}")
+
+                if st.button("Crear Reservaciones Periódicas", type="primary"):
+                    if not salon_input or not motivo_p:
+                        st.warning("⚠️ Debes ingresar el salón y el motivo.")
+                    else:
+                        with st.spinner("Verificando las fechas del periodo..."):
+                            success, msg = crear_reservacion_periodica(
+                                id_usuario, salon_input, dia_semana_sel, 
+                                hora_inicio_p, duracion_p, periodo_sel, motivo_p,
+                                omitir_fechas=omitir
+                            )
+
+                        if success:
+                            st.session_state.pop('p_patron', None)
+                            st.session_state['res_mensaje'] = msg
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {msg}")
+
+
+def _franjas_del_dia(fecha: date, duracion_min: int, paso_min: int = 30) -> list[tuple[date, time, int]]:
+    """Inicios cada paso_min minutos de la jornada en los que cabe la duración."""
+    inicio = datetime.combine(fecha, INICIO_JORNADA)
+    ultimo = datetime.combine(fecha, FIN_JORNADA) - timedelta(minutes=duracion_min)
+    franjas = []
+    while inicio <= ultimo:
+        franjas.append((fecha, inicio.time(), duracion_min))
+        inicio += timedelta(minutes=paso_min)
+    return franjas
+
+
+def _cuadricula_dia(matriz: pd.DataFrame):
+    """Muestra la matriz franja × salón (True = libre) como tabla salón × hora."""
+    if matriz.empty:
+        st.info("No se pudo consultar la disponibilidad del día.")
+        return
+    horas = [hora.strftime('%H:%M') for _, hora, _ in matriz.index]
+    libres_por_franja = pd.Series(matriz.sum(axis=1).to_numpy(), index=horas, name="Salones libres")
+    st.bar_chart(libres_por_franja)
+
+    tabla = matriz.T.replace({True: "✅", False: "·"})
+    tabla.columns = horas
+    st.dataframe(tabla, use_container_width=True)
+
+
+@fragmento
+def _tab_mis_reservaciones():
+    """Listado y cancelación de las reservaciones del usuario."""
+    st.markdown("### 🗒️ Gestión de mis Reservaciones")
+
+    usuario = st.session_state.get('usuario_activo')
+    if not usuario:
+        st.warning("Debes iniciar sesión para ver tus reservaciones.")
+    else:
+        id_usuario = usuario.get('id_usuario')
+
+        # Cargar reservaciones (una página a la vez, más recientes primero)
+        df_reservas = paginador("pag_mis_reservaciones", obtener_mis_reservaciones_pagina, id_usuario=id_usuario)
+
+        if not df_reservas.empty:
+            st.dataframe(
+                df_reservas,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "id_reservacion": st.column_config.NumberColumn("# ID", format="%d", width="small"),
+                    "id_salon": "Salón",
+                    "fecha": st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
+                    "hora_inicio": st.column_config.TimeColumn("Hora", format="HH:mm"),
+                    "duracion_minutos": st.column_config.NumberColumn("Duración", format="%d min"),
+                    "motivo": "Motivo"
+                }
+            )
+
+            st.divider()
+            col_c1, col_c2 = st.columns(2)
+
+            # Cancelación Individual
+            with col_c1:
+                st.subheader("Cancelar una Reservación")
+                # IDs de la página mostrada
+                ids_reservas = df_reservas['id_reservacion'].tolist()
+
+                with st.form("form_cancel_single"):
+                    id_cancelar = st.selectbox("Selecciona ID a cancelar", ids_reservas)
+                    confirm = st.checkbox(f"Estoy seguro de cancelar", key="chk_single")
+
+                    if st.form_submit_button("❌ Cancelar Seleccionada"):
+                        if confirm:
+                            success, msg = cancelar_reservacion(id_cancelar)
+                            if success:
+                                st.success(msg)
+                                st.rerun()
+                            else:
+                                st.error(msg)
+                        else:
+                            st.warning("Debes marcar la casilla de confirmación.")
+
+            # Cancelación por Intervalo
+            with col_c2:
+                st.subheader("Cancelar por Rango")
+
+                with st.form("form_cancel_range"):
+                    st.markdown("Borra todas tus reservaciones en un periodo.")
+                    d_inicio = st.date_input("Fecha Inicio", value=date.today())
+                    d_fin = st.date_input("Fecha Fin", value=date.today())
+                    confirm_range = st.checkbox("Confirmar eliminación masiva", key="chk_range")
+
+                    if st.form_submit_button("🗑️ Cancelar en Rango"):
+                        if d_inicio > d_fin:
+                            st.error("La fecha de inicio no puede ser mayor a la fin.")
+                        elif confirm_range:
+                            success, msg = cancelar_reservaciones_por_intervalo(id_usuario, d_inicio, d_fin)
+                            if success:
+                                st.success(msg)
+                                st.rerun()
                             else:
-                                st.warning("Debes marcar la casilla de confirmación.")
+                                st.error(msg)
+                        else:
+                            st.warning("Debes marcar la casilla de confirmación.")
+        else:
+            st.info("📭 No tienes reservaciones registradas.")
+
+        _reservaciones_periodicas(id_usuario)
+
+        # Fuera del listado: incluye también las fechas de las series periódicas
+        st.divider()
+        with st.expander("⬇️ Exportar mis reservaciones"):
+            exportacion_descargable(
+                "exp_reservaciones", f"reservaciones_{id_usuario}", exportar_reservaciones,
+                id_usuario=id_usuario,
+            )
+
+
+def _reservaciones_periodicas(id_usuario: str):
+    """Series periódicas del usuario: cancelar la serie completa o una sola fecha."""
+    st.divider()
+    st.subheader("🔁 Reservaciones Periódicas")
+
+    df_series = obtener_mis_reservaciones_periodicas(id_usuario)
+    if df_series.empty:
+        st.caption("No tienes reservaciones periódicas.")
+        return
+
+    st.dataframe(
+        df_series,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "id_regla": st.column_config.NumberColumn("# Serie", format="%d", width="small"),
+            "id_periodo": "Periodo",
+            "id_salon": "Salón",
+            "dia_semana": "Día",
+            "hora_inicio": st.column_config.TimeColumn("Hora", format="HH:mm"),
+            "duracion_minutos": st.column_config.NumberColumn("Duración", format="%d min"),
+            "motivo": "Motivo",
+            "fechas_canceladas": "Fechas canceladas"
+        }
+    )
+
+    series = {row.id_regla: row for row in df_series.itertuples(index=False)}
+    id_serie = st.selectbox("Serie", list(series), key="serie_sel")
+    serie = series[id_serie]
+
+    col_s1, col_s2 = st.columns(2)
+    with col_s1:
+        # Fechas de la serie que siguen activas
+        rango = tabla_periodos.rango(serie.id_periodo)
+        canceladas = set((serie.fechas_canceladas or "").split(", "))
+        fechas = [] if rango is None else [
+            f for f in fechas_del_dia_semana(*rango, DIAS_SEMANA.index(serie.dia_semana))
+            if f.isoformat() not in canceladas and f >= date.today()
+        ]
+        fecha_cancelar = st.selectbox("Fecha", fechas, key="serie_fecha")
+        if st.button("Cancelar solo esta fecha", disabled=not fechas):
+            success, msg = cancelar_fecha_periodica(id_serie, fecha_cancelar)
+            if success:
+                st.success(msg)
+                st.rerun()
+            else:
+                st.error(msg)
+
+    with col_s2:
+        confirm_serie = st.checkbox("Confirmar cancelación de la serie completa", key="chk_serie")
+        if st.button("🗑️ Cancelar serie completa"):
+            if confirm_serie:
+                success, msg = cancelar_reservacion_periodica(id_serie)
+                if success:
+                    st.success(msg)
+                    st.rerun()
+                else:
+                    st.error(msg)
             else:
-                st.info("📭 No tienes reservaciones registradas.")
+                st.warning("Debes marcar la casilla de confirmación.")
@@ -1,109 +1,127 @@
 import pandas as pd
 from typing import Optional
 import mysql.connector
-from config.db import get_connection
+from config.db import get_connection, respaldo_solo_lectura
+from config.cache import cacheado
 
+@cacheado("salones")
+@respaldo_solo_lectura
 def obtener_catalogo_salones() -> pd.DataFrame:
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT 
-                id_salon,
-                capacidad,
-                tipo
-            FROM salon
-            ORDER BY id_salon;
-        """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT 
+                    id_salon,
+                    capacidad,
+                    tipo
+                FROM salon
+                ORDER BY id_salon;
+            """
+
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            return pd.DataFrame(rows)
 
     except mysql.connector.Error as err:
         print(" Error SQL:", err)
         return pd.DataFrame()
     
 
+@cacheado("salones")
 def obtener_salones_avanzado(capacidad_min: int = 0, tipo: Optional[str] = None) -> pd.DataFrame:
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT 
-                id_salon,
-                capacidad,
-                tipo
-            FROM salon
-            WHERE capacidad >= %s
-        """
-
-        params = [capacidad_min]
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT 
+                    id_salon,
+                    capacidad,
+                    tipo
+                FROM salon
+                WHERE capacidad >= %s
+            """
+
+            params = [capacidad_min]
 
         
-        if tipo is not None:
-            query += " AND tipo = %s"
-            params.append(tipo)
+            if tipo is not None:
+                query += " AND tipo = %s"
+                params.append(tipo)
 
-        query += " ORDER BY capacidad DESC;"
+            query += " ORDER BY capacidad DESC;"
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        return pd.DataFrame(rows)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return pd.DataFrame(rows)
 
     except mysql.connector.Error as err:
         print(" Error SQL:", err)
         return pd.DataFrame()
     
 
+@cacheado("periodos")
+@respaldo_solo_lectura
 def obtener_periodos() -> pd.DataFrame:
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        query = "SELECT id_periodo FROM periodo ORDER BY fecha_inicio DESC;"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = "SELECT id_periodo FROM periodo ORDER BY fecha_inicio DESC;"
+            cursor.execute(query)
+            rows = cursor.fetchall()
+            return pd.DataFrame(rows)
     except mysql.connector.Error as err:
         print(" Error SQL:", err)
         return pd.DataFrame()
 
 
 def obtener_top_salones_ocupados(periodo_id: str, limit: int = 5) -> pd.DataFrame:
+    """
+    Salones con más horas ocupadas en el periodo (clases + reservaciones).
+    Lee el acumulado ocupacion_salon que mantienen los triggers de horario y
+    reservacion: un ORDER BY ... LIMIT sobre idx_ocupacion_top, sin agregar.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        query = """
-            SELECT
-                s.id_salon,
-                s.tipo,
-                s.capacidad,
-                COALESCE(SUM(h.duracion_minutos), 0) AS horas_ocupadas
-            FROM salon s
-            JOIN horario h ON h.id_salon = s.id_salon
-            WHERE h.id_periodo = %s
-            GROUP BY s.id_salon, s.tipo, s.capacidad
-            ORDER BY horas_ocupadas DESC
-            LIMIT %s;
-        """
-
-        cursor.execute(query, (periodo_id, limit))
-        rows = cursor.fetchall()
-        
-        if rows:
-            for row in rows:
-                 # Convertir minutos a horas (float)
-                if row['horas_ocupadas']:
-                    row['horas_ocupadas'] = float(row['horas_ocupadas']) / 60.0
-                else:
-                    row['horas_ocupadas'] = 0.0
-        
-        return pd.DataFrame(rows)
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT
+                    s.id_salon,
+                    s.tipo,
+                    s.capacidad,
+                    CAST(o.minutos_clase / 60 AS DOUBLE) AS horas_clase,
+                    CAST(o.minutos_reservacion / 60 AS DOUBLE) AS horas_reservacion,
+                    CAST(o.minutos_total / 60 AS DOUBLE) AS horas_ocupadas
+                FROM ocupacion_salon o
+                JOIN salon s ON s.id_salon = o.id_salon
+                WHERE o.id_periodo = %s
+                  AND o.minutos_total > 0
+                ORDER BY o.minutos_total DESC
+                LIMIT %s;
+            """
+
+            cursor.execute(query, (periodo_id, limit))
+            return pd.DataFrame(cursor.fetchall())
+
+    except mysql.connector.Error as err:
+        print(" Error SQL:", err)
+        return pd.DataFrame()
+
+
+def obtener_ocupacion_por_dia(periodo_id: str, id_salon: str) -> pd.DataFrame:
+    """Horas ocupadas de un salón en el periodo por día de la semana (ocupacion_salon_dia)."""
+    try:
+        with get_connection() as conn, conn.cursor(dictionary=True) as cursor:
+            query = """
+                SELECT
+                    dia_semana,
+                    CAST(minutos_clase / 60 AS DOUBLE) AS horas_clase,
+                    CAST(minutos_reservacion / 60 AS DOUBLE) AS horas_reservacion
+                FROM ocupacion_salon_dia
+                WHERE id_periodo = %s
+                  AND id_salon = %s
+                ORDER BY dia_semana;
+            """
+
+            cursor.execute(query, (periodo_id, id_salon))
+            return pd.DataFrame(cursor.fetchall())
 
     except mysql.connector.Error as err:
         print(" Error SQL:", err)
         return pd.DataFrame()
-    
\ No newline at end of file
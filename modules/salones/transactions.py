@@ -1,49 +1,64 @@
 import mysql.connector
 from config.db import get_connection
+from config.cache import invalidar
 from modules.models import TipoSalon
+from utils.sql_helpers import marcadores
 
 def crear_salon(id_salon: str, capacidad: int, tipo: TipoSalon) -> tuple[bool, str]:
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
-        query = "INSERT INTO salon (id_salon, capacidad, tipo) VALUES (%s, %s, %s)"
-        cursor.execute(query, (id_salon, capacidad, tipo))
-        conn.commit()
-        return True, "Salon creado correctamente"
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+            query = "INSERT INTO salon (id_salon, capacidad, tipo) VALUES (%s, %s, %s)"
+            cursor.execute(query, (id_salon, capacidad, tipo))
+            conn.commit()
+            invalidar("salones")
+            return True, "Salon creado correctamente"
     except mysql.connector.Error as err:
-        conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         print(" Error SQL:", err)
         return False, f"Error al crear el salon: {err}"
-    finally:
-        # Cerramos el cursor para liberar memoria
-        # Pero mantenemos la conexión (conn) abierta.
-        if cursor:
-            cursor.close()
 
 def borrar_salon(id_salon: str) -> tuple[bool, str]:
+    return borrar_salones([id_salon])[id_salon]
+
+def borrar_salones(ids_salon: list[str]) -> dict[str, tuple[bool, str]]:
+    """
+    Borra varios salones con sus horarios y reservaciones en una sola transacción:
+    un DELETE ... IN (...) por tabla sin importar cuántos salones sean.
+    Regresa {id_salon: (éxito, mensaje)}; si algo falla no se borra ninguno.
+    """
+    ids = list(dict.fromkeys(ids_salon))
+    if not ids:
+        return {}
+
     try:
-        conn = get_connection()
-        conn.autocommit = False
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM horario WHERE id_salon = %s", (id_salon,))
-        cursor.execute("DELETE FROM reservacion WHERE id_salon = %s", (id_salon,))
-        query = "DELETE FROM salon WHERE id_salon = %s"
-        cursor.execute(query, (id_salon,))
-        
-        conn.commit()
-        return True, "Salon borrado correctamente (incluyendo horarios y reservaciones)"
-        
+        with get_connection() as conn, conn.cursor() as cursor:
+            conn.autocommit = False
+            lista = marcadores(ids)
+
+            cursor.execute(f"SELECT id_salon FROM salon WHERE id_salon IN ({lista}) FOR UPDATE", ids)
+            existentes = {row[0] for row in cursor.fetchall()}
+
+            cursor.execute(f"DELETE FROM horario WHERE id_salon IN ({lista})", ids)
+            cursor.execute(f"DELETE FROM reservacion WHERE id_salon IN ({lista})", ids)
+            cursor.execute(f"DELETE FROM reservacion_periodica WHERE id_salon IN ({lista})", ids)
+            cursor.execute(f"DELETE FROM salon WHERE id_salon IN ({lista})", ids)
+
+            conn.commit()
+            if existentes:
+                invalidar("salones", "horarios", "reservaciones")
+            return {
+                id_salon: (True, "Salon borrado correctamente (incluyendo horarios y reservaciones)")
+                if id_salon in existentes else (False, "No se encontró el salón.")
+                for id_salon in ids
+            }
+
     except mysql.connector.Error as err:
-        conn.rollback()
+        # get_connection() revierte la transacción al salir con error
         print(" Error SQL:", err)
         # Check specifically for FK errors if cascading fails or isn't used
         if err.errno == 1451:
-            return False, "No se puede borrar: el salón tiene registros asociados."
-        return False, f"Error al borrar el salon: {err}"
-    finally:
-        # Cerramos el cursor para liberar memoria
-        # Pero mantenemos la conexión (conn) abierta.
-        if cursor:
-            cursor.close()
\ No newline at end of file
+            msg = "No se puede borrar: el salón tiene registros asociados."
+        else:
+            msg = f"Error al borrar el salon: {err}"
+        return {id_salon: (False, msg) for id_salon in ids}
@@ -2,14 +2,19 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import time
+from datetime import date, timedelta
 from modules.models import Rol, TipoSalon
 from .queries import (
     obtener_catalogo_salones,
     obtener_salones_avanzado,
     obtener_top_salones_ocupados,
+    obtener_ocupacion_por_dia,
     obtener_periodos
 )
-from .transactions import crear_salon, borrar_salon
+from .transactions import crear_salon, borrar_salones
+from .analytics import DIAS, FRANJAS, obtener_cubo_ocupacion, mapa_dia_franja, mapa_salon_franja, utilizacion
+from modules.reservaciones.queries import obtener_ocupacion_salon
+from utils.ui import fragmento
 
 def view_salones():
     """
@@ -24,7 +29,7 @@ def view_salones():
     es_admin = usuario.get('rol') == Rol.ADMINISTRADOR.value
 
     # Definir las pestañas disponibles
-    titulos_tabs = ["📋 Catálogo", "🔍 Búsqueda Avanzada", "📊 Ocupación"]
+    titulos_tabs = ["📋 Catálogo", "🔍 Búsqueda Avanzada", "📊 Ocupación", "🗺️ Mapa de Calor", "📅 Semana"]
     if es_admin:
         titulos_tabs.append("➕ Nuevo Salón")
 
@@ -35,178 +40,298 @@ def view_salones():
     tab_catalogo = tabs[0]
     tab_busqueda = tabs[1]
     tab_stats = tabs[2]
-    tab_nuevo = tabs[3] if es_admin else None
+    tab_mapa = tabs[3]
+    tab_semana = tabs[4]
+    tab_nuevo = tabs[5] if es_admin else None
 
     # --- TAB 1: CATÁLOGO ---
     with tab_catalogo:
-        st.subheader("Listado de Salones")
-        
-        # Cargamos datos
-        df_salones = obtener_catalogo_salones()
-        
-        if not df_salones.empty:
-            # Mostramos métricas rápidas
-            col1, col2, col3 = st.columns(3)
-            col1.metric("Total de Salones", len(df_salones))
-            
-            # Verificamos columnas para evitar errores si la query cambia
-            if 'capacidad' in df_salones.columns:
-                col2.metric("Capacidad Promedio", f"{df_salones['capacidad'].mean():.0f} personas")
-            
-            if 'tipo' in df_salones.columns:
-                top_tipo = df_salones['tipo'].mode()[0]
-                col3.metric("Tipo más común", top_tipo)
-
-            # Lógica de visualización/edición
-            if es_admin:
-                st.write("📝 **Modo Administrador**: Selecciona los salones que deseas eliminar.")
-                
-                # Añadimos columna para selección si no existe
-                if "Eliminar" not in df_salones.columns:
-                    df_salones["Eliminar"] = False
-                
-                # Reordenamos columnas para que Eliminar salga primero
-                cols = ["Eliminar"] + [c for c in df_salones.columns if c != "Eliminar"]
-                df_salones = df_salones[cols]
-
-                # Editor de datos
-                edited_df = st.data_editor(
-                    df_salones,
-                    column_config={
-                        "Eliminar": st.column_config.CheckboxColumn(
-                            "Eliminar",
-                            help="Selecciona para borrar este salón",
-                            default=False,
-                        ),
-                        "id_salon": st.column_config.TextColumn(
-                            "ID Salón",
-                            disabled=True
-                        ),
-                        "capacidad": st.column_config.NumberColumn(
-                            "Capacidad",
-                            disabled=True
-                        ),
-                        "tipo": st.column_config.TextColumn(
-                            "Tipo",
-                            disabled=True
-                        )
-                    },
-                    disabled=["id_salon", "capacidad", "tipo"], # Refuerzo de seguridad
-                    hide_index=True,
-                    use_container_width=True,
-                    key="editor_salones"
-                )
-
-                # Detectar filas marcadas para eliminar
-                to_delete = edited_df[edited_df["Eliminar"] == True]
-                
-                if not to_delete.empty:
-                    st.warning(f"Has seleccionado {len(to_delete)} salones para eliminar.")
-                    if st.button("🗑️ Confirmar Eliminación", type="primary"):
-                        for index, row in to_delete.iterrows():
-                            success, msg = borrar_salon(row['id_salon'])
-                            if success:
-                                st.toast(f"Salón {row['id_salon']} eliminado.")
-                            else:
-                                st.error(f"Error al eliminar {row['id_salon']}: {msg}")
-                        
-                        time.sleep(1)
-                        st.rerun()
-
-            else:
-                # Vista solo lectura para no admins
-                st.dataframe(
-                    df_salones, 
-                    use_container_width=True,
-                    hide_index=True
-                )
-        else:
-            st.info("No se encontraron salones registrados.")
+        _tab_catalogo(es_admin)
 
     # --- TAB 2: BÚSQUEDA ---
     with tab_busqueda:
-        st.subheader("Encontrar salón")
-        
-        # Controles de filtro en columnas
-        c1, c2, c3 = st.columns([2, 2, 1])
-        with c1:
-            capacidad_min = st.slider("Capacidad mínima requerida", 0, 200, 20, step=5)
-        with c2:
-            # Opciones hardcodeadas basadas en el ENUM de la BD
-            tipo_opcion = st.selectbox("Tipo de espacio", ["Cualquiera", "Aula", "Laboratorio", "Auditorio"])
-        with c3:
-            st.write("") # Espaciado vertical
-            st.write("") 
-            btn_buscar = st.button("Buscar", type="primary", use_container_width=True)
-
-        if btn_buscar:
-            # Convertimos "Cualquiera" a None para la función de query
-            tipo_filtro = None if tipo_opcion == "Cualquiera" else tipo_opcion
-            
-            df_resultados = obtener_salones_avanzado(capacidad_min, tipo_filtro)
-            
-            if not df_resultados.empty:
-                st.success(f"✅ Se encontraron {len(df_resultados)} salones que cumplen los criterios.")
-                st.dataframe(df_resultados, use_container_width=True, hide_index=True)
-            else:
-                st.warning("⚠️ No hay salones con esas características.")
+        _tab_busqueda()
 
     # --- TAB 3: ESTADÍSTICAS ---
     with tab_stats:
-        st.subheader("Top Salones Ocupados")
-        
-        # Selector de Periodo
-        df_periodos = obtener_periodos()
-        if not df_periodos.empty:
-            periodo_selec = st.selectbox("Seleccionar Periodo", df_periodos['id_periodo'])
-            
-            limit = st.slider("Cantidad a mostrar", 1, 5, 4)
-            df_top = obtener_top_salones_ocupados(periodo_selec, limit)
-            
-            if not df_top.empty and 'horas_ocupadas' in df_top.columns:
-                # Gráfico de barras con Altair para mejor visualización
-                chart = alt.Chart(df_top).mark_bar().encode(
-                    x=alt.X('id_salon', sort='-y', title='Salón'),
-                    y=alt.Y('horas_ocupadas', title='Horas Ocupadas (Semanal)'),
-                    color=alt.Color('tipo', legend=alt.Legend(title="Tipo")),
-                    tooltip=['id_salon', 'tipo', 'capacidad', 'horas_ocupadas']
-                ).properties(
-                    height=400
-                ).interactive()
-                
-                st.altair_chart(chart, use_container_width=True)
-                
-                # Tabla de datos debajo
-                st.dataframe(df_top, use_container_width=True, hide_index=True)
-            else:
-                st.info("No hay datos de ocupación suficientes para este periodo.")
-        else:
-            st.warning("No hay periodos registrados en el sistema.")
+        _tab_estadisticas()
+
+    # --- TAB 4: MAPA DE CALOR ---
+    with tab_mapa:
+        _tab_mapa_calor()
+
+    # --- TAB 5: SEMANA DE UN SALÓN ---
+    with tab_semana:
+        _tab_semana()
 
-    # --- TAB 4: NUEVO SALÓN (Solo Admin) ---
+    # --- TAB 6: NUEVO SALÓN (Solo Admin) ---
     if es_admin and tab_nuevo:
         with tab_nuevo:
-            st.subheader("Registrar Nuevo Salón")
-            st.markdown("Utiliza este formulario para dar de alta nuevos espacios en el sistema.")
-            
-            with st.form("form_nuevo_salon"):
-                col_a, col_b = st.columns(2)
-                with col_a:
-                    new_id = st.text_input("ID del Salón (ej. IA104, CN105)", max_chars=10)
-                    new_tipo = st.selectbox("Tipo de Espacio", [t.value for t in TipoSalon])
-                with col_b:
-                    new_capacidad = st.number_input("Capacidad (personas)", min_value=1, value=30, step=1)
-                
-                submitted = st.form_submit_button("💾 Crear Salón", type="primary")
-                
-                if submitted:
-                    if new_id and new_capacidad:
-                        exito, msg = crear_salon(new_id, new_capacidad, new_tipo)
-                        if exito:
-                            st.success(msg)
-                            time.sleep(1) 
-                            st.rerun()
+            _tab_nuevo_salon()
+
+
+@fragmento
+def _tab_catalogo(es_admin: bool):
+    """Listado de salones; los administradores pueden marcar salones para eliminar."""
+    st.subheader("Listado de Salones")
+
+    # Cargamos datos
+    df_salones = obtener_catalogo_salones()
+
+    if not df_salones.empty:
+        # Mostramos métricas rápidas
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total de Salones", len(df_salones))
+
+        # Verificamos columnas para evitar errores si la query cambia
+        if 'capacidad' in df_salones.columns:
+            col2.metric("Capacidad Promedio", f"{df_salones['capacidad'].mean():.0f} personas")
+
+        if 'tipo' in df_salones.columns:
+            top_tipo = df_salones['tipo'].mode()[0]
+            col3.metric("Tipo más común", top_tipo)
+
+        # Lógica de visualización/edición
+        if es_admin:
+            st.write("📝 **Modo Administrador**: Selecciona los salones que deseas eliminar.")
+
+            # Añadimos columna para selección si no existe
+            if "Eliminar" not in df_salones.columns:
+                df_salones["Eliminar"] = False
+
+            # Reordenamos columnas para que Eliminar salga primero
+            cols = ["Eliminar"] + [c for c in df_salones.columns if c != "Eliminar"]
+            df_salones = df_salones[cols]
+
+            # Editor de datos
+            edited_df = st.data_editor(
+                df_salones,
+                column_config={
+                    "Eliminar": st.column_config.CheckboxColumn(
+                        "Eliminar",
+                        help="Selecciona para borrar este salón",
+                        default=False,
+                    ),
+                    "id_salon": st.column_config.TextColumn(
+                        "ID Salón",
+                        disabled=True
+                    ),
+                    "capacidad": st.column_config.NumberColumn(
+                        "Capacidad",
+                        disabled=True
+                    ),
+                    "tipo": st.column_config.TextColumn(
+                        "Tipo",
+                        disabled=True
+                    )
+                },
+                disabled=["id_salon", "capacidad", "tipo"], # Refuerzo de seguridad
+                hide_index=True,
+                use_container_width=True,
+                key="editor_salones"
+            )
+
+            # Detectar filas marcadas para eliminar
+            to_delete = edited_df[edited_df["Eliminar"] == True]
+
+            if not to_delete.empty:
+                st.warning(f"Has seleccionado {len(to_delete)} salones para eliminar.")
+                if st.button("🗑️ Confirmar Eliminación", type="primary"):
+                    resultados = borrar_salones(to_delete['id_salon'].tolist())
+                    for id_salon, (success, msg) in resultados.items():
+                        if success:
+                            st.toast(f"Salón {id_salon} eliminado.")
                         else:
-                            st.error(msg)
-                    else:
-                        st.warning("El ID y la capacidad son obligatorios.")
+                            st.error(f"Error al eliminar {id_salon}: {msg}")
+
+                    time.sleep(1)
+                    st.rerun()
+
+        else:
+            # Vista solo lectura para no admins
+            st.dataframe(
+                df_salones, 
+                use_container_width=True,
+                hide_index=True
+            )
+    else:
+        st.info("No se encontraron salones registrados.")
+
+
+@fragmento
+def _tab_busqueda():
+    """Búsqueda de salones por capacidad mínima y tipo."""
+    st.subheader("Encontrar salón")
+
+    # Controles de filtro en columnas
+    c1, c2, c3 = st.columns([2, 2, 1])
+    with c1:
+        capacidad_min = st.slider("Capacidad mínima requerida", 0, 200, 20, step=5)
+    with c2:
+        # Opciones hardcodeadas basadas en el ENUM de la BD
+        tipo_opcion = st.selectbox("Tipo de espacio", ["Cualquiera", "Aula", "Laboratorio", "Auditorio"])
+    with c3:
+        st.write("") # Espaciado vertical
+        st.write("") 
+        btn_buscar = st.button("Buscar", type="primary", use_container_width=True)
+
+    if btn_buscar:
+        # Convertimos "Cualquiera" a None para la función de query
+        tipo_filtro = None if tipo_opcion == "Cualquiera" else tipo_opcion
+
+        df_resultados = obtener_salones_avanzado(capacidad_min, tipo_filtro)
+
+        if not df_resultados.empty:
+            st.success(f"✅ Se encontraron {len(df_resultados)} salones que cumplen los criterios.")
+            st.dataframe(df_resultados, use_container_width=True, hide_index=True)
+        else:
+            st.warning("⚠️ No hay salones con esas características.")
+
+
+@fragmento
+def _tab_estadisticas():
+    """Top de salones más ocupados en un periodo."""
+    st.subheader("Top Salones Ocupados")
+
+    # Selector de Periodo
+    df_periodos = obtener_periodos()
+    if not df_periodos.empty:
+        periodo_selec = st.selectbox("Seleccionar Periodo", df_periodos['id_periodo'])
+
+        limit = st.slider("Cantidad a mostrar", 1, 5, 4)
+        df_top = obtener_top_salones_ocupados(periodo_selec, limit)
+
+        if not df_top.empty and 'horas_ocupadas' in df_top.columns:
+            # Gráfico de barras con Altair para mejor visualización
+            chart = alt.Chart(df_top).mark_bar().encode(
+                x=alt.X('id_salon', sort='-y', title='Salón'),
+                y=alt.Y('horas_ocupadas', title='Horas Ocupadas (Periodo)'),
+                color=alt.Color('tipo', legend=alt.Legend(title="Tipo")),
+                tooltip=['id_salon', 'tipo', 'capacidad', 'horas_clase', 'horas_reservacion', 'horas_ocupadas']
+            ).properties(
+                height=400
+            ).interactive()
+
+            st.altair_chart(chart, use_container_width=True)
+
+            # Tabla de datos debajo
+            st.dataframe(df_top, use_container_width=True, hide_index=True)
+
+            # Desglose por día de la semana de un salón del top
+            salon_detalle = st.selectbox("Ocupación por día de", df_top['id_salon'])
+            df_dias = obtener_ocupacion_por_dia(periodo_selec, salon_detalle)
+            if not df_dias.empty:
+                st.dataframe(df_dias, use_container_width=True, hide_index=True)
+        else:
+            st.info("No hay datos de ocupación suficientes para este periodo.")
+    else:
+        st.warning("No hay periodos registrados en el sistema.")
+
+
+@fragmento
+def _tab_mapa_calor():
+    """Ocupación por día y franja horaria de un periodo (clases + reservaciones)."""
+    st.subheader("Mapa de Ocupación")
+
+    df_periodos = obtener_periodos()
+    if df_periodos.empty:
+        st.warning("No hay periodos registrados en el sistema.")
+        return
+
+    periodo_selec = st.selectbox("Seleccionar Periodo", df_periodos['id_periodo'], key="mapa_periodo")
+    resultado = obtener_cubo_ocupacion(periodo_selec)
+    if resultado is None:
+        st.error("No se pudo calcular la ocupación del periodo.")
+        return
+    salones, cubo = resultado
+    if not salones:
+        st.info("No hay salones registrados.")
+        return
+
+    # Porcentajes de utilización del campus
+    uso = utilizacion(cubo)
+    dia_pico = max(uso["por_dia"], key=uso["por_dia"].get)
+    franja_pico = max(uso["por_franja"], key=uso["por_franja"].get)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Utilización del campus", f"{uso['total']:.1f}%")
+    col2.metric("Día más ocupado", dia_pico, f"{uso['por_dia'][dia_pico]:.1f}%", delta_color="off")
+    col3.metric("Franja más ocupada", franja_pico, f"{uso['por_franja'][franja_pico]:.1f}%", delta_color="off")
+
+    escala = alt.Scale(domain=[0, 1], scheme="orangered")
+
+    st.markdown("**Campus: día × franja**")
+    chart_dias = alt.Chart(mapa_dia_franja(cubo)).mark_rect().encode(
+        x=alt.X('franja:O', sort=FRANJAS, title='Franja'),
+        y=alt.Y('dia_semana:O', sort=DIAS, title='Día'),
+        color=alt.Color('ocupacion:Q', scale=escala, legend=alt.Legend(title="Ocupación", format="%")),
+        tooltip=['dia_semana', 'franja', alt.Tooltip('ocupacion:Q', format='.0%')]
+    ).properties(height=250)
+    st.altair_chart(chart_dias, use_container_width=True)
+
+    st.markdown("**Por salón: salón × franja**")
+    dia_selec = st.selectbox("Día", ["Promedio semanal"] + DIAS, key="mapa_dia")
+    df_salones = mapa_salon_franja(salones, cubo, None if dia_selec == "Promedio semanal" else dia_selec)
+    chart_salones = alt.Chart(df_salones).mark_rect().encode(
+        x=alt.X('franja:O', sort=FRANJAS, title='Franja'),
+        y=alt.Y('id_salon:O', sort=salones, title='Salón'),
+        color=alt.Color('ocupacion:Q', scale=escala, legend=alt.Legend(title="Ocupación", format="%")),
+        tooltip=['id_salon', 'franja', alt.Tooltip('ocupacion:Q', format='.0%')]
+    ).properties(height=max(250, 14 * len(salones)))
+    st.altair_chart(chart_salones, use_container_width=True)
+
+
+@fragmento
+def _tab_semana():
+    """Clases y reservaciones de un salón en una semana, como cuadrícula día × franja."""
+    st.subheader("Semana de un Salón")
+
+    df_salones = obtener_catalogo_salones()
+    if df_salones.empty:
+        st.warning("No hay salones registrados.")
+        return
+
+    c1, c2 = st.columns(2)
+    with c1:
+        id_salon = st.selectbox("Salón", df_salones['id_salon'], key="semana_salon")
+    with c2:
+        fecha = st.date_input("Semana del", value=date.today(), key="semana_fecha")
+
+    # Siempre el lunes, para que toda la semana comparta la entrada de caché
+    lunes = fecha - timedelta(days=fecha.weekday())
+    df_semana = obtener_ocupacion_salon(id_salon, lunes)
+    if df_semana.empty:
+        st.error("No se pudo consultar la ocupación del salón.")
+        return
+
+    ocupadas = (df_semana != "").to_numpy().sum()
+    st.caption(f"{ocupadas} de {df_semana.size} franjas ocupadas · 📘 clase · 📌 reservación · 🔁 reservación periódica")
+    st.dataframe(df_semana, use_container_width=True, height=(len(df_semana) + 1) * 35 + 3)
+
+
+@fragmento
+def _tab_nuevo_salon():
+    """Formulario de alta de salones (Solo Admin)."""
+    st.subheader("Registrar Nuevo Salón")
+    st.markdown("Utiliza este formulario para dar de alta nuevos espacios en el sistema.")
+
+    with st.form("form_nuevo_salon"):
+        col_a, col_b = st.columns(2)
+        with col_a:
+            new_id = st.text_input("ID del Salón (ej. IA104, CN105)", max_chars=10)
+            new_tipo = st.selectbox("Tipo de Espacio", [t.value for t in TipoSalon])
+        with col_b:
+            new_capacidad = st.number_input("Capacidad (personas)", min_value=1, value=30, step=1)
+
+        submitted = st.form_submit_button("💾 Crear Salón", type="primary")
+
+        if submitted:
+            if new_id and new_capacidad:
+                exito, msg = crear_salon(new_id, new_capacidad, new_tipo)
+                if exito:
+                    st.success(msg)
+                    time.sleep(1) 
+                    st.rerun()
+                else:
+                    st.error(msg)
+            else:
+                st.warning("El ID y la capacidad son obligatorios.")
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from modules.horarios.bulk_import import _barrido_traslapes
+
+
+def _datos(*filas):
+    return pd.DataFrame(
+        [(i + 2, "S1", "P1", "Miercoles", ini * 60, fin * 60) for i, (ini, fin) in enumerate(filas)],
+        columns=["fila", "id_salon", "id_periodo", "dia_semana", "inicio", "fin"],
+    )
+
+
+def _existentes(*filas):
+    return pd.DataFrame(
+        [(100 + i, "S1", "P1", "Miercoles", ini * 60, fin * 60) for i, (ini, fin) in enumerate(filas)],
+        columns=["id_horario", "id_salon", "id_periodo", "dia_semana", "inicio", "fin"],
+    )
+
+
+def test_fila_que_empieza_despues_de_un_existente():
+    validos, errores = _barrido_traslapes(_datos((630, 720)), _existentes((600, 660)))
+    assert validos.empty
+    assert [e["fila"] for e in errores] == [2]
+    assert "#100" in errores[0]["error"]
+
+
+def test_existente_que_empieza_despues_de_una_fila():
+    validos, errores = _barrido_traslapes(_datos((600, 660)), _existentes((630, 720)))
+    assert validos.empty
+    assert [e["fila"] for e in errores] == [2]
+    assert "#100" in errores[0]["error"]
+
+
+def test_fila_abierta_sobre_varios_existentes_reporta_una_vez():
+    validos, errores = _barrido_traslapes(_datos((540, 720)), _existentes((600, 630), (660, 690)))
+    assert validos.empty
+    assert [e["fila"] for e in errores] == [2]
+
+
+def test_filas_contiguas_no_chocan():
+    validos, errores = _barrido_traslapes(_datos((540, 600), (660, 720)), _existentes((600, 660)))
+    assert errores == []
+    assert validos["fila"].tolist() == [2, 3]
+
+
+def test_choque_dentro_del_archivo_y_con_existente():
+    # Fila 3 choca con la 2; la 2 sigue abierta cuando empieza el existente
+    validos, errores = _barrido_traslapes(_datos((540, 660), (570, 600)), _existentes((630, 700)))
+    assert validos.empty
+    assert sorted(e["fila"] for e in errores) == [2, 3]
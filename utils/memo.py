@@ -0,0 +1,76 @@
+"""Memoización por ejecución del script: evita repetir la misma consulta en un rerun."""
+
+import functools
+import threading
+from contextlib import contextmanager
+
+from config.cache import al_invalidar, copiar_resultado
+
+# Streamlit ejecuta cada rerun de una sesión en su propio hilo
+_estado = threading.local()
+
+_total_lock = threading.Lock()
+_total_ahorradas = 0
+
+
+@contextmanager
+def alcance_de_ejecucion():
+    """
+    Abre el alcance de memoización de una ejecución (rerun) del script.
+    Es reentrante: si ya hay un alcance abierto, se reutiliza.
+    """
+    if getattr(_estado, "memo", None) is not None:
+        yield
+        return
+
+    _estado.memo = {}
+    _estado.ahorradas = 0
+    try:
+        yield
+    finally:
+        _estado.memo = None
+
+
+def memo_por_ejecucion(func):
+    """
+    Dentro de un alcance de ejecución, las llamadas con los mismos argumentos
+    regresan una copia del primer resultado en lugar de ir a la BD.
+    Fuera de un alcance, llama directo a la función.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _total_ahorradas
+        memo = getattr(_estado, "memo", None)
+        if memo is None:
+            return func(*args, **kwargs)
+
+        clave = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        if clave in memo:
+            _estado.ahorradas += 1
+            with _total_lock:
+                _total_ahorradas += 1
+            return copiar_resultado(memo[clave])
+
+        resultado = func(*args, **kwargs)
+        memo[clave] = copiar_resultado(resultado)
+        return resultado
+
+    return wrapper
+
+
+def consultas_ahorradas() -> int:
+    """Llamadas a la BD evitadas en la ejecución actual."""
+    return getattr(_estado, "ahorradas", 0)
+
+
+def consultas_ahorradas_total() -> int:
+    """Llamadas a la BD evitadas desde que arrancó el servidor."""
+    return _total_ahorradas
+
+
+@al_invalidar
+def _olvidar_ejecucion_actual(etiquetas):
+    # Una escritura en esta misma ejecución invalida lo memorizado hasta ahora
+    memo = getattr(_estado, "memo", None)
+    if memo:
+        memo.clear()
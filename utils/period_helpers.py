@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, timedelta
 
 def obtener_fechas_periodo(tipo: str, anio: int) -> tuple[date, date]:
     """
@@ -11,3 +11,14 @@ def obtener_fechas_periodo(tipo: str, anio: int) -> tuple[date, date]:
     else:  # PRIMAVERA
         return date(anio, 1, 15), date(anio, 5, 20)
 
+
+def fechas_del_dia_semana(fecha_inicio: date, fecha_fin: date, dia_semana: int) -> list[date]:
+    """
+    Todas las fechas entre fecha_inicio y fecha_fin (inclusive) que caen en
+    dia_semana (0 = Lunes, como date.weekday()).
+    """
+    primera = fecha_inicio + timedelta(days=(dia_semana - fecha_inicio.weekday()) % 7)
+    if primera > fecha_fin:
+        return []
+    semanas = (fecha_fin - primera).days // 7
+    return [primera + timedelta(weeks=i) for i in range(semanas + 1)]
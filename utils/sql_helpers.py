@@ -0,0 +1,64 @@
+"""Helpers para armar SQL parametrizado con listas de valores."""
+
+
+def tabla_de_valores(columnas: list[tuple[str, str]], filas: list[tuple]) -> tuple[str, list]:
+    """
+    Arma una tabla derivada con las filas dadas para usarla en FROM/JOIN:
+
+        sql, params = tabla_de_valores([("fecha", "DATE")], [(d,) for d in fechas])
+        cursor.execute(f"SELECT ... FROM ({sql}) AS f ...", params)
+
+    Cada columna es (nombre, tipo de CAST) para que el tipo no dependa de cómo
+    el conector envía el parámetro. Las columnas de texto van con tipo None (sin
+    CAST) para que se comparen con la collation de la columna de la tabla.
+    Regresa el SQL y la lista plana de parámetros.
+    """
+    if not filas:
+        raise ValueError("La tabla de valores necesita al menos una fila.")
+
+    def valor(tipo):
+        return f"CAST(%s AS {tipo})" if tipo else "%s"
+
+    primera = "SELECT " + ", ".join(f"{valor(tipo)} AS {nombre}" for nombre, tipo in columnas)
+    siguiente = "SELECT " + ", ".join(valor(tipo) for _, tipo in columnas)
+    sql = "\n UNION ALL ".join([primera] + [siguiente] * (len(filas) - 1))
+
+    params = [valor for fila in filas for valor in fila]
+    return sql, params
+
+
+def marcadores(valores) -> str:
+    """Marcadores '%s, %s, ...' para una lista IN (...) con un parámetro por valor."""
+    if not valores:
+        raise ValueError("La lista IN necesita al menos un valor.")
+    return ", ".join(["%s"] * len(valores))
+
+
+def condicion_keyset(columnas: list[str], despues_de: tuple, descendente: bool = False) -> tuple[str, list]:
+    """
+    Condición de paginación por llave (seek) para ORDER BY columnas:
+    filas estrictamente después de `despues_de` en ese orden.
+
+        (a > %s) OR (a = %s AND b > %s) OR (a = %s AND b = %s AND c > %s)
+
+    Se expande en OR en lugar de (a, b, c) > (...) para que MariaDB la
+    resuelva como rango sobre el índice.
+    """
+    op = "<" if descendente else ">"
+    terminos, params = [], []
+    for i, columna in enumerate(columnas):
+        iguales = [f"{c} = %s" for c in columnas[:i]]
+        terminos.append("(" + " AND ".join(iguales + [f"{columna} {op} %s"]) + ")")
+        params += list(despues_de[:i]) + [despues_de[i]]
+    return "(" + " OR ".join(terminos) + ")", params
+
+
+def dividir_pagina(filas: list[dict], claves: list[str], tamano: int) -> tuple[list[dict], tuple | None]:
+    """
+    Para consultas con LIMIT tamano + 1: regresa la página y la llave de la
+    última fila para pedir la siguiente, o None si ya no hay más.
+    """
+    if len(filas) <= tamano:
+        return filas, None
+    pagina = filas[:tamano]
+    return pagina, tuple(pagina[-1][c] for c in claves)
@@ -0,0 +1,15 @@
+import re
+
+# Títulos que se ignoran al buscar por profesor ("Dr. Zechinelli" -> "zechinelli").
+# Debe coincidir con la expresión de la columna generada curso.profesor_normalizado.
+_TITULOS = re.compile(r"^(dr|dra|prof|profa|mtro|mtra|ing|lic)[.]?\s+", re.IGNORECASE)
+
+
+def normalizar_profesor(nombre: str) -> str:
+    """Nombre sin título, sin espacios en los extremos y en minúsculas. Los acentos los ignora la collation."""
+    return _TITULOS.sub("", nombre.strip()).lower()
+
+
+def patron_prefijo(texto: str) -> str:
+    """Patrón LIKE 'texto%' escapando los comodines que traiga el texto."""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
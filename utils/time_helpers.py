@@ -0,0 +1,18 @@
+from datetime import time
+
+
+def hora_a_str(hora: time) -> str:
+    """Formatea una hora como 'HH:MM:SS' para usarla como parámetro TIME."""
+    return hora.strftime("%H:%M:%S")
+
+
+def calcular_hora_fin(hora_inicio: time, duracion_min: int) -> str:
+    """
+    Hora de término como 'HH:MM:SS', igual que la columna generada hora_fin
+    (ADDTIME(hora_inicio, SEC_TO_TIME(duracion_minutos * 60))).
+    Puede pasar de 24:00:00, igual que un TIME de MySQL.
+    """
+    total = hora_inicio.hour * 3600 + hora_inicio.minute * 60 + hora_inicio.second + duracion_min * 60
+    horas, resto = divmod(total, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
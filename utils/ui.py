@@ -1,8 +1,112 @@
 """UI funciones para aplicar un tema personalizado a la app."""
 
+import contextlib
+import functools
+import os
+import tempfile
+import weakref
+import mysql.connector
 import streamlit as st
+from config.metrics import medir_interaccion
+from utils.memo import alcance_de_ejecucion
 
 
+def fragmento(func):
+    """
+    Declara una sección de la página como st.fragment: al interactuar con sus
+    widgets solo se vuelve a ejecutar esa sección, no la app completa.
+    Cuando el fragmento corre solo, abre su propio alcance de memoización y
+    registra cuántas sentencias costó la interacción.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with medir_interaccion(func.__name__), alcance_de_ejecucion():
+            return func(*args, **kwargs)
+
+    return st.fragment(wrapper)
+
+
+def paginador(clave: str, obtener_pagina, **filtros):
+    """
+    Controles ◀ / ▶ para las consultas *_pagina (paginación por llave).
+    Guarda en session_state la pila de llaves de las páginas visitadas, así
+    "Anterior" no necesita OFFSET. Si cambian los filtros vuelve a la primera página.
+    Regresa el DataFrame de la página actual.
+    """
+    estado = st.session_state.get(clave)
+    if estado is None or estado["filtros"] != filtros:
+        estado = {"filtros": filtros, "pila": [None]}
+        st.session_state[clave] = estado
+    pila = estado["pila"]
+
+    df, siguiente = obtener_pagina(despues_de=pila[-1], **filtros)
+
+    col_ant, col_num, col_sig = st.columns([1, 2, 1])
+    col_ant.button("◀ Anterior", key=f"{clave}_anterior", disabled=len(pila) == 1,
+                   on_click=pila.pop, use_container_width=True)
+    col_num.caption(f"Página {len(pila)}")
+    col_sig.button("Siguiente ▶", key=f"{clave}_siguiente", disabled=siguiente is None,
+                   on_click=pila.append, args=(siguiente,), use_container_width=True)
+    return df
+
+
+def _borrar_archivo(ruta: str):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(ruta)
+
+
+class _ArchivoTemporal:
+    """
+    Ruta de un temporal guardada en session_state. El archivo se borra con
+    borrar(), o cuando la sesión termina y su estado se recolecta (o al
+    apagar el servidor), vía weakref.finalize.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.borrar = weakref.finalize(self, _borrar_archivo, ruta)
+
+
+def exportacion_descargable(clave: str, nombre_archivo: str, exportar, **filtros):
+    """
+    Elige formato, genera el archivo con `exportar(destino, formato, **filtros)`
+    (ver modules/export.py) en un temporal del servidor y lo ofrece con
+    st.download_button. El archivo se escribe por bloques, sin armar un DataFrame;
+    la sesión solo guarda la ruta y el número de filas, y el archivo se abre al
+    dibujar el botón. Se borra al generar otro o al terminar la sesión.
+    """
+    col_formato, col_boton = st.columns([1, 2])
+    with col_formato:
+        formato = st.radio("Formato", ["csv", "parquet"], horizontal=True, key=f"{clave}_formato")
+    with col_boton:
+        generar = st.button("Generar archivo", key=f"{clave}_generar", use_container_width=True)
+
+    if generar:
+        anterior = st.session_state.pop(clave, None)
+        if anterior:
+            anterior["archivo"].borrar()
+        with tempfile.NamedTemporaryFile(suffix=f".{formato}", delete=False) as tmp:
+            archivo = _ArchivoTemporal(tmp.name)
+        try:
+            with st.spinner("Exportando..."):
+                filas = exportar(archivo.ruta, formato, **filtros)
+        except (ValueError, mysql.connector.Error) as err:
+            archivo.borrar()
+            st.error(f"No se pudo exportar: {err}")
+        else:
+            st.session_state[clave] = {"archivo": archivo, "formato": formato, "filas": filas}
+
+    generado = st.session_state.get(clave)
+    if generado and os.path.exists(generado["archivo"].ruta):
+        with open(generado["archivo"].ruta, "rb") as datos:
+            st.download_button(
+                f"Descargar {generado['filas']:,} filas ({generado['formato'].upper()})",
+                datos,
+                file_name=f"{nombre_archivo}.{generado['formato']}",
+                mime="text/csv" if generado["formato"] == "csv" else "application/octet-stream",
+                key=f"{clave}_descargar",
+            )
+
 def aplicar_tema_personalizado():
     """Aplica un tema personalizado a la app."""
     st.markdown(